@@ -7,6 +7,7 @@ from custom_components.evohome import (
     evoZone, 
     evoDhwSensor,
     evoDhwSwitch,
+    prefetchSchedules,
     
     DATA_EVOHOME, 
     CONF_LOCATION_ID,
@@ -18,27 +19,50 @@ _LOGGER = logging.getLogger(__name__)
 
 
 def setup_platform(hass, config, add_devices, discovery_info=None):
-    """Set up a Honeywell evohome CH/DHW system."""
+    """Set up a Honeywell evohome CH/DHW system (or several of them)."""
 
     _LOGGER.debug("Started: setup_platform()")
 
-# Pull out the domain configuration from hass.data
-    ec_api = hass.data[DATA_EVOHOME]['evohomeClient']
-    ec_idx = hass.data[DATA_EVOHOME]['config'][CONF_LOCATION_ID]
-    ec_loc = ec_api.installation_info[ec_idx]
+    devices = []
 
+# In fleet mode, there is more than one account (each with its domain_data)
+    for domain_data in hass.data[DATA_EVOHOME]['fleet'].values():
+        ec_api = domain_data['apiClient']
+        ec_idx = domain_data['config'].get(CONF_LOCATION_ID)
+
+# Unless a location_id is configured, every location (and TCS) is polled
+        if ec_idx is None:
+            ec_locs = ec_api.locations
+        else:
+            ec_locs = [ec_api.locations[ec_idx]]
+
+        for ec_loc in ec_locs:
+            for gwyObjRef in ec_loc._gateways:
+                for tcsObjRef in gwyObjRef._control_systems:
+                    devices.extend(_returnDevices(hass, ec_api, tcsObjRef))
+
+
+# Now, for efficiency) add all controllers and zones in a single call
+    add_devices(devices, False)
+
+    _LOGGER.debug("Finished: setup_platform()")
+    return True
 
-# Collect the (master) controller
-    tcsObjRef = ec_api.locations[ec_idx]._gateways[0]._control_systems[0]
 
+def _returnDevices(hass, ec_api, tcsObjRef):
+    """Return the entities of a TCS: the controller, its zones, and any DHW."""
+
+# Collect the (master) controller
     _LOGGER.info(
-        "Found Controller object [idx=%s]: id: %s [%s], type: %s",
-        ec_idx,
+        "Found Controller object: id: %s [%s], type: %s",
         tcsObjRef.systemId,
         tcsObjRef.location.name,
         tcsObjRef.modelType
     )
 
+# Fetch any (uncached) schedules in parallel, before the zones need them
+    prefetchSchedules(hass, ec_api, tcsObjRef)
+
     master = evoController(hass, ec_api, tcsObjRef)  # create the controller
     slaves = []
 
@@ -72,9 +96,4 @@ def setup_platform(hass, config, add_devices, discovery_info=None):
         slave = evoDhwSwitch(hass, ec_api, tcsObjRef.hotwater)  # create a DHW zone
         slaves.append(slave)  # add this DHW zone to the list of devices
 
-        
-# Now, for efficiency) add controller and all zones in a single call
-    add_devices([master] + slaves, False)
-
-    _LOGGER.debug("Finished: setup_platform()")
-    return True
+    return [master] + slaves
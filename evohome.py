@@ -16,15 +16,30 @@ evohome:
 #  - checked with: flake8 --ignore=E303,E241 --max-line-length=150 evohome.py
 #  - _OAUTH_TIMEOUT_SECONDS to be config var
 
+import abc
+import aiohttp
+import asyncio
+import bisect
+import copy
+from collections import deque
 import functools as ft
+import hashlib
+import json
 import logging
+import multiprocessing
+import random
 import requests
 import sched
 import socket
+import threading
 import voluptuous as vol
 
+from aiohttp import web
+
 from datetime import datetime, timedelta
-from time import sleep, strftime, strptime, mktime
+from time import monotonic, sleep, strftime, strptime, mktime
+from urllib.parse import urlsplit
+from yarl import URL
 
 from homeassistant.components.climate import (
     ClimateDevice, PLATFORM_SCHEMA,
@@ -58,6 +73,8 @@ from homeassistant.components.switch import (
   SwitchDevice
 )
 
+from homeassistant.components.http import HomeAssistantView
+
 from homeassistant.const import (
     CONF_USERNAME, 
     CONF_PASSWORD, 
@@ -75,8 +92,13 @@ from homeassistant.const import (
 #   ATTR_SUPPORTED_FEATURES = 'supported_features'
 #   ATTR_TEMPERATURE = 'temperature'
     ATTR_TEMPERATURE,
+
+    CONTENT_TYPE_TEXT_PLAIN,
     
     DEVICE_CLASS_TEMPERATURE,
+
+    EVENT_HOMEASSISTANT_CLOSE,
+    EVENT_HOMEASSISTANT_STOP,
     
     STATE_OFF,
     STATE_ON,
@@ -87,15 +109,23 @@ CONF_HIGH_PRECISION = 'high_precision'
 CONF_USE_HEURISTICS = 'use_heuristics'
 CONF_USE_SCHEDULES = 'use_schedules'
 CONF_LOCATION_ID = 'location_id'
+CONF_SCHEDULE_CONCURRENCY = 'schedule_concurrency'
+CONF_SCHEDULE_RATE = 'schedule_rate'
+CONF_API_BUDGET = 'api_budget'
+CONF_ACCOUNTS = 'accounts'
+CONF_SHARDS = 'shards'
+CONF_RECORD = 'record'
 
 from homeassistant.core                import callback
 from homeassistant.helpers.discovery   import load_platform
 from homeassistant.helpers.temperature import display_temp as show_temp
 from homeassistant.helpers.entity      import Entity, ToggleEntity
 from homeassistant.helpers.event       import track_state_change
+from homeassistant.helpers.storage     import Store
 from homeassistant.loader              import bind_hass
 
 import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
 # from homeassistant.helpers.config_validation import PLATFORM_SCHEMA  # noqa
 
 ## TBD: for testing only (has extra logging)
@@ -116,6 +146,55 @@ _SETPOINT_CAPABILITIES = 'heatSetpointCapabilities'
 _SETPOINT_STATUS       = 'heatSetpointStatus'
 _TARGET_TEMPERATURE    = 'targetTemperature'
 _OAUTH_TIMEOUT_SECONDS = 3600  ## timeout is 60 mins
+_OAUTH_REFRESH_SECONDS = 60  ## refresh the token this long before it's needed
+_OAUTH_RETRY_SECONDS = 60  ## if a refresh fails, try again after this long
+_V1_SESSION_TIMEOUT_SECONDS = 900  ## v1 sessionIds expire after 15 mins idle
+_V1_TIMEOUT_SECONDS = 10  ## how long to wait for v1 temps, after v2 has returned
+_SCHEDULE_TTL_SECONDS = 86400  ## schedules rarely change, refresh them daily
+_BUDGET_WINDOW_SECONDS = 3600  ## the api_budget is per (sliding) hour
+_BACKOFF_MAX_SECONDS = 1800  ## after 429s/5xxs, never poll less often than this
+_BACKOFF_JITTER = 0.25  ## backoff intervals are randomly stretched by up to 25%
+_METRICS_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]  ## secs, of API latencies
+_METRICS_RECENT = 100  ## the API sensors are of (up to) this many requests
+_BURST_DELAYS_SECONDS = [5, 10, 15, 30, 60]  ## after a write, poll after these...
+_BURST_RESERVE = 0.25  ## ...but only while this share of the budget is left
+_FLEET_JITTER_SECONDS = 15  ## in fleet mode, polls are randomly delayed by this
+_SHARD_REPLICAS = 100  ## the number of points per shard on the hash ring
+
+## these are for the (keep-alive) session shared by all requests of the web API
+_HTTP_POOL_MAX = 100  ## i.e. aiohttp's default (and no limit per host)
+_HTTP_CONNECT_TIMEOUT = 10
+_HTTP_READ_TIMEOUT = 30
+_HTTP_KEEPALIVE_SECONDS = 15  ## ...longer than this (i.e. past the next poll)
+
+# every request of the web API has a priority, lower is more important...
+_PRIORITY_WRITE    = 0  ## writes, and login/installation: never deferred
+_PRIORITY_STATUS   = 1
+_PRIORITY_V1_TEMPS = 2
+_PRIORITY_SCHEDULE = 3
+# ...and is deferred if it would leave less than this share of the budget
+_BUDGET_RESERVE = {
+    _PRIORITY_STATUS   : 0.05,
+    _PRIORITY_V1_TEMPS : 0.20,
+    _PRIORITY_SCHEDULE : 0.40,
+}
+
+## these are for the asyncio client, evoApiClient (i.e. what evohomeclient uses)
+_API_HOST         = 'https://tccna.honeywell.com'
+_API_V2_URL       = _API_HOST + '/WebAPI/emea/api/v1'
+_API_V1_URL       = _API_HOST + '/WebAPI/api'
+_API_OAUTH_URL    = _API_HOST + '/Auth/OAuth/Token'
+_API_V2_APP_ID    = 'b013aa26-9724-4dbd-8897-048b9aadda249'
+_API_V1_APP_ID    = '91db1612-73fd-4500-91b2-e63b069b185c'
+_API_BASIC_AUTH   = 'Basic YjAxM2FhMjYtOTcyNC00ZGJkLTg4OTctMDQ4YjlhYWRhMjQ5OnRlc3Q='
+_API_OAUTH_SCOPE  = 'EMEA-V1-Basic EMEA-V1-Anonymous EMEA-V1-Get-Current-User-Account'
+_API_ACCEPT       = 'application/json, application/xml, text/json, ' \
+                    'text/x-json, text/javascript, text/xml'
+
+# the requests of the web API are measured by endpoint, see _returnEndpoint()
+_API_ENDPOINTS = ['login', 'installation', 'status', 'v1_temperatures',
+                  'schedule', 'write']
+_API_METRICS_URL  = '/api/evohome/metrics'  ## the Prometheus export
 
 ## https://www.home-assistant.io/components/logger/
 _LOGGER = logging.getLogger(__name__)
@@ -124,9 +203,29 @@ DOMAIN='evohome'
 DATA_EVOHOME = 'data_evohome'
 DISPATCHER_EVOHOME = 'dispatcher_evohome'
 
+STORAGE_VERSION = 1
+STORAGE_KEY_SCHEDULES = DOMAIN + '_schedules'
+STORAGE_KEY_TOKENS = DOMAIN + '_tokens'
+
 # Validation of the user's configuration.
+def _validateAccounts(config):
+    """Reject accounts that have the same username (the fleet is keyed by a
+    hash of each account's username, ignoring its case)."""
+    _usernames = [config[CONF_USERNAME].lower()] + [
+        _account[CONF_USERNAME].lower() for _account in config[CONF_ACCOUNTS]
+    ]
+
+    for _username in set(_usernames):
+        if _usernames.count(_username) > 1:
+            raise vol.Invalid(
+                "duplicate username: %s" % _username, path=[CONF_ACCOUNTS]
+            )
+
+    return config
+
+
 CONFIG_SCHEMA = vol.Schema({
-    DOMAIN: vol.Schema({
+    DOMAIN: vol.All(vol.Schema({
         vol.Required(CONF_USERNAME): cv.string,
         vol.Required(CONF_PASSWORD): cv.string,
         vol.Optional(CONF_SCAN_INTERVAL, default=180): cv.positive_int,
@@ -135,8 +234,30 @@ CONFIG_SCHEMA = vol.Schema({
         vol.Optional(CONF_USE_HEURISTICS, default=False): cv.boolean,
         vol.Optional(CONF_USE_SCHEDULES, default=False): cv.boolean,
         
-        vol.Optional(CONF_LOCATION_ID, default=0): cv.positive_int,
-    }),
+# if there is no location_id, all locations (and all their TCSs) are polled
+        vol.Optional(CONF_LOCATION_ID): cv.positive_int,
+
+# max. number of schedules fetched at a time, and per minute (429s otherwise)
+        vol.Optional(CONF_SCHEDULE_CONCURRENCY, default=3): cv.positive_int,
+        vol.Optional(CONF_SCHEDULE_RATE, default=30): cv.positive_int,
+
+# max. number of requests of the web API per hour (of any sort)
+        vol.Optional(CONF_API_BUDGET, default=250): cv.positive_int,
+
+# for fleet mode: more accounts, each with its own budget, polled in turn
+        vol.Optional(CONF_ACCOUNTS, default=[]): vol.All(cv.ensure_list, [
+            vol.Schema({
+                vol.Required(CONF_USERNAME): cv.string,
+                vol.Required(CONF_PASSWORD): cv.string,
+            })
+        ]),
+
+# for fleet mode: poll the accounts from this many worker processes (0 is none)
+        vol.Optional(CONF_SHARDS, default=0): cv.positive_int,
+
+# record every request of the web API (redacted) to this file, for replaying
+        vol.Optional(CONF_RECORD): cv.string,
+    }), _validateAccounts),
 }, extra=vol.ALLOW_EXTRA)
 
 
@@ -155,123 +276,416 @@ EVO_PERMOVER   = 'PermanentOverride'
 EVO_OPENWINDOW = 'OpenWindow'
 EVO_FROSTMODE  = 'FrostProtect'
 
+_MINUTES_PER_WEEK = 7 * 1440
+
+# evohomeclient2 renames these keys of a schedule's JSON, so we do too
+_SCHEDULE_KEYS = {
+    'temperature': 'TargetTemperature',
+    'timeOfDay'  : 'TimeOfDay',
+    'dhwState'   : 'DhwState',
+}
+
+_DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+                 'Saturday', 'Sunday']
+
 TCS_MODES = [EVO_RESET, EVO_AUTO, EVO_AUTOECO, EVO_AWAY, EVO_DAYOFF, EVO_CUSTOM, EVO_HEATOFF]
 DHW_STATES = {STATE_ON : 'On', STATE_OFF : 'Off'}
 
+# for heuristics, how these TCS modes derive the zones' setpoints from schedules
+_SCHED_HEURISTICS = {
+    EVO_RESET   : {},
+    EVO_AUTO    : {},
+    EVO_AUTOECO : {'offset': -3},      # i.e. 3C less than scheduled
+    EVO_DAYOFF  : {'day_of_week': 5},  # i.e. as if it was Saturday
+}
+
 
 
 def setup(hass, config):
     """Set up a Honeywell evoTouch heating system (1 controller and multiple zones).""" # noqa
     _LOGGER.debug("setup(), temperature units are: %s...", TEMP_CELSIUS)
 
-### pull the configuration parameters  (TBD: excludes US-based systems)...
-    hass.data[DATA_EVOHOME] = {}  # without this, KeyError: 'data_evohome'
-    hass.data[DATA_EVOHOME]['config'] = dict(config[DOMAIN])
+### each account has its own domain_data (the first is hass.data[DATA_EVOHOME])
+    _accounts = [{
+        CONF_USERNAME: config[DOMAIN][CONF_USERNAME],
+        CONF_PASSWORD: config[DOMAIN][CONF_PASSWORD],
+    }] + config[DOMAIN][CONF_ACCOUNTS]
+
+    _fleet = [
+        _returnDomainData(hass, config, _account, _idx)
+            for _idx, _account in enumerate(_accounts)
+    ]
+
+    hass.data[DATA_EVOHOME] = _fleet[0]  # without this, KeyError: 'data_evohome'
+    hass.data[DATA_EVOHOME]['fleet'] = {}  # by username_hash, see _asyncSetupFleet
+
+### setup() is run in a worker thread, but all I/O is done in the loop
+    asyncio.run_coroutine_threadsafe(
+        _asyncSetupFleet(hass, _fleet), hass.loop
+    ).result()
+
+### in fleet mode, polls are spread across scan_interval, rather than bunched
+### (and, if sharded, they're made by worker processes rather than by HA's)
+    if config[DOMAIN][CONF_SHARDS]:
+        hass.add_job(
+            evoShardPool(hass, _fleet, config[DOMAIN][CONF_SHARDS]).async_start
+        )
+    elif len(_fleet) > 1:
+        hass.add_job(evoFleetPoller(hass, _fleet).async_start)
+
+### the metrics of the web API can be scraped by Prometheus (if HA serves http)
+    if getattr(hass, 'http', None) is not None:
+        hass.http.register_view(evoMetricsView)
+
+### Load platforms...
+    load_platform(hass, 'climate', DOMAIN)
+#   load_platform(hass, 'switch', DOMAIN)
+    load_platform(hass, 'sensor', DOMAIN)
+
+    _LOGGER.debug("Finished: setup()")
+    return True
+
+
+def _returnDomainData(hass, config, account, idx):
+    """Return the (initial) domain_data of an account (the first is idx 0).
+
+    Each account has its own config (i.e. username/password), and storage."""
+    domain_data = {}
+    domain_data['config'] = dict(config[DOMAIN])
+    domain_data['config'].update(account)
+    del domain_data['config'][CONF_ACCOUNTS]
+
+    domain_data['account'] = idx
+    domain_data['schedule'] = {}  # populated by the zones, if any
+    domain_data['statusStores'] = {}  # by systemId, see update
 
 # scan_interval is rounded up to nearest 60 seconds
-    hass.data[DATA_EVOHOME]['config'][CONF_SCAN_INTERVAL] \
+    domain_data['config'][CONF_SCAN_INTERVAL] \
         = (int((config[DOMAIN][CONF_SCAN_INTERVAL] - 1) / 60) + 1) * 60
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
-        _tmp = dict(hass.data[DATA_EVOHOME]['config'])
+        _tmp = dict(domain_data['config'])
         del _tmp[CONF_USERNAME]
         del _tmp[CONF_PASSWORD]
 
-        _LOGGER.debug("Config data: %s", _tmp)
+        _LOGGER.debug("Config data (account %s): %s", idx, _tmp)
         _tmp = None
 
-### no force_refresh - when instantiating client, it call client.installation()
-    _updateStateData(hass.data[DATA_EVOHOME])
+### schedules are cached on disk, so restarts needn't wait to fetch them
+    domain_data['scheduleStore'] = Store(
+        hass, STORAGE_VERSION, _returnStorageKey(STORAGE_KEY_SCHEDULES, idx)
+    )
 
-### Load platforms...
-    load_platform(hass, 'climate', DOMAIN)
-#   load_platform(hass, 'switch', DOMAIN)
-#   load_platform(hass, 'sensor', DOMAIN)
+    return domain_data
+
+
+def _returnStorageKey(key, idx):
+    """Return the storage key of an account (the first keeps the plain key)."""
+    return key if idx == 0 else '%s_%s' % (key, idx)
+
+
+def _returnWebSession(scan_interval):
+    """Return an aiohttp session for all requests of the web API (v1 and v2,
+    polls and writes), of any number of accounts.
+
+    Connections are kept alive from one poll to the next, so that each poll
+    needn't pay for new TCP & TLS handshakes.  The pool isn't sized by the
+    number of accounts (a poll makes a request per location, all at once),
+    rather the requests are limited by the budget (see evoRequestBudget), and
+    the schedule fetches by their own concurrency.  Must be run in the event
+    loop."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=_HTTP_POOL_MAX,
+            keepalive_timeout=scan_interval + _HTTP_KEEPALIVE_SECONDS,
+            ttl_dns_cache=scan_interval * 10,
+        ),
+        timeout=aiohttp.ClientTimeout(
+            connect=_HTTP_CONNECT_TIMEOUT, sock_read=_HTTP_READ_TIMEOUT
+        ),
+        headers={'Accept-Encoding': 'gzip, deflate'},
+    )
 
-    _LOGGER.debug("Finished: setup()")
-    return True
 
+async def _asyncSetupFleet(hass, fleet):
+    """Connect (and obtain the initial state of) every account, concurrently.
 
-def _updateStateData(domain_data, force_refresh=False):
+    Is called once by setup(), and removes any (other than the first) accounts
+    that couldn't be set up from the fleet."""
+    async def _async_setup(domain_data):
+        if domain_data['config'][CONF_USE_SCHEDULES]:
+            domain_data['scheduleCache'] \
+                = await domain_data['scheduleStore'].async_load() or {}
 
-### if called (for first time) from setup(), then no client yet...
-    if 'evohomeClient' not in domain_data:
-        force_refresh = False
-    
-        _LOGGER.debug("Connecting to the client (Honeywell web) API...")
+        await _asyncConnectClient(hass, domain_data)
+        await _asyncUpdateStateData(domain_data)
+
+        hass.data[DATA_EVOHOME]['fleet'] \
+            [domain_data['apiClient'].username_hash] = domain_data
+
+# every account shares the one session (and so, its pool of connections)
+    _websession = _returnWebSession(fleet[0]['config'][CONF_SCAN_INTERVAL])
+    for _data in fleet:
+        _data['websession'] = _websession
+
+# if recording, the requests of every account are recorded to the one file
+    if fleet[0]['config'].get(CONF_RECORD):
+        _transport = evoRecordingTransport(
+            hass.config.path(fleet[0]['config'][CONF_RECORD])
+        )
+        for _data in fleet:
+            _data['transport'] = _transport
+
+        async def _async_flush(event):
+            await _transport.async_flush()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_flush)
 
-        try:  ## client._login() is called by client.__init__()
-### Use the evohomeclient2 API (which uses OAuth)
-            from evohomeclient2 import EvohomeClient as EvohomeClient
+    async def _async_close(event):
+        await _websession.close()
 
-            _LOGGER.debug("Calling v2 API [3/4 request(s)]: client.__init__()...")
-            client = EvohomeClient(
-                domain_data['config'][CONF_USERNAME], 
-                domain_data['config'][CONF_PASSWORD], 
-                debug=False
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+
+    _results = await asyncio.gather(
+        *[_async_setup(_data) for _data in fleet], return_exceptions=True
+    )
+
+# the first account must be set up, but any others are dropped if they fail
+    for _data, _result in list(zip(fleet, _results)):
+        if isinstance(_result, Exception):
+            if _data['account'] == 0:
+                raise _result
+            _LOGGER.error(
+                "Setup of account %s failed (%s), so dropping it.",
+                _data['account'], _result
             )
+            fleet.remove(_data)
 
-        except:
-            _LOGGER.error("Connect to client (Honeywell web) API: failed!")
-            raise
+            if _data.get('oauthUnsub') is not None:
+                _data['oauthUnsub']()
 
-        finally:
-            del domain_data['config'][CONF_USERNAME]
-            del domain_data['config'][CONF_PASSWORD]
-        
-# The latest evohomeclient uses: requests.exceptions.HTTPError, including:
+
+async def _asyncConnectClient(hass, domain_data):
+    """Connect to the client (Honeywell web) API, is called once by setup().
+
+    The OAuth tokens are kept in HA's (private) storage, so that a restart
+    can re-use them (rather than logging in again) if they're still valid.
+
+    evohomeclient2 is used only to instantiate the objects that the entities
+    are built from, it makes no I/O: that is all via evoApiClient."""
+    from evohomeclient2.location import Location
+
+    _LOGGER.debug("Connecting to the client (Honeywell web) API...")
+
+    client = evoApiClient(
+        hass,
+        domain_data['config'][CONF_USERNAME], 
+        domain_data['config'][CONF_PASSWORD], 
+        session=domain_data.get('websession'),
+        transport=domain_data.get('transport'),
+    )
+
+    del domain_data['config'][CONF_USERNAME]
+    del domain_data['config'][CONF_PASSWORD]
+
+    domain_data['apiClient'] = client
+    domain_data['budget'] = client.budget = evoRequestBudget(
+        domain_data['config'][CONF_API_BUDGET]
+    )
+    domain_data['tokenStore'] = Store(
+        hass, STORAGE_VERSION,
+        _returnStorageKey(STORAGE_KEY_TOKENS, domain_data['account']),
+        private=True
+    )
+
+    _tokens = await domain_data['tokenStore'].async_load() or {}
+
+    if _tokens.get('username') == client.username_hash \
+            and _CLOCK.now() < dt_util.parse_datetime(_tokens['expires']) \
+                - timedelta(seconds = domain_data['config'][CONF_SCAN_INTERVAL]):
+        _LOGGER.debug(
+            "Re-using stored OAuth token (expires at %s)...", _tokens['expires']
+        )
+        client.access_token = _tokens['access_token']
+        client.refresh_token = _tokens['refresh_token']
+        client.access_token_expires = dt_util.parse_datetime(_tokens['expires'])
+        _login = False
+
+    else:
+        _login = True
+
+    try:
+        if _login:
+            _LOGGER.debug("Calling v2 API [1 request(s)]: client.async_login()...")
+            await client.async_login()
+            await _asyncSaveTokens(domain_data)
+
+        _LOGGER.debug("Calling v2 API [2 request(s)]: client.async_installation()...")
+        try:
+            await client.async_installation()
+
+        except aiohttp.ClientResponseError as err:
+            if _login or err.status != 401:
+                raise
+
+            _LOGGER.debug("Stored OAuth token rejected (401), so logging in...")
+            await client.async_login()
+            await _asyncSaveTokens(domain_data)
+            await client.async_installation()
+
+    except:
+        _LOGGER.error("Connect to client (Honeywell web) API: failed!")
+        raise
+
+# The asyncio client raises aiohttp.ClientResponseError, including:
 # - 400 Client Error: Bad Request for url:      [ Bad credentials ]
 # - 429 Client Error: Too Many Requests for url [ Limit exceeded ]
 
-        _LOGGER.debug("Connect to client (Honeywell web) API: success")
+    _LOGGER.debug("Connect to client (Honeywell web) API: success")
 
-        domain_data['evohomeClient'] = client
-        timeout = datetime.now()  # just done I/O
+# the entities are built from evohomeclient2's objects (but they make no I/O)
+    client.locations = [
+        Location(client, loc) for loc in client.installation_info
+    ]
 
-        domain_data['oauthRefreshed'] = timeout
-        domain_data['oauthExpires'] = timeout + timedelta( \
-            seconds = _OAUTH_TIMEOUT_SECONDS + 15 \
-                - domain_data['config'][CONF_SCAN_INTERVAL])
+    timeout = _CLOCK.now()  # just done I/O
 
-        _LOGGER.debug("setup() OAuth token expires shortly after %s", timeout)
+    domain_data['oauthRefreshed'] = timeout
+    domain_data['oauthExpires'] = client.access_token_expires + timedelta( \
+        seconds = 15 - domain_data['config'][CONF_SCAN_INTERVAL])
 
-        domain_data['installRefreshed'] = timeout
-        domain_data['installExpires'] = timeout + timedelta(seconds = 0 \
-            + domain_data['config'][CONF_SCAN_INTERVAL])
+    _LOGGER.debug(
+        "setup() OAuth token expires shortly after %s",
+        domain_data['oauthExpires']
+    )
 
-        _LOGGER.debug("setup() Installation last refreshed at %s", timeout)
+    domain_data['installRefreshed'] = timeout
+    domain_data['installExpires'] = timeout + timedelta(seconds = 0 \
+        + domain_data['config'][CONF_SCAN_INTERVAL])
 
-    else:
-        client = domain_data['evohomeClient']
+    _LOGGER.debug("setup() Installation last refreshed at %s", timeout)
+
+    _scheduleTokenRefresh(hass, domain_data)
+    return True
+
+
+async def _asyncRefreshToken(domain_data):
+    """Refresh the OAuth token only, leaving the installation as it is.
+
+    Uses the refresh token (1 request), falling back to a full login (again,
+    1 request) if there isn't one, or if it's rejected."""
+    client = domain_data['apiClient']
+
+    try:
+        if client.refresh_token is None:
+            raise ValueError("No refresh token")
+
+        _LOGGER.debug("Calling v2 API [1 request(s)]: client.async_refresh_token()...")
+        await client.async_refresh_token()
+
+    except (ValueError, aiohttp.ClientResponseError) as err:
+        if isinstance(err, aiohttp.ClientResponseError) \
+                and err.status not in [400, 401]:
+            raise
+
+        _LOGGER.debug("Unable to refresh OAuth token (%s), so logging in...", err)
+        await client.async_login()
+
+    await _asyncSaveTokens(domain_data)
+
+    domain_data['oauthRefreshed'] = _CLOCK.now()
+    domain_data['oauthExpires'] = client.access_token_expires + timedelta( \
+        seconds = 15 - domain_data['config'][CONF_SCAN_INTERVAL])
+
+    _LOGGER.debug(
+        "OAuth token refreshed, expires shortly after %s",
+        domain_data['oauthExpires']
+    )
+
+
+@callback
+def _scheduleTokenRefresh(hass, domain_data, delay=None):
+    """Arrange for the OAuth token to be refreshed (in the background), shortly
+    before the poll cycle would need to, so the poll cycle needn't wait for it.
+
+    Must be run in the event loop."""
+    if delay is None:
+        delay = (domain_data['oauthExpires'] - _CLOCK.now()).total_seconds() \
+            - _OAUTH_REFRESH_SECONDS
+
+    async def _async_refresh(now):
+        domain_data['oauthUnsub'] = None
+        try:
+            await _asyncRefreshToken(domain_data)
+
+        except:
+            _LOGGER.warn(
+                "Failed to refresh OAuth token, will retry in %s secs.",
+                _OAUTH_RETRY_SECONDS
+            )
+            _scheduleTokenRefresh(hass, domain_data, _OAUTH_RETRY_SECONDS)
+
+        else:
+            _scheduleTokenRefresh(hass, domain_data)
+
+# kept, so that the timer can be cancelled (e.g. if the account is dropped)
+    domain_data['oauthUnsub'] = hass.helpers.event.async_call_later(
+        max(delay, 0), _async_refresh
+    )
+
+
+async def _asyncSaveTokens(domain_data):
+    """Save the OAuth tokens (but not the credentials) to HA's storage, and
+    pass them to the account's shard, if it has one."""
+    client = domain_data['apiClient']
+
+    await domain_data['tokenStore'].async_save({
+        'username'      : client.username_hash,
+        'access_token'  : client.access_token,
+        'refresh_token' : client.refresh_token,
+        'expires'       : client.access_token_expires.isoformat(),
+    })
+
+# a shard polls with HA's tokens, as a refresh by either would revoke the other's
+    if domain_data.get('shardPool') is not None:
+        domain_data['shardPool'].send_tokens(domain_data)
+
+
+async def _asyncUpdateStateData(domain_data, force_refresh=False):
+
+    client = domain_data['apiClient']
 
         
-# otherwise, is it time to fully refresh...
-    if datetime.now() > domain_data['oauthExpires']:
-        force_refresh is True
+# the token is usually refreshed in the background, but that may have failed
+    if _CLOCK.now() > domain_data['oauthExpires'] and force_refresh is False:
+        _LOGGER.warn("OAuth token has expired, so refreshing it now...")
+        await _asyncRefreshToken(domain_data)
 
         
-# otherwise, were we asked to fully refresh...
+# otherwise, were we asked to fully refresh (incl. the installation)...
     if force_refresh is True:
         
         try:
-            client.locations = [] 
-
-            _LOGGER.debug("Calling v2 API [3/4 request(s)]: client._login...")
-            client._login()  # this invokes client.installation()
+            _LOGGER.debug("Calling v2 API [3 request(s)]: client.async_login...")
+            await client.async_login()
+            await _asyncSaveTokens(domain_data)
+            await client.async_installation()
         except:
             _LOGGER.error("Re-connect to client (Honeywell web) API: failed!")
             raise
 
         _LOGGER.debug("Refresh of client (Honeywell web) API: success")
 
-        timeout = datetime.now()  # just done I/O
+        timeout = _CLOCK.now()  # just done I/O
 
         domain_data['oauthRefreshed'] = timeout
-        domain_data['oauthExpires'] = timeout + timedelta( \
-            seconds = _OAUTH_TIMEOUT_SECONDS + 15 \
-                - domain_data['config'][CONF_SCAN_INTERVAL])
+        domain_data['oauthExpires'] = client.access_token_expires + timedelta( \
+            seconds = 15 - domain_data['config'][CONF_SCAN_INTERVAL])
 
-        _LOGGER.debug("update() OAuth token expires shortly after %s", timeout)
+        _LOGGER.debug(
+            "update() OAuth token expires shortly after %s",
+            domain_data['oauthExpires']
+        )
 
         domain_data['installRefreshed'] = timeout
         domain_data['installExpires'] = timeout + timedelta(seconds = 0 \
@@ -282,66 +696,276 @@ def _updateStateData(domain_data, force_refresh=False):
         
 ## 0. As a precaution, REDACT the data we don't need
     if client.installation_info[0]['locationInfo']['locationId'] != 'REDACTED':
-        for loc in client.installation_info:
-            loc['locationInfo']['locationId'] = 'REDACTED'
-            loc['locationInfo']['streetAddress'] = 'REDACTED'
-            loc['locationInfo']['city'] = 'REDACTED'
-            loc['locationInfo']['locationOwner'] = 'REDACTED'
-            loc['gateways'][0]['gatewayInfo'] = 'REDACTED'
+        _redactInstallation(client.installation_info)
 
 
 ## 1. Obtain basic configuration (usu. 1/cycle)
-    idx = domain_data['config'][CONF_LOCATION_ID]
-    
-    domain_data['install'] = client.installation_info[idx]
+    if domain_data.get('install') is not client.installation_info:
+        domain_data['install'] = client.installation_info
+        domain_data['installById'] = {}  # every TCS, zone & DHW, by its id
+        domain_data['tcsById'] = {}  # the systemId of every zone & DHW
 
-    _LOGGER.debug(
-        "Location/TCS (temperature control system) used is: %s [%s]", 
-        client.installation_info[idx] \
-            ['gateways'][0]['temperatureControlSystems'][0]['systemId'],
-        client.installation_info[idx] \
-            ['locationInfo']['name'],
-    )
+        for idx in _returnLocationIdxs(domain_data):
+            for tcs in _returnSystems(client.installation_info[idx]):
+                _zones = _returnZoneIndex(tcs)
+
+                domain_data['installById'].update(_zones)
+                domain_data['installById'][tcs['systemId']] = tcs
+                domain_data['tcsById'].update(
+                    (_id, tcs['systemId']) for _id in _zones
+                )
 
+                _LOGGER.debug(
+                    "Location/TCS (temperature control system) used is: %s [%s]",
+                    tcs['systemId'],
+                    client.installation_info[idx]['locationInfo']['name'],
+                )
 
-## 2. Optionally, obtain schedule (usu. 1/cycle): is emphemeral, so stored here
-#   tcs = client.locations[idx]._gateways[0]._control_systems[0]
-#   tcs = self._obj
 
-#   if domain_data['config'][CONF_USE_SCHEDULES]:
-#       domain_data['schedule'] = _returnZoneSchedules(self._obj)
-#       domain_data['scheduleRefreshed'] = datetime.now()  # just done I/O
+## 2. Optionally, refresh any expired schedules (in the background)
+    if domain_data['config'][CONF_USE_SCHEDULES] \
+        and not domain_data.get('scheduleRefreshing') \
+        and (domain_data.get('scheduleDirty') \
+            or _returnExpiredSchedules(domain_data)):
+
+        domain_data['scheduleRefreshing'] = True
+        asyncio.ensure_future(_asyncRefreshSchedules(domain_data))
 
 
 ## 3. Obtain state (e.g. temps) (1/scan_interval)...
+    _start = monotonic()
+
     if domain_data['config'][CONF_HIGH_PRECISION]:
-        domain_data['status'] \
-            = _returnTempsAndModes(domain_data, high_precision=True)
+        _systems = await _asyncReturnTempsAndModes(domain_data, high_precision=True)
     else:
-        domain_data['status'] \
-            = _returnTempsAndModes(domain_data, high_precision=False)
+        _systems = await _asyncReturnTempsAndModes(domain_data, high_precision=False)
+
+    domain_data['pollLatency'] = monotonic() - _start
+    domain_data['pollCount'] = domain_data.get('pollCount', 0) + 1
+
+# each TCS has its own store, and its status is published as one
+    _changed = domain_data.setdefault('statusChanged', set())
+
+    for _new_tcs in _systems:
+        _store = domain_data['statusStores'].setdefault(
+            _new_tcs['systemId'], evoStatusStore()
+        )
+        _old_tcs, _old_idx = _store.tcs, _store.by_id
+
+        _store.publish(_new_tcs)
+        _new_idx = _store.by_id
+
+# note which zones have changed (temp, setpoint, mode, faults), so that only
+# their entities are updated - a change of the TCS's mode may affect them all
+        if _old_tcs is None \
+                or _old_tcs['systemModeStatus'] != _new_tcs['systemModeStatus']:
+            _changed.update(_new_idx)
+            _changed.add(_new_tcs['systemId'])
+        else:
+            _changed.update(
+                _id for _id, _status in _new_idx.items()
+                if _old_idx.get(_id) != _status
+            )
 
-    timeout = datetime.now()  # just done I/O
+    timeout = _CLOCK.now()  # just done I/O
+
+# if polling was backed off, narrow the interval back towards scan_interval
+    _interval = max(
+        domain_data['config'][CONF_SCAN_INTERVAL],
+        domain_data.get('pollInterval', 0) / 2
+    )
+    domain_data['pollInterval'] = _interval
 
     domain_data['stateRefreshed'] = timeout
-    domain_data['stateExpires'] = timeout \
-        + timedelta(seconds = domain_data['config'][CONF_SCAN_INTERVAL])
+    domain_data['stateExpires'] = timeout + timedelta(seconds = _interval)
 
 
 # Some of this data should be redacted before getting into the logs
     if _LOGGER.isEnabledFor(logging.DEBUG):
-        idx = domain_data['config'][CONF_LOCATION_ID]
-        
-        _tmp = dict(client.installation_info[idx])
-        _tmp['locationInfo']['postcode'] = 'REDACTED'
-        
-        _LOGGER.debug("client.installation_info[idx]: %s", _tmp)
+        for idx in _returnLocationIdxs(domain_data):
+            _tmp = dict(client.installation_info[idx])
+            _tmp['locationInfo']['postcode'] = 'REDACTED'
+
+            _LOGGER.debug("client.installation_info[%s]: %s", idx, _tmp)
+
         _LOGGER.debug("hass.data[DATA_EVOHOME]: %s", domain_data)
         _tmp = None
 
     return True
 
 
+async def _asyncPollAccount(hass, domain_data):
+    """Poll an account (if its scan_interval has expired), and then update
+    only the entities whose status has changed.
+
+    Is called by each controller's update(), or by the evoFleetPoller."""
+    _LOGGER.debug("_asyncPollAccount(account=%s)", domain_data['account'])
+
+## 1. wait a minimum of scan_interval between updates
+    if _CLOCK.now() < domain_data['stateExpires']:
+        _LOGGER.debug("scan_interval not expired: exiting...")
+        return
+
+## 2. the oauth Token is refreshed in the background (it shouldn't expire)
+    elif _CLOCK.now() > domain_data['oauthExpires']:
+        _LOGGER.debug("oauth Token expired: refreshing...")
+
+## 3. wait a minimum of scan_interval between updates
+    else:
+        _LOGGER.debug("oauth Token not expired: updating...")
+
+# if the API budget is running low, skip this poll (the next one will retry)
+    try:
+        await _asyncUpdateStateData(domain_data)
+    except evoBudgetExceeded as err:
+        _LOGGER.warn("%s, deferring poll.", err)
+        return
+
+# if rate-limited (or the API is unwell), back off and keep the last state
+    except aiohttp.ClientResponseError as err:
+        if err.status != 429 and err.status < 500:
+            raise
+        _backoffPolling(domain_data, err)
+        return
+
+
+# Now send a message to the slaves (whose status has changed) to update themselves
+    _dispatchChanges(hass, domain_data)
+
+    return True
+
+
+def _backoffPolling(domain_data, err):
+    """Widen the polling interval after a 429 (or 5xx), with jitter.
+
+    The interval doubles with every consecutive failure (up to a maximum), and
+    a Retry-After header is honoured if there is one.  The last known state is
+    kept, and _asyncUpdateStateData() narrows the interval again on success."""
+    _interval = min(
+        _BACKOFF_MAX_SECONDS,
+        max(
+            domain_data['config'][CONF_SCAN_INTERVAL],
+            domain_data.get('pollInterval', 0)
+        ) * 2
+    )
+    domain_data['pollInterval'] = _interval
+
+    _delay = _interval * (1 + random.uniform(0, _BACKOFF_JITTER))
+
+    try:
+        _delay = max(_delay, int(err.headers['Retry-After']))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        pass
+
+    domain_data['stateExpires'] = _CLOCK.now() + timedelta(seconds = _delay)
+
+    _LOGGER.warn(
+        "The client API returned %s, so backing off polling for %s secs.",
+        err.status, int(_delay)
+    )
+
+
+@callback
+def _dispatchChanges(hass, domain_data):
+    """Send an update packet to (only) those entities whose status changed.
+
+    Each Heating/DHW zone listens on its own signal, see evoSlaveEntity.
+
+    Must be run in the event loop."""
+    _changed = domain_data.get('statusChanged', set())
+
+    _LOGGER.debug(
+        "Sending update packets to %s of %s zones: %s",
+        len(_changed), len(domain_data['installById']), _changed
+    )
+
+    _packet = {'sender': 'controller', 'signal': 'update'}
+    for _id in _changed:
+        hass.helpers.dispatcher.async_dispatcher_send(
+            DISPATCHER_EVOHOME + '_' + _id, _packet
+        )
+
+    _changed.clear()
+
+
+@callback
+def _startConvergencePolling(hass, domain_data, key, converged):
+    """Poll in a short burst after a write, until the API reflects it.
+
+    Rather than wait up to scan_interval for a change to show up, poll after
+    each of _BURST_DELAYS_SECONDS, and stop as soon as converged(domain_data)
+    is True for every pending write (a later write to the same key replaces
+    the earlier one).  The burst is abandoned if polling is backed off, or if
+    the API budget runs low.
+
+    Must be run in the event loop."""
+    _burst = domain_data.get('burst')
+    if _burst is None:
+        _burst = domain_data['burst'] = {'pending': {}, 'unsub': None}
+
+    _burst['pending'][key] = converged
+    _burst['step'] = 0
+
+    if _burst['unsub'] is not None:
+        _burst['unsub']()
+
+    async def _async_poll(now):
+        _burst['unsub'] = None
+        _budget = domain_data['budget']
+
+        if domain_data['pollInterval'] > domain_data['config'][CONF_SCAN_INTERVAL] \
+                or _budget.remaining < _budget.budget * _BURST_RESERVE:
+            _LOGGER.debug("Abandoning polling burst (backing off, or budget low)")
+            _burst['pending'].clear()
+            return
+
+# however the poll fails (even unexpectedly), the burst is abandoned
+        _polled = False
+        try:
+            await _asyncUpdateStateData(domain_data)
+            _polled = True
+
+# if rate-limited (or the API is unwell), back off as for any other poll
+        except aiohttp.ClientResponseError as err:
+            _LOGGER.warn("Polling burst failed (%s), abandoning it.", err)
+            if err.status == 429 or err.status >= 500:
+                _backoffPolling(domain_data, err)
+            return
+
+        except (evoBudgetExceeded, aiohttp.ClientError,
+                asyncio.TimeoutError) as err:
+            _LOGGER.warn("Polling burst failed (%s), abandoning it.", err)
+            return
+
+        finally:
+            if not _polled:
+                _burst['pending'].clear()
+
+        _dispatchChanges(hass, domain_data)
+
+        for _key, _converged in list(_burst['pending'].items()):
+            if _converged(domain_data):
+                _LOGGER.debug("Polling burst: %s has converged", _key)
+                del _burst['pending'][_key]
+
+        _burst['step'] += 1
+        if _burst['pending'] and _burst['step'] < len(_BURST_DELAYS_SECONDS):
+            _schedule()
+        elif _burst['pending']:
+            _LOGGER.debug(
+                "Polling burst: %s not converged, leaving it to scan_interval",
+                list(_burst['pending'])
+            )
+            _burst['pending'].clear()
+
+    def _schedule():
+        _burst['unsub'] = hass.helpers.event.async_call_later(
+            _BURST_DELAYS_SECONDS[_burst['step']], _async_poll
+        )
+
+    _schedule()
+
+
 def UNUSED_SIMULATION():
 ### ZX Hack for testing, DHW config...
     if False:
@@ -381,126 +1005,1835 @@ def UNUSED_SIMULATION():
     return
 
 
-def _returnTempsAndModes(domain_data, high_precision=False):
-## Get the latest modes/temps (assumes only 1 location/controller)
-    _LOGGER.debug("_returnTempsAndModes(domain_data)")
+def _redactInstallation(installation, aliases=None):
+    """REDACT the data we don't need (e.g. addresses) of an installation, in
+    place.
 
-    client = domain_data['evohomeClient']
-    idx = domain_data['config'][CONF_LOCATION_ID]
-    
-    _LOGGER.debug("Calling v2 API [1 request(s)]: client.locations[idx].status()...")
+    If given aliases (a dict), the ids of the locations and their gateways are
+    replaced by aliases (rather than REDACTED), so they're still distinct (and
+    the gateways keep their gatewayInfo, with only its gatewayId)."""
+    for loc in installation:
+        loc['locationInfo']['locationId'] = _returnAlias(
+            aliases, loc['locationInfo']['locationId']
+        )
+        loc['locationInfo']['streetAddress'] = 'REDACTED'
+        loc['locationInfo']['city'] = 'REDACTED'
+        loc['locationInfo']['postcode'] = 'REDACTED'
+        loc['locationInfo']['locationOwner'] = 'REDACTED'
+
+        for gwy in loc['gateways']:
+            if aliases is None:
+                gwy['gatewayInfo'] = 'REDACTED'
+            else:
+                gwy['gatewayInfo'] = {'gatewayId': _returnAlias(
+                    aliases, gwy['gatewayInfo']['gatewayId']
+                )}
 
-# this data is emphemeral, so store it
-    ec2_status = client.locations[idx].status()
-    ec2_tcs = ec2_status['gateways'][0]['temperatureControlSystems'][0]
+    return installation
 
-    _LOGGER.debug("ec2_api.status() = %s", ec2_status)
 
-    if high_precision is True and len(client.locations) > 1:
-        _LOGGER.warn(
-            "Unable to increase precision of temperatures via the v1 api as there is more than one Location/TCS.  Continuing with v2 temps."
-        )
-        
-    elif high_precision is True:
+def _returnAlias(aliases, value):
+    """Return the alias of an id (the same id always has the same alias), or
+    REDACTED if there are no aliases."""
+    if aliases is None:
+        return 'REDACTED'
+    return aliases.setdefault(str(value), 'REDACTED_%s' % len(aliases))
+
+
+def _returnLocationIdxs(domain_data):
+    """Return the indexes of the locations to be polled, which is all of them
+    unless a location_id has been configured."""
+    idx = domain_data['config'].get(CONF_LOCATION_ID)
+
+    if idx is None:
+        return list(range(len(domain_data['apiClient'].location_ids)))
+    return [idx]
+
+
+def _returnSystems(location):
+    """Return every TCS of a location, from all its gateways.
+
+    Works for both the installation and the status of a location."""
+    return [
+        tcs for gwy in location['gateways']
+            for tcs in gwy['temperatureControlSystems']
+    ]
+
+
+def _returnZoneIndex(tcs):
+    """Return the zones (and any DHW) of a TCS, keyed by zoneId (or dhwId).
+
+    Works for both the installation and the status of a TCS.  The index is
+    built once per refresh, so that zones can be found without a scan."""
+    _index = {zone['zoneId']: zone for zone in tcs['zones']}
+
+    if 'dhw' in tcs:
+        _index[tcs['dhw']['dhwId']] = tcs['dhw']
+
+    return _index
+
+
+async def _asyncReturnTempsAndModes(domain_data, high_precision=False):
+## Get the latest modes/temps of every location (and all of their TCSs)
+## Returns the status of each TCS (their zones are then indexed by zoneId)
+    _LOGGER.debug("_asyncReturnTempsAndModes(domain_data)")
+
+    client = domain_data['apiClient']
+    idxs = _returnLocationIdxs(domain_data)
+
+# the v1 & v2 calls (of every location) are made concurrently, so a cycle takes
+# only as long as the slowest of them (rather than the sum of them all)
+    ec1_task = None
+
+    if high_precision is True:
         _LOGGER.warn(
             "Trying to increase precision of temperatures via the v1 api..."
         )
-        try:
+        _LOGGER.debug("Calling v1 API [1/2 request(s)]: client.async_v1_temperatures()...")
+        ec1_task = asyncio.ensure_future(client.async_v1_temperatures())
+    
+    _LOGGER.debug(
+        "Calling v2 API [%s request(s)]: client.async_status(idx)...", len(idxs)
+    )
+
+# this data is emphemeral, so store it
+    try:
+        ec2_status = await asyncio.gather(
+            *[client.async_status(idx) for idx in idxs]
+        )
+    except:
+        if ec1_task is not None:
+            ec1_task.cancel()
+        raise
+
+    ec2_systems = [tcs for loc in ec2_status for tcs in _returnSystems(loc)]
 
-            from evohomeclient import EvohomeClient as EvohomeClientVer1  ## uses v1 of the api
-            ec1_api = EvohomeClientVer1(client.username, client.password)
+# zoneIds are unique across locations, so the v1 temps can be routed by id
+    ec2_idx = {}
+    for tcs in ec2_systems:
+        ec2_idx.update(_returnZoneIndex(tcs))
+
+    _LOGGER.debug("ec2_api.status() = %s", ec2_status)
 
-            _LOGGER.debug("Calling v1 API [2 requests]: client.temperatures()...")
-            ec1_temps = ec1_api.temperatures(force_refresh=True)  # is a generator
+    if ec1_task is not None:
+        try:
+            ec1_temps = await asyncio.wait_for(ec1_task, _V1_TIMEOUT_SECONDS)
             _LOGGER.debug("ev_api.temperatures() = %s", ec1_temps)
 
             for temp in ec1_temps:
                 _LOGGER.debug("Zone %s (%s) reports temp %s", temp['id'], temp['name'], temp['temp'])
 
-                for zone in ec2_tcs['zones']:
-                    _LOGGER.debug(" - is it slave %s (%s)?", zone['zoneId'], zone['name'])
+# v1 deviceIDs are ints, v2 zoneIds are strs (and the DHW isn't a v2 zone)
+                zone = ec2_idx.get(str(temp['id']))
 
-                    if str(temp['id']) == str(zone['zoneId']):
-                        _LOGGER.debug(" - matched: temp changed from %s to %s.", zone['temperatureStatus']['temperature'], temp['temp'])
-                        _LOGGER.debug(" - matched: temp for child %s (%s) changed from %s to %s.", zone['zoneId'], zone['name'], zone['temperatureStatus']['temperature'], temp['temp'])
-                        zone['temperatureStatus']['temperature'] = temp['temp']
+                if zone is not None and 'zoneId' in zone:
+                    _LOGGER.debug(" - matched: temp for child %s (%s) changed from %s to %s.", zone['zoneId'], zone['name'], zone['temperatureStatus']['temperature'], temp['temp'])
+                    zone['temperatureStatus']['temperature'] = temp['temp']
 
-                        break
+        except evoBudgetExceeded as err:
+            _LOGGER.debug("%s. Continuing with v2 temps.", err)
 
-        except:
+        except asyncio.TimeoutError:
             _LOGGER.warn(
-                "Failed to increase precision of temperatures via the v1 api. \
+                "Timed out increasing precision of temperatures via the v1 api. \
                 Continuing with v2 temps."
             )
-#           raise
 
-        finally:
-#           ec1_api = None  # do I need to clean this up?
-            pass
+        except (aiohttp.ClientError, ValueError, KeyError) as err:
+            _LOGGER.warn(
+                "Failed to increase precision of temperatures via the v1 api "
+                "(%s). Continuing with v2 temps.", err
+            )
 
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
-        for zone in ec2_tcs['zones']:
-            _LOGGER.debug("update(controller) - for child %s (%s), temp = %s.", zone['zoneId'], zone['name'], zone['temperatureStatus']['temperature'])
+        for tcs in ec2_systems:
+            for zone in tcs['zones']:
+                _LOGGER.debug("update(controller=%s) - for child %s (%s), temp = %s.", tcs['systemId'], zone['zoneId'], zone['name'], zone['temperatureStatus']['temperature'])
 
 
-    return ec2_tcs
+    return ec2_systems
 
 
-def OUT_returnZoneSchedules(tcs):
-# the client api does not expose a way to do this (it outputs to a file)
-    _LOGGER.debug("_returnZoneSchedules(tcs=%s)", tcs.systemId)
+def _storeSchedule(domain_data, zone_id, zone_type, name, schedule, refreshed):
+    """Store (and compile) a schedule, unless it's unchanged since last time.
 
-    schedules = {}
+    Returns True if the schedule has changed (i.e. its hash is different)."""
+    _hash = hashlib.sha256(
+        json.dumps(schedule, sort_keys=True).encode('utf-8')
+    ).hexdigest()
 
-## Collect each (slave) zone as a (climate component) device
-## This line requires only 1 location/controller, the next works for 1+
-#   for z in client._get_single_heating_system()._zones:
-
-# first, for all/any heating zones
-#   for z in client.locations[0]._gateways[0]._control_systems[0]._zones:
-    for z in tcs._zones:
-        _LOGGER.debug("Calling v2 API [1 request(s)]: client.zone.schedule(Zone=%s)...", z.zoneId)
-        s = z.schedule()
-        schedules[z.zoneId] = {'name': z.name, 'schedule': s}
-#       z._schedule = 
-#       zone_type = temperatureZone, or domesticHotWater
-        _LOGGER.debug(" - zoneId = %s, zone_type = %s",
-            z.zoneId,
-            z.zone_type
+    _entry = domain_data['schedule'].get(zone_id)
+
+    if _entry is not None and _entry['hash'] == _hash:
+        _entry['refreshed'] = refreshed
+        return False
+
+    domain_data['schedule'][zone_id] = {
+        'name'      : name,
+        'zoneType'  : zone_type,
+        'schedule'  : schedule,
+        'hash'      : _hash,
+        'compiled'  : evoWeeklySchedule(schedule),
+        'refreshed' : refreshed,
+    }
+    domain_data['scheduleTable'] = None  # now stale
+    return True
+
+
+def _storePendingSchedule(domain_data, zone_id, zone_type, name):
+    """Record a zone whose schedule is yet to be fetched, if it has none.
+
+    Its schedule is None, and it has never been refreshed, so the next
+    (background) refresh of expired schedules will fetch it."""
+    domain_data['schedule'].setdefault(zone_id, {
+        'name'      : name,
+        'zoneType'  : zone_type,
+        'schedule'  : None,
+        'hash'      : None,
+        'compiled'  : None,
+        'refreshed' : None,
+    })
+
+
+def _returnExpiredSchedules(domain_data):
+    """Return the zoneIds of any schedules that have passed their TTL (or are
+    still pending)."""
+    _expired = _CLOCK.now() - timedelta(seconds = _SCHEDULE_TTL_SECONDS)
+
+    return [
+        zone_id for zone_id, entry in domain_data['schedule'].items()
+            if entry['refreshed'] is None or entry['refreshed'] < _expired
+    ]
+
+
+async def _asyncRefreshSchedules(domain_data):
+    """Refresh any expired schedules, then save them all to the cache."""
+    try:
+        await _asyncFetchSchedules(domain_data, [
+            (zone_id, domain_data['schedule'][zone_id]['zoneType'],
+                domain_data['schedule'][zone_id]['name'])
+            for zone_id in _returnExpiredSchedules(domain_data)
+        ])
+
+        await domain_data['scheduleStore'].async_save({
+            zone_id: {
+                'name'      : entry['name'],
+                'zoneType'  : entry['zoneType'],
+                'schedule'  : entry['schedule'],
+                'hash'      : entry['hash'],
+                'refreshed' : entry['refreshed'].isoformat(),
+            } for zone_id, entry in domain_data['schedule'].items()
+                if entry['schedule'] is not None  # i.e. not pending
+        })
+        domain_data['scheduleDirty'] = False
+
+    finally:
+        domain_data['scheduleRefreshing'] = False
+
+
+async def _asyncFetchSchedules(domain_data, zones):
+    """Fetch the schedules of several zones in parallel, and store them.
+
+    zones is a list of (zoneId, zone_type, name).  The number of requests in
+    flight is bounded (schedule_concurrency), and their rate is capped by a
+    token bucket (schedule_rate per minute), so as to not trip the api's rate
+    limit.  The latency of each fetch is logged, and kept by zoneId."""
+    client = domain_data['apiClient']
+    config = domain_data['config']
+
+    if 'scheduleBucket' not in domain_data:
+        domain_data['scheduleBucket'] = evoTokenBucket(
+            config[CONF_SCHEDULE_RATE] / 60,
+            config[CONF_SCHEDULE_CONCURRENCY]
         )
+        domain_data['scheduleLatency'] = {}
 
-# then, for any DHW
-    if tcs.hotwater:
-        z = tcs.hotwater
-        _LOGGER.debug("Calling v2 API [1 request(s)]: client.zone.schedule(DHW=%s)...", z.zoneId)
-        s = z.schedule()
-        schedules[z.zoneId] = {'name': z.zone_type, 'schedule': s}
-#       zone_type = temperatureZone, or domesticHotWater
-        _LOGGER.debug(" - zoneId = %s, zone_type = %s",
-            z.zoneId,
-            z.zone_type
+    _bucket = domain_data['scheduleBucket']
+    _semaphore = asyncio.Semaphore(config[CONF_SCHEDULE_CONCURRENCY])
+
+    async def _async_fetch(zone_id, zone_type, name):
+        async with _semaphore:
+            await _bucket.async_acquire()
+
+            _LOGGER.debug(
+                "Calling v2 API [1 request(s)]: client.async_schedule(%s)...",
+                zone_id
+            )
+            _start = monotonic()
+            try:
+                _schedule = await client.async_schedule(zone_type, zone_id)
+                _latency = monotonic() - _start
+
+                _changed = _storeSchedule(
+                    domain_data, zone_id, zone_type, name, _schedule,
+                    _CLOCK.now()
+                )
+
+            except asyncio.CancelledError:  ## is an Exception before py3.8
+                raise
+
+            except Exception as err:  # incl. a schedule that won't compile
+                _LOGGER.warn(
+                    "Failed to fetch schedule of %s (%s): %s, will retry later.",
+                    zone_id, name, repr(err)
+                )
+# so that the next refresh of expired schedules will retry it
+                _storePendingSchedule(domain_data, zone_id, zone_type, name)
+                return False
+
+        domain_data['scheduleLatency'][zone_id] = _latency
+        _LOGGER.debug(
+            "Schedule of %s (%s) fetched in %.3f secs.", zone_id, name, _latency
         )
 
-    _LOGGER.debug(
-        "_returnZoneSchedules() = %s",
-        schedules
+        if _changed:
+            _LOGGER.debug("Schedule of %s has changed.", zone_id)
+            domain_data['scheduleDirty'] = True
+
+        return True
+
+    _results = await asyncio.gather(
+        *[_async_fetch(*zone) for zone in zones]
     )
+    return sum(_results)
 
-    return schedules  # client.zone_schedules_backup()
 
+def prefetchSchedules(hass, client, tcs):
+    """Fetch the schedules of a TCS's zones (and DHW), unless already cached.
 
+    Called by setup_platform(), so that the zones' schedules are fetched in
+    parallel, rather than one at a time by each zone's __init__()."""
+    domain_data = hass.data[DATA_EVOHOME]['fleet'][client.username_hash]
 
-class evoEntity(Entity):
-    """Base for Honeywell evohome slave devices (Heating/DHW zones)."""
+    if not domain_data['config'][CONF_USE_SCHEDULES]:
+        return 0
 
-    def __init__(self, hass, client, objRef):
-        """Initialize the evohome Controller."""
+    _zones = [(z.zoneId, z.zone_type, z.name) for z in tcs._zones]
+    if tcs.hotwater:  # the DHW has no name, so use that of its entities
+        _zones.append((tcs.hotwater.zoneId, tcs.hotwater.zone_type, '~DHW'))
+
+    _zones = [
+        zone for zone in _zones if zone[0] not in domain_data['schedule']
+            and zone[0] not in domain_data['scheduleCache']
+    ]
+
+    return asyncio.run_coroutine_threadsafe(
+        _asyncFetchSchedules(domain_data, _zones), hass.loop
+    ).result()
+
+
+
+class evoFleetPoller(object):
+    """Polls a fleet of accounts, spread evenly across the scan_interval.
+
+    Rather than every account polling on the same (minute) boundary, each
+    has its own timer, offset from the others, and delayed by a little
+    jitter.  All accounts share one (pooled, keep-alive) aiohttp session."""
+
+    def __init__(self, hass, fleet):
+        """Initialize the poller (fleet is a list of domain_data)."""
+        self.hass = hass
+        self.fleet = fleet
+
+        for _data in fleet:
+            _data['fleetPolled'] = True  # i.e. its controllers won't poll
+
+    @callback
+    def async_start(self):
+        """Start polling, with each account's first poll offset in turn."""
+        _interval = self.fleet[0]['config'][CONF_SCAN_INTERVAL]
+
+        for _idx, _data in enumerate(self.fleet):
+            self._schedule(_data, _interval * _idx / len(self.fleet))
+
+    def _schedule(self, domain_data, delay):
+        async def _async_poll(now):
+            try:
+                await _asyncPollAccount(self.hass, domain_data)
+            except:
+                _LOGGER.warn(
+                    "Failed to poll account %s, will retry.",
+                    domain_data['account']
+                )
+                _delay = domain_data['config'][CONF_SCAN_INTERVAL]
+            else:
+                _delay = (
+                    domain_data['stateExpires'] - _CLOCK.now()
+                ).total_seconds()
+
+            self._schedule(domain_data, max(0, _delay))
+
+        self.hass.helpers.event.async_call_later(
+            delay + random.uniform(0, _FLEET_JITTER_SECONDS), _async_poll
+        )
+
+
+
+class evoHashRing(object):
+    """A consistent hash ring, to assign accounts to shards.
+
+    Each shard has many points on the ring, and a key belongs to the shard of
+    the next point after its hash, so that changing the number of shards moves
+    only a few accounts from one shard to another."""
+
+    def __init__(self, shards, replicas=_SHARD_REPLICAS):
+        """Initialize the ring, with shards numbered 0 to shards - 1."""
+        _points = sorted(
+            (self._hash('%s:%s' % (_shard, _replica)), _shard)
+                for _shard in range(shards) for _replica in range(replicas)
+        )
+        self._hashes = [_hash for _hash, _ in _points]
+        self._shards = [_shard for _, _shard in _points]
+
+    @staticmethod
+    def _hash(key):
+        return int(hashlib.sha256(key.encode('utf-8')).hexdigest()[:16], 16)
+
+    def shard(self, key):
+        """Return the shard of a key (e.g. an account's username_hash)."""
+        _idx = bisect.bisect(self._hashes, self._hash(key))
+        return self._shards[_idx % len(self._shards)]
+
+
+
+class evoShardPool(object):
+    """Polls a fleet of accounts from a pool of worker processes (shards).
+
+    Accounts are assigned to shards by consistent hashing.  Each shard runs
+    its own poll loop (and its own, pooled, aiohttp session), and sends only the
+    changes in status (a delta) back, via a pipe that is read in HA's event
+    loop.  The deltas are then published to the status stores here, where
+    the entities are, and all writes are still made from here.
+
+    The OAuth tokens are refreshed only by HA (as each refresh revokes the
+    previous refresh token), and are passed to the shards via a second pipe."""
+
+    def __init__(self, hass, fleet, shards):
+        """Initialize the pool (fleet is a list of domain_data)."""
+        self.hass = hass
+        self.fleet = {_data['account']: _data for _data in fleet}
+        self.shards = shards
+
+        self._processes = []
+        self._pipes = []
+        self._senders = {}  # by account, the pipe of its shard's tokens
+
+        for _data in fleet:
+            _data['fleetPolled'] = True  # i.e. its controllers won't poll
+            _data['shardPool'] = self  # i.e. its tokens are sent to its shard
+
+    async def async_start(self):
+        """Start the worker processes, and start reading their deltas."""
+        _ring = evoHashRing(self.shards)
+        _accounts = [[] for _ in range(self.shards)]
+
+        for _data in self.fleet.values():
+            client = _data['apiClient']
+            _accounts[_ring.shard(client.username_hash)].append({
+                'account': _data['account'],
+                'config': _data['config'],
+                'username': client.username,
+                'password': client.password,
+                'tokens': (
+                    client.access_token,
+                    client.access_token_expires,
+                    client.refresh_token,
+                ),
+                'location_ids': client.location_ids,
+            })
+
+# starting a process (and its pipes) blocks, so is done in an executor
+        for _shard, _shard_accounts in enumerate(_accounts):
+            if not _shard_accounts:
+                continue
+
+            _process, _reader, _sender = \
+                await self.hass.async_add_executor_job(
+                    self._startShard, _shard, _shard_accounts
+                )
+
+            self.hass.loop.add_reader(_reader.fileno(), self._read, _reader)
+            self._processes.append(_process)
+            self._pipes.append(_reader)
+
+            for _account in _shard_accounts:
+                self._senders[_account['account']] = _sender
+
+        self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._stop)
+
+    @staticmethod
+    def _startShard(shard, accounts):
+        """Start a worker process, returning it and its two pipes (for its
+        deltas, and for its tokens)."""
+        _LOGGER.debug(
+            "Starting shard %s, with accounts: %s", shard,
+            [_account['account'] for _account in accounts]
+        )
+
+# use spawn rather than fork, as HA's process has (many) threads
+        _context = multiprocessing.get_context('spawn')
+
+        _reader, _writer = _context.Pipe(duplex=False)
+        _receiver, _sender = _context.Pipe(duplex=False)
+
+        _process = _context.Process(
+            target=_shardWorker, args=(_writer, _receiver, accounts),
+            name='evohome_shard_%s' % shard, daemon=True
+        )
+        _process.start()
+        _writer.close()  # only the worker writes to the pipe of deltas...
+        _receiver.close()  # ...and only HA writes to the pipe of tokens
+
+        return _process, _reader, _sender
+
+    def send_tokens(self, domain_data):
+        """Send an account's (refreshed) OAuth tokens to its shard."""
+        _sender = self._senders.get(domain_data['account'])
+        if _sender is None:  # i.e. the shards haven't started (yet)
+            return
+
+        client = domain_data['apiClient']
+        try:
+            _sender.send({
+                'account': domain_data['account'],
+                'tokens': (
+                    client.access_token,
+                    client.access_token_expires,
+                    client.refresh_token,
+                ),
+            })
+        except (BrokenPipeError, OSError) as err:
+            _LOGGER.error(
+                "Failed to send the OAuth tokens of account %s to its shard "
+                "(%s)", domain_data['account'], err
+            )
+
+    @callback
+    def _stop(self, event):
+        for _reader in self._pipes:
+            self.hass.loop.remove_reader(_reader.fileno())
+        for _sender in set(self._senders.values()):
+            _sender.close()
+        self._senders.clear()
+        for _process in self._processes:
+            _process.terminate()
+
+    @callback
+    def _read(self, reader):
+        try:
+            while reader.poll():
+                self._apply(reader.recv())
+        except EOFError:
+            _LOGGER.error("A shard has stopped, so its accounts won't be polled")
+            self.hass.loop.remove_reader(reader.fileno())
+
+    @callback
+    def _apply(self, delta):
+        """Publish a delta from a shard, and update the entities it changes."""
+        domain_data = self.fleet[delta['account']]
+        _changed = domain_data.setdefault('statusChanged', set())
+
+        for _system_id, _header, _zones in delta['systems']:
+            _store = domain_data['statusStores'][_system_id]
+            _tcs = _applyStatusDelta(_store.tcs, _header, _zones)
+            _store.publish(_tcs)
+
+            _changed.update(_zones)
+            if _header is not None:
+                _changed.update(_store.by_id)
+                _changed.add(_system_id)
+
+        domain_data['budget'].record(delta['requests'])
+        domain_data['apiClient'].metrics.merge(delta['metrics'])
+        domain_data['pollLatency'] = delta['latency']
+        domain_data['pollCount'] = domain_data.get('pollCount', 0) + 1
+        domain_data['pollInterval'] = delta['interval']
+        domain_data['stateRefreshed'] = delta['refreshed']
+        domain_data['stateExpires'] = delta['refreshed'] \
+            + timedelta(seconds = delta['interval'])
+
+        _dispatchChanges(self.hass, domain_data)
+
+
+
+def _returnStatusDelta(previous, systems):
+    """Return the changes in the status of some TCSs since previous (which is
+    then updated), as a list of (systemId, header, {zoneId: status}).
+
+    The header is the TCS's own status (i.e. without its zones), and is None
+    unless it has changed.  Zones (and DHW) are included only if changed."""
+    _delta = []
+
+    for tcs in systems:
+        _header = {k: v for k, v in tcs.items() if k not in ['zones', 'dhw']}
+        _old_header, _old_idx = previous.get(tcs['systemId'], (None, {}))
+
+        _idx = _returnZoneIndex(tcs)
+        _zones = {
+            _id: _status for _id, _status in _idx.items()
+                if _old_idx.get(_id) != _status
+        }
+
+        if _header != _old_header or _zones:
+            _delta.append((
+                tcs['systemId'],
+                _header if _header != _old_header else None,
+                _zones
+            ))
+
+        previous[tcs['systemId']] = (_header, _idx)
+
+    return _delta
+
+
+def _applyStatusDelta(tcs, header, zones):
+    """Return a new status of a TCS, with a delta applied to it.
+
+    The old status is unchanged (it's shared, not copied), as published
+    statuses are never changed, see evoStatusStore."""
+    _tcs = dict(tcs)
+    if header is not None:
+        _tcs.update(header)
+
+    _tcs['zones'] = [zones.get(z['zoneId'], z) for z in tcs['zones']]
+    if 'dhw' in tcs:
+        _tcs['dhw'] = zones.get(tcs['dhw']['dhwId'], tcs['dhw'])
+
+    return _tcs
+
+
+def _shardWorker(writer, tokens, accounts):
+    """Run a shard (is the target of a worker process, see evoShardPool)."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(_asyncShardWorker(writer, tokens, accounts))
+
+
+async def _asyncShardWorker(writer, tokens, accounts):
+    """Poll a shard's accounts, each offset evenly across the scan_interval."""
+    loop = asyncio.get_event_loop()
+
+    async with _returnWebSession(
+        accounts[0]['config'][CONF_SCAN_INTERVAL]
+    ) as session:
+        _clients = {
+            _account['account']: _returnShardClient(session, _account)
+                for _account in accounts
+        }
+        loop.add_reader(tokens.fileno(), _readShardTokens, tokens, _clients)
+
+        await asyncio.gather(*[
+            _asyncShardPollLoop(
+                writer, _clients[_account['account']], _account,
+                _account['config'][CONF_SCAN_INTERVAL] * _idx / len(accounts)
+            ) for _idx, _account in enumerate(accounts)
+        ])
+
+
+def _returnShardClient(session, account):
+    """Return the client of an account (in a shard), using HA's tokens."""
+    client = evoApiClient(
+        None, account['username'], account['password'], session=session
+    )
+    client.access_token, client.access_token_expires, client.refresh_token \
+        = account['tokens']
+    client.location_ids = account['location_ids']
+    client.budget = evoRequestBudget(account['config'][CONF_API_BUDGET])
+
+    return client
+
+
+def _readShardTokens(reader, clients):
+    """Use the OAuth tokens sent by HA (in a shard), see evoShardPool."""
+    try:
+        while reader.poll():
+            _tokens = reader.recv()
+            client = clients[_tokens['account']]
+            client.access_token, client.access_token_expires, \
+                client.refresh_token = _tokens['tokens']
+
+    except EOFError:  # i.e. HA has stopped
+        asyncio.get_event_loop().remove_reader(reader.fileno())
+
+
+async def _asyncShardPollLoop(writer, client, account, delay):
+    """Poll an account (in a shard) forever, sending each delta to HA.
+
+    The OAuth token is never refreshed here, but by HA, see evoShardPool."""
+    config = account['config']
+
+# the subset of domain_data that _asyncReturnTempsAndModes() needs
+    domain_data = {
+        'account': account['account'],
+        'config': config,
+        'apiClient': client,
+        'pollInterval': config[CONF_SCAN_INTERVAL],
+    }
+    _previous = {}
+    _requests = 0
+
+    await asyncio.sleep(delay + random.uniform(0, _FLEET_JITTER_SECONDS))
+
+    while True:
+        try:
+            _start = monotonic()
+            _systems = await _asyncReturnTempsAndModes(
+                domain_data, high_precision=config[CONF_HIGH_PRECISION]
+            )
+            _latency = monotonic() - _start
+
+        except aiohttp.ClientResponseError as err:
+            if err.status == 429 or err.status >= 500:
+                _backoffPolling(domain_data, err)
+            else:
+                _LOGGER.warn("Shard failed to poll (%s), will retry.", err)
+                domain_data['stateExpires'] = _CLOCK.now() \
+                    + timedelta(seconds = config[CONF_SCAN_INTERVAL])
+
+        except Exception as err:  # incl. evoBudgetExceeded
+            _LOGGER.warn("Shard failed to poll (%s), will retry.", err)
+            domain_data['stateExpires'] = _CLOCK.now() \
+                + timedelta(seconds = config[CONF_SCAN_INTERVAL])
+
+        else:
+            domain_data['pollInterval'] = max(
+                config[CONF_SCAN_INTERVAL], domain_data['pollInterval'] / 2
+            )
+            domain_data['stateExpires'] = _CLOCK.now() \
+                + timedelta(seconds = domain_data['pollInterval'])
+
+            writer.send({
+                'account': account['account'],
+                'systems': _returnStatusDelta(_previous, _systems),
+                'requests': client.budget.requests - _requests,
+                'metrics': client.metrics.drain(),
+                'latency': _latency,
+                'interval': domain_data['pollInterval'],
+                'refreshed': _CLOCK.now(),
+            })
+            _requests = client.budget.requests
+
+        await asyncio.sleep(
+            max(0, (domain_data['stateExpires'] - _CLOCK.now()).total_seconds())
+            + random.uniform(0, _FLEET_JITTER_SECONDS)
+        )
+
+
+
+class evoClock(object):
+    """The clock of the component: its (wall-clock) times, and the times of its
+    expiries (e.g. of state, tokens, budget and overrides) are all of this.
+
+    It can be replaced (see _CLOCK) by a virtual clock, so that (e.g.) a week
+    of the component's behaviour can be simulated in seconds.  Latencies, and
+    the rate limit of schedule fetches, are always of real time."""
+
+    def now(self):
+        """Return the (local, naive) time, as per datetime.now()."""
+        return datetime.now()
+
+    def monotonic(self):
+        """Return the monotonic time, in secs, as per time.monotonic()."""
+        return monotonic()
+
+
+_CLOCK = evoClock()  ## see evoClock, is replaced by simulations
+
+
+
+class evoTokenBucket(object):
+    """A token bucket, to cap the rate of requests made of the web API.
+
+    Holds up to capacity tokens, and is refilled at rate tokens per second."""
+
+    def __init__(self, rate, capacity):
+        """Initialize the bucket (it starts full)."""
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = capacity
+        self._updated = monotonic()
+
+    def _refill(self):
+        _now = monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (_now - self._updated) * self.rate
+        )
+        self._updated = _now
+
+    async def async_acquire(self):
+        """Take a token from the bucket, waiting for one if it's empty."""
+        self._refill()
+
+        while self._tokens < 1:
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+            self._refill()
+
+        self._tokens -= 1
+
+
+
+class evoBudgetExceeded(Exception):
+    """Raised when a request is deferred, as the API budget is running low."""
+
+
+
+class evoRequestBudget(object):
+    """A budget of requests of the web API, per (sliding) hour.
+
+    Every request is counted, but only those of a lower priority are deferred
+    (i.e. refused) when the budget runs low: writes are never deferred, and
+    schedules are deferred well before status polls are."""
+
+    def __init__(self, budget):
+        """Initialize the budget (it starts unused)."""
+        self.budget = budget
+        self.deferred = 0
+        self.requests = 0  # the total number of requests (i.e. ever)
+
+        self._requests = deque()  # the (monotonic) times of recent requests
+
+    def _expire(self):
+        _cutoff = _CLOCK.monotonic() - _BUDGET_WINDOW_SECONDS
+        while self._requests and self._requests[0] < _cutoff:
+            self._requests.popleft()
+
+    @property
+    def used(self):
+        """Return the number of requests made in the last hour."""
+        self._expire()
+        return len(self._requests)
+
+    @property
+    def remaining(self):
+        """Return the number of requests left in the budget."""
+        return max(0, self.budget - self.used)
+
+    def acquire(self, priority):
+        """Count a request, or raise evoBudgetExceeded if it's deferred."""
+        _reserve = self.budget * _BUDGET_RESERVE.get(priority, 0)
+
+        if priority != _PRIORITY_WRITE and self.remaining <= _reserve:
+            self.deferred += 1
+            raise evoBudgetExceeded(
+                "API budget is low (%s of %s left), deferring a request of "
+                "priority %s" % (self.remaining, self.budget, priority)
+            )
+
+        self.record(1)
+
+    def record(self, count):
+        """Count requests that have already been made (e.g. by a shard)."""
+        _now = _CLOCK.monotonic()
+        self._requests.extend([_now] * count)
+        self.requests += count
+
+
+
+def _returnEndpoint(method, url):
+    """Return the endpoint of a request of the web API, for its metrics (the
+    v1 sessions are logins, as are the OAuth tokens)."""
+    if method.lower() != 'get':
+        if url == _API_OAUTH_URL or url.endswith('/Session'):
+            return 'login'
+        return 'write'
+
+    if url.endswith('/status'):
+        return 'status'
+    if url.endswith('/locations/'):
+        return 'v1_temperatures'
+    if url.endswith('/schedule'):
+        return 'schedule'
+    return 'installation'  # i.e. the userAccount, or the installationInfo
+
+
+
+class evoApiMetrics(object):
+    """Metrics of the requests of the web API (of an account), by endpoint.
+
+    For each endpoint: a count of each HTTP status (or error, e.g. a timeout),
+    a histogram of latencies (see _METRICS_BUCKETS), the bytes received, and
+    the retries (i.e. requests that follow a failed request of the endpoint).
+    See evoApiSensor, and _returnPrometheusText()."""
+
+    def __init__(self):
+        """Initialize the metrics (there are none)."""
+        self.endpoints = {}  # by endpoint, see _returnEndpoint()
+        self._failed = set()  # the endpoints whose latest request failed
+
+    def endpoint(self, endpoint):
+        """Return the metrics of an endpoint (they're empty, until it's used)."""
+        _metrics = self.endpoints.get(endpoint)
+
+        if _metrics is None:
+            _metrics = self.endpoints[endpoint] = {
+                'statuses': {},  # by HTTP status, or error (e.g. TimeoutError)
+                'buckets': [0] * len(_METRICS_BUCKETS),  # not cumulative
+                'latency': 0.0,  # secs, the sum of every request's latency
+                'recent': deque(maxlen=_METRICS_RECENT),
+                'bytes': 0,
+                'retries': 0,
+            }
+
+        return _metrics
+
+    def record(self, endpoint, latency, status, size=0):
+        """Count a request (status is its HTTP status, or the name of the error
+        if there was no response)."""
+        _metrics = self.endpoint(endpoint)
+
+        _metrics['statuses'][status] = _metrics['statuses'].get(status, 0) + 1
+        _metrics['latency'] += latency
+        _metrics['recent'].append(latency)
+        _metrics['bytes'] += size
+
+# latencies beyond the last bucket are only in the count (i.e. le="+Inf")
+        _idx = bisect.bisect_left(_METRICS_BUCKETS, latency)
+        if _idx < len(_METRICS_BUCKETS):
+            _metrics['buckets'][_idx] += 1
+
+        if endpoint in self._failed:
+            _metrics['retries'] += 1
+
+        if isinstance(status, int) and status < 400:
+            self._failed.discard(endpoint)
+        else:
+            self._failed.add(endpoint)
+
+    def drain(self):
+        """Return the metrics (e.g. of a shard), and start afresh."""
+        _endpoints, self.endpoints = self.endpoints, {}
+        return _endpoints
+
+    def merge(self, endpoints):
+        """Add the (drained) metrics of another client, e.g. of a shard."""
+        for _endpoint, _other in endpoints.items():
+            _metrics = self.endpoint(_endpoint)
+
+            for _status, _count in _other['statuses'].items():
+                _metrics['statuses'][_status] = \
+                    _metrics['statuses'].get(_status, 0) + _count
+            _metrics['buckets'] = [
+                _mine + _theirs for _mine, _theirs
+                    in zip(_metrics['buckets'], _other['buckets'])
+            ]
+            _metrics['recent'].extend(_other['recent'])
+
+            for _key in ['latency', 'bytes', 'retries']:
+                _metrics[_key] += _other[_key]
+
+
+
+class evoWeeklySchedule(object):
+    """A zone's (or DHW's) schedule, compiled for fast lookups.
+
+    The switchpoints of the whole week are held as two parallel lists, sorted
+    by minute-of-week (0 is midnight, Monday), so the setpoint at any time is
+    found by bisection.  Before the first switchpoint of the week, it wraps
+    around to the last one (i.e. the last of Sunday, or of the previous day
+    that has switchpoints)."""
+
+    __slots__ = ['minutes', 'setpoints']
+
+    def __init__(self, schedule):
+        """Compile a schedule, as returned by zone.schedule()."""
+        _switchpoints = []
+
+        for _day in schedule['DailySchedules']:
+            _dayOfWeek = _day['DayOfWeek']  ## 0 is Monday
+            if not isinstance(_dayOfWeek, int):
+                _dayOfWeek = _DAYS_OF_WEEK.index(_dayOfWeek)
+
+            for _switchPoint in _day['Switchpoints']:
+                _hours, _mins = _switchPoint['TimeOfDay'].split(':')[:2]
+                if 'DhwState' in _switchPoint:
+                    _setPoint = _switchPoint['DhwState']
+                elif 'TargetTemperature' in _switchPoint:  ## see _SCHEDULE_KEYS
+                    _setPoint = _switchPoint['TargetTemperature']
+                else:
+                    _setPoint = _switchPoint['heatSetpoint']
+
+                _switchpoints.append((
+                    _dayOfWeek * 1440 + int(_hours) * 60 + int(_mins),
+                    _setPoint
+                ))
+
+        _switchpoints.sort(key=lambda x: x[0])
+
+        self.minutes = [x[0] for x in _switchpoints]
+        self.setpoints = [x[1] for x in _switchpoints]
+
+    def setpoint(self, dt, day_of_week=None):
+        """Return the setpoint (or DHW state) in effect at dt (or at its time
+        of day_of_week, if that is not None), or None if it has no switchpoints
+        (i.e. the schedule is empty)."""
+        if not self.minutes:
+            return None
+
+        _minute = (dt.weekday() if day_of_week is None else day_of_week) \
+            * 1440 + dt.hour * 60 + dt.minute
+
+# a result of -1 wraps around to the last switchpoint of the week
+        return self.setpoints[bisect.bisect_right(self.minutes, _minute) - 1]
+
+
+
+class evoScheduleTable(object):
+    """The compiled schedules of all heating zones, for batched lookups.
+
+    The zones' weekly tables are concatenated into a single (NumPy) array,
+    each zone's block offset by a week's worth of minutes, so that the
+    setpoints of every zone at one or more times are found with a single
+    (vectorized) searchsorted.  DHW schedules (which are states, not
+    setpoints) are not included.
+
+    NumPy is optional (it isn't a requirement of the component): without it,
+    each zone is looked up in turn, by bisection (see evoWeeklySchedule)."""
+
+    def __init__(self, schedules):
+        """Build the table from a dict of zoneId: evoWeeklySchedule."""
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        self._np = np
+
+        self.zone_ids = []
+        self._compiled = []
+        _keys, _setpoints, _first, _last = [], [], [], []
+
+        for _zone_id, _compiled in sorted(schedules.items()):
+            if not _compiled.setpoints \
+                    or isinstance(_compiled.setpoints[0], str):
+                continue  # i.e. the DHW
+
+            _offset = len(self.zone_ids) * _MINUTES_PER_WEEK
+            self.zone_ids.append(_zone_id)
+            self._compiled.append(_compiled)
+
+            _first.append(len(_keys))
+            _keys.extend(_offset + _minute for _minute in _compiled.minutes)
+            _setpoints.extend(_compiled.setpoints)
+            _last.append(len(_keys) - 1)
+
+        if np is None:
+            return
+
+        self._keys = np.array(_keys, dtype=np.int64)
+        self._setpoints = np.array(_setpoints, dtype=np.float64)
+        self._first = np.array(_first, dtype=np.int64)[:, None]
+        self._last = np.array(_last, dtype=np.int64)[:, None]
+
+    def setpoints(self, times, offset=0, day_of_week=None):
+        """Return the scheduled setpoints of every zone, at every time.
+
+        Returns an array of shape (zones, times), in the order of zone_ids
+        (without NumPy, a list of lists).
+        The setpoints are adjusted by offset (e.g. -3 for AutoWithEco), and
+        if day_of_week is not None (0 is Monday), that day's schedule is used
+        instead of the actual day's (e.g. 5, Saturday, for DayOff)."""
+        np = self._np
+
+        if np is None:
+            return [[
+                _compiled.setpoint(dt, day_of_week) + offset for dt in times
+            ] for _compiled in self._compiled]
+
+        _minutes = np.array([
+            (dt.weekday() if day_of_week is None else day_of_week) * 1440
+                + dt.hour * 60 + dt.minute for dt in times
+        ], dtype=np.int64)
+
+        _queries = np.arange(len(self.zone_ids), dtype=np.int64)[:, None] \
+            * _MINUTES_PER_WEEK + _minutes[None, :]
+
+        _idx = np.searchsorted(self._keys, _queries, side='right') - 1
+
+# before a zone's first switchpoint of the week, wrap around to its last
+        _idx = np.where(_idx < self._first, self._last, _idx)
+
+        return self._setpoints[_idx] + offset
+
+    def setpoints_at(self, dt, offset=0, day_of_week=None):
+        """Return the scheduled setpoints of every zone at dt, by zoneId."""
+        return {
+            _zone_id: float(_setpoints[0]) for _zone_id, _setpoints
+                in zip(self.zone_ids, self.setpoints([dt], offset, day_of_week))
+        }
+
+
+def _returnScheduleTable(domain_data):
+    """Return the (batched) schedule table, (re)building it if required."""
+    if domain_data.get('scheduleTable') is None:
+        domain_data['scheduleTable'] = evoScheduleTable({
+            _zone_id: _schedule['compiled']
+                for _zone_id, _schedule in domain_data['schedule'].items()
+                    if _schedule['compiled'] is not None  # i.e. not pending
+        })
+
+    return domain_data['scheduleTable']
+
+
+
+class evoHttpTransport(object):
+    """The transport of evoApiClient's requests, i.e. Honeywell's web API.
+
+    Requests can instead be recorded, or replayed from a recording, see
+    evoRecordingTransport and evoReplayTransport."""
+
+    async def async_request(self, client, method, url, trace=None, **kwargs):
+        """Make a request (via the client's session), and return the (decoded)
+        JSON.  Raises aiohttp.ClientResponseError for 4xx/5xx.
+
+        If given a trace (a dict), the status & size of the response are noted
+        in it, see evoApiMetrics (other transports needn't do so)."""
+        async with client._session.request(method, url, **kwargs) as resp:
+            _body = await resp.read()
+            if trace is not None:
+                trace.update(status=resp.status, bytes=len(_body))
+
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+
+
+class evoRecordingTransport(evoHttpTransport):
+    """A transport that records every request, with its response & timings, to
+    a file (one line of JSON per request), for replaying later.
+
+    What the component REDACTs is redacted here too (as are the tokens and
+    sessionIds), and the ids of the account/users/locations/gateways are
+    replaced by aliases.  The credentials (i.e. the bodies of the login
+    requests) aren't recorded, nor are any headers."""
+
+    def __init__(self, path):
+        self._path = path
+        self._start = monotonic()
+        self._aliases = {}  # by id, see _returnAlias()
+        self._pending = deque()  # lines not yet written to the file
+        self._writing = False  # i.e. a write is queued (in an executor)
+        self._lock = threading.Lock()  # one write at a time
+
+    async def async_request(self, client, method, url, **kwargs):
+        _entry = {
+            'time': round(monotonic() - self._start, 3),
+            'account': _returnAlias(self._aliases, client.username_hash),
+            'method': method.upper(),
+        }
+        if 'json' in kwargs and 'Password' not in kwargs['json']:
+            _entry['body'] = kwargs['json']
+
+        _start = monotonic()
+        try:
+            _json = await super().async_request(client, method, url, **kwargs)
+
+        except aiohttp.ClientResponseError as err:
+            _entry['status'] = err.status
+            if err.headers and 'Retry-After' in err.headers:
+                _entry['retry_after'] = err.headers['Retry-After']
+            raise
+
+        except Exception as err:  # e.g. a timeout, so there's no status
+            _entry['status'] = None
+            _entry['error'] = type(err).__name__
+            raise
+
+        else:
+            _entry['status'] = 200
+            _entry['json'] = self._redact(url, copy.deepcopy(_json))
+            return _json
+
+        finally:
+            _entry['latency'] = round(monotonic() - _start, 3)
+            _entry['path'] = self._returnPath(url)
+            self._save(_entry)
+
+    def _returnPath(self, url):
+        """Return the path of a url, with any locationId in it aliased."""
+        _path = urlsplit(url).path.split('/')
+
+        for _idx in range(1, len(_path)):
+            if _path[_idx - 1] == 'location' and _path[_idx] != 'installationInfo':
+                _path[_idx] = _returnAlias(self._aliases, _path[_idx])
+
+        return '/'.join(_path)
+
+    def _redact(self, url, _json):
+        """Redact a response (a copy), depending upon its endpoint."""
+        _aliases = self._aliases
+
+        if url.endswith(('/Token', '/Session')):  # OAuth, and v1 session
+            for _key in ['access_token', 'refresh_token', 'sessionId']:
+                if _key in _json:
+                    _json[_key] = 'REDACTED'
+            if 'userInfo' in _json:
+                _json['userInfo'] = {'userID': _returnAlias(
+                    _aliases, _json['userInfo']['userID']
+                )}
+
+        elif url.endswith('/userAccount'):
+            _json = {'userId': _returnAlias(_aliases, _json['userId'])}
+
+        elif url.endswith('/installationInfo'):
+            _redactInstallation(_json, _aliases)
+
+        elif url.endswith('/status'):
+            _json['locationId'] = _returnAlias(_aliases, _json['locationId'])
+            for gwy in _json['gateways']:
+                gwy['gatewayId'] = _returnAlias(_aliases, gwy['gatewayId'])
+
+        elif url.endswith('/locations/'):  # v1: keep only what's needed
+            _json = [{
+                'locationID': _returnAlias(_aliases, loc['locationID']),
+                'devices': [{
+                    _key: dev[_key] for _key in [
+                        'deviceID', 'name', 'thermostatModelType', 'thermostat'
+                    ]} for dev in loc['devices']],
+                } for loc in _json]
+
+        return _json
+
+    def _save(self, entry):
+        """Queue an entry to be written to the file (by an executor)."""
+        self._pending.append(json.dumps(entry))
+
+        if not self._writing:
+            self._queueWrite()
+
+    def _queueWrite(self):
+        self._writing = True
+        asyncio.get_event_loop().run_in_executor(None, self._write) \
+            .add_done_callback(self._written)
+
+    def _write(self):
+        with self._lock, open(self._path, 'a') as fp:
+            while self._pending:
+                fp.write(self._pending.popleft() + '\n')
+
+    def _written(self, future):
+        """Log a write that failed, and write any entries queued since."""
+        try:
+            future.result()
+        except Exception as err:  # e.g. an OSError
+            _LOGGER.error(
+                "Failed to write the recording to %s (%s)", self._path, err
+            )
+            return
+        finally:
+            self._writing = False
+
+# an entry queued just as the write finished would otherwise wait for the next
+        if self._pending:
+            self._queueWrite()
+
+    async def async_flush(self):
+        """Write any entries still queued, e.g. when HA is stopping."""
+        await asyncio.get_event_loop().run_in_executor(None, self._write)
+
+
+
+class evoReplayTransport(object):
+    """A transport that replays the requests of a recording, rather than making
+    them, see evoRecordingTransport.
+
+    Responses are matched by method & path.  Without a clock, they're replayed
+    in the order they were recorded (repeating the last, once they run out).
+    With a clock (a callable that returns the secs since the replay began),
+    the latest response recorded by then is replayed, i.e. what the api said
+    at the time, so that polling strategies can be compared on the same trace.
+
+    Each response is delayed by its recorded latency x latency_scale (0 is no
+    delay).  Requests that weren't recorded get a 404."""
+
+    def __init__(self, path, latency_scale=1, clock=None, account=None):
+        self.requests = 0
+        self._latency_scale = latency_scale
+        self._clock = clock
+        self._entries = {}  # by (method, path), a list (in the recorded order)
+        self._next = {}  # by (method, path), the index of the next entry
+
+        with open(path) as fp:
+            for _line in fp:
+                _entry = json.loads(_line)
+                if account is not None and _entry['account'] != account:
+                    continue
+# responses are kept as JSON, so each replay pays the cost of decoding it
+                _entry['json'] = json.dumps(_entry.get('json'))
+                self._entries.setdefault(
+                    (_entry['method'], _entry['path']), []
+                ).append(_entry)
+
+        self._times = {
+            _key: [_entry['time'] for _entry in _entries]
+                for _key, _entries in self._entries.items()
+        }
+
+    async def async_request(self, client, method, url, **kwargs):
+        _key = (method.upper(), urlsplit(url).path)
+        _entries = self._entries.get(_key)
+        self.requests += 1
+
+        if not _entries:
+            _entry = {'status': 404, 'latency': 0}
+
+        elif self._clock is None:
+            _idx = self._next.get(_key, 0)
+            self._next[_key] = _idx + 1
+            _entry = _entries[min(_idx, len(_entries) - 1)]
+
+        else:
+            _idx = bisect.bisect_right(self._times[_key], self._clock()) - 1
+            _entry = _entries[max(_idx, 0)]
+
+        if self._latency_scale and _entry['latency']:
+            await asyncio.sleep(_entry['latency'] * self._latency_scale)
+
+        if _entry['status'] == 200:
+            return json.loads(_entry['json'])
+
+        if _entry['status'] is None:
+            if _entry.get('error') == 'TimeoutError':
+                raise asyncio.TimeoutError()
+            raise aiohttp.ClientConnectionError(_entry.get('error'))
+
+        _headers = {}
+        if 'retry_after' in _entry:
+            _headers['Retry-After'] = _entry['retry_after']
+
+        raise aiohttp.ClientResponseError(
+            aiohttp.RequestInfo(URL(url), method, {}), (),
+            status=_entry['status'], message='Replayed', headers=_headers,
+        )
+
+
+
+class evoApiClient(object):
+    """An asyncio-native client for the Honeywell (EU) web API.
+
+    This covers every call this component makes once it is running (v2 for
+    login/installation/status/writes, v1 for high-precision temps), so that
+    none of them tie up one of HA's executor threads.  Requests go via a
+    (pooled, keep-alive) aiohttp session, shared by every account."""
+
+    def __init__(self, hass, username, password, session=None, transport=None):
+        """Initialize the client (i.e. no I/O here).
+
+        Uses HA's aiohttp session, unless it is given one (usually, it is: see
+        _returnWebSession), and Honeywell's web API, unless it is given another
+        transport (e.g. to record, or replay, its requests)."""
+        self.hass = hass
+        self._websession = session
+        self.transport = transport or evoHttpTransport()
+        self.username = username
+        self.password = password
+        self.username_hash = hashlib.sha256(
+            username.lower().encode('utf-8')
+        ).hexdigest()
+
+        self.access_token = None
+        self.access_token_expires = None
+        self.refresh_token = None
+        self.installation_info = None
+        self.location_ids = []
+        self.locations = []  # evohomeclient2 objects, see _asyncConnectClient()
+        self.budget = None  # an evoRequestBudget, see _asyncConnectClient()
+        self.metrics = evoApiMetrics()
+
+# the v1 session is long-lived (it's kept alive by being used every poll)
+        self.v1_session_id = None
+        self.v1_user_id = None
+        self.v1_session_expires = None
+
+    @property
+    def _session(self):
+        if self._websession is not None:
+            return self._websession
+        return self.hass.helpers.aiohttp_client.async_get_clientsession()
+
+    @property
+    def _headers(self):
+        return {
+            'Authorization': 'bearer ' + self.access_token,
+            'applicationId': _API_V2_APP_ID,
+            'Accept': _API_ACCEPT,
+        }
+
+    async def _async_request(self, priority, method, url, **kwargs):
+        """Make a request of the web API, and return the (decoded) JSON.
+
+        Raises evoBudgetExceeded if the request is deferred (see
+        evoRequestBudget), and aiohttp.ClientResponseError for 4xx/5xx, (e.g.
+        401, 429).  Every request that is made is measured, see evoApiMetrics."""
+        if self.budget is not None:
+            self.budget.acquire(priority)
+
+        _endpoint = _returnEndpoint(method, url)
+        _trace = {}
+        _start = monotonic()
+
+        try:
+            _json = await self.transport.async_request(
+                self, method, url, trace=_trace, **kwargs
+            )
+
+        except aiohttp.ClientResponseError as err:
+            self.metrics.record(
+                _endpoint, monotonic() - _start, err.status,
+                _trace.get('bytes', 0)
+            )
+            raise
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            self.metrics.record(
+                _endpoint, monotonic() - _start, type(err).__name__
+            )
+            raise
+
+# transports other than evoHttpTransport may not trace (their responses are 200)
+        self.metrics.record(
+            _endpoint, monotonic() - _start, _trace.get('status', 200),
+            _trace.get('bytes', 0)
+        )
+        return _json
+
+    async def async_login(self):
+        """Obtain a new OAuth access token (with username/password)."""
+        _json = await self._async_request(
+            _PRIORITY_WRITE, 'post',
+            _API_OAUTH_URL,
+            headers={'Authorization': _API_BASIC_AUTH, 'Accept': _API_ACCEPT},
+            data={
+                'grant_type': 'password',
+                'scope': _API_OAUTH_SCOPE,
+                'Username': self.username,
+                'Password': self.password,
+            },
+        )
+
+        self.access_token = _json['access_token']
+        self.access_token_expires = _CLOCK.now() + timedelta(
+            seconds = _json.get('expires_in', _OAUTH_TIMEOUT_SECONDS)
+        )
+        self.refresh_token = _json.get('refresh_token')
+        return _json
+
+    async def async_refresh_token(self):
+        """Obtain a new OAuth access token (with the refresh token)."""
+        _json = await self._async_request(
+            _PRIORITY_WRITE, 'post',
+            _API_OAUTH_URL,
+            headers={'Authorization': _API_BASIC_AUTH, 'Accept': _API_ACCEPT},
+            data={
+                'grant_type': 'refresh_token',
+                'scope': _API_OAUTH_SCOPE,
+                'refresh_token': self.refresh_token,
+            },
+        )
+
+        self.access_token = _json['access_token']
+        self.access_token_expires = _CLOCK.now() + timedelta(
+            seconds = _json.get('expires_in', _OAUTH_TIMEOUT_SECONDS)
+        )
+        self.refresh_token = _json.get('refresh_token', self.refresh_token)
+        return _json
+
+    async def async_installation(self):
+        """Obtain the user account, and then the installation (all locations)."""
+        _account = await self._async_request(
+            _PRIORITY_WRITE, 'get',
+            _API_V2_URL + '/userAccount',
+            headers=self._headers,
+        )
+
+        self.installation_info = await self._async_request(
+            _PRIORITY_WRITE, 'get',
+            _API_V2_URL + '/location/installationInfo',
+            headers=self._headers,
+            params={
+                'userId': _account['userId'],
+                'includeTemperatureControlSystems': 'True',
+            },
+        )
+
+# the locationIds are kept here, as installation_info will be REDACTED
+        self.location_ids = [
+            loc['locationInfo']['locationId'] for loc in self.installation_info
+        ]
+        return self.installation_info
+
+    async def async_status(self, idx):
+        """Obtain the status (modes, temps) of a location, by index."""
+        return await self._async_request(
+            _PRIORITY_STATUS, 'get',
+            _API_V2_URL + '/location/%s/status' % self.location_ids[idx],
+            headers=self._headers,
+            params={'includeTemperatureControlSystems': 'True'},
+        )
+
+    async def async_set_status(self, system_id, mode, until=None):
+        """Set the operating mode of a TCS (controller)."""
+        return await self._async_request(
+            _PRIORITY_WRITE, 'put',
+            _API_V2_URL + '/temperatureControlSystem/%s/mode' % system_id,
+            headers=self._headers,
+            json={
+                'SystemMode': mode,
+                'TimeUntil': until,
+                'Permanent': until is None,
+            },
+        )
+
+    async def async_set_temperature(self, zone_id, temperature, until=None):
+        """Set the setpoint of a zone, permanently or until a datetime."""
+        if until is None:
+            _mode = EVO_PERMOVER
+        else:
+            _mode = EVO_TEMPOVER
+            until = until.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        return await self._async_request(
+            _PRIORITY_WRITE, 'put',
+            _API_V2_URL + '/temperatureZone/%s/heatSetpoint' % zone_id,
+            headers=self._headers,
+            json={
+                'HeatSetpointValue': temperature,
+                'SetpointMode': _mode,
+                'TimeUntil': until,
+            },
+        )
+
+    async def async_cancel_temp_override(self, zone_id):
+        """Revert a zone to following its schedule."""
+        return await self._async_request(
+            _PRIORITY_WRITE, 'put',
+            _API_V2_URL + '/temperatureZone/%s/heatSetpoint' % zone_id,
+            headers=self._headers,
+            json={
+                'HeatSetpointValue': 0.0,
+                'SetpointMode': EVO_FOLLOW,
+                'TimeUntil': None,
+            },
+        )
+
+    async def async_set_dhw(self, dhw_id, data):
+        """Set the state/mode of a DHW zone."""
+        return await self._async_request(
+            _PRIORITY_WRITE, 'put',
+            _API_V2_URL + '/domesticHotWater/%s/state' % dhw_id,
+            headers=self._headers,
+            json=data,
+        )
+
+    async def _async_v1_login(self):
+        """Obtain a new v1 sessionId (with username/password)."""
+        _LOGGER.debug("Calling v1 API [1 request(s)]: client._async_v1_login()...")
+        _session = await self._async_request(
+            _PRIORITY_V1_TEMPS, 'post',
+            _API_V1_URL + '/Session',
+            json={
+                'Username': self.username,
+                'Password': self.password,
+                'ApplicationId': _API_V1_APP_ID,
+            },
+        )
+
+        self.v1_session_id = _session['sessionId']
+        self.v1_user_id = _session['userInfo']['userID']
+
+# the session is valid from now, even if the request that uses it fails
+        self.v1_session_expires = _CLOCK.now() \
+            + timedelta(seconds = _V1_SESSION_TIMEOUT_SECONDS)
+
+    async def _async_v1_locations(self):
+        return await self._async_request(
+            _PRIORITY_V1_TEMPS, 'get',
+            _API_V1_URL + '/locations/',
+            headers={'sessionId': self.v1_session_id},
+            params={'userId': self.v1_user_id, 'allData': 'True'},
+        )
+
+    async def async_schedule(self, zone_type, zone_id):
+        """Obtain the schedule of a zone (zone_type is temperatureZone, or
+        domesticHotWater), in the same form as evohomeclient2's schedule()."""
+        _json = await self._async_request(
+            _PRIORITY_SCHEDULE, 'get',
+            _API_V2_URL + '/%s/%s/schedule' % (zone_type, zone_id),
+            headers=self._headers,
+        )
+
+# the days are named (e.g. 'Monday'), and evoWeeklySchedule maps them to 0-6
+        return {'DailySchedules': [{
+            'DayOfWeek': _day['dayOfWeek'],
+            'Switchpoints': [{
+                _SCHEDULE_KEYS.get(key, key): value
+                    for key, value in _switchPoint.items()
+                } for _switchPoint in _day['switchpoints']],
+            } for _day in _json['dailySchedules']]}
+
+    async def async_v1_temperatures(self):
+        """Obtain the (higher precision) temps of the zones, via the v1 api.
+
+        Returns the same list of dicts as evohomeclient's temperatures(), but
+        for every location (each dict also has its locationId).  The v1 session is re-used between calls, and is only renewed when it has
+        (or is likely to have) expired, or if the api rejects it (401)."""
+        if self.v1_session_id is None or self.v1_session_expires is None \
+                or _CLOCK.now() > self.v1_session_expires:
+            await self._async_v1_login()
+
+        try:
+            _locations = await self._async_v1_locations()
+
+        except aiohttp.ClientResponseError as err:
+            if err.status != 401:
+                raise
+
+            _LOGGER.debug("v1 sessionId rejected (401), so logging in again...")
+            await self._async_v1_login()
+            _locations = await self._async_v1_locations()
+
+        self.v1_session_expires = _CLOCK.now() \
+            + timedelta(seconds = _V1_SESSION_TIMEOUT_SECONDS)
+
+        _temps = []
+        for location, device in [
+            (loc, dev) for loc in _locations for dev in loc['devices']
+        ]:
+            _values = device['thermostat']['changeableValues']
+            if 'heatSetpoint' in _values:
+                _setpoint = float(_values['heatSetpoint']['value'])
+                _status = _values['heatSetpoint']['status']
+            else:
+                _setpoint = 0
+                _status = _values['status']
+
+            _temps.append({
+                'thermostat': device['thermostatModelType'],
+                'id': device['deviceID'],
+                'name': device['name'],
+                'temp': float(device['thermostat']['indoorTemperature']),
+                'setpoint': _setpoint,
+                'status': _status,
+                'mode': _values['mode'],
+                'locationId': location['locationID'],
+            })
+
+        return _temps
+
+
+
+class evoStatusStore(object):
+    """A versioned store of the latest status of a TCS (and its zones).
+
+    A published status is never changed: the poller (or a heuristic, via
+    copy()) builds a new one, which is published with a single assignment.
+    So readers in the event loop never see a half-updated status, and no
+    locking is needed.  Entities use a stable handle, see handle()."""
+
+    def __init__(self):
+        """Initialize the store (it starts empty, i.e. version 0)."""
+        self._current = (0, None, {})  # version, status, status by zoneId
+
+    @property
+    def version(self):
+        """Return the version of the latest status (it's never reused)."""
+        return self._current[0]
+
+    @property
+    def tcs(self):
+        """Return the latest status of the TCS."""
+        return self._current[1]
+
+    @property
+    def by_id(self):
+        """Return the latest status of the zones (and DHW), by zoneId."""
+        return self._current[2]
+
+    def publish(self, tcs, by_id=None):
+        """Publish a new status of the TCS, and return its version."""
+        if by_id is None:
+            by_id = _returnZoneIndex(tcs)
+
+        self._current = (self._current[0] + 1, tcs, by_id)
+        return self._current[0]
+
+    def copy(self):
+        """Return a (deep) copy of the latest status of the TCS, which can be
+        changed (e.g. by heuristics) and then published."""
+        return copy.deepcopy(self._current[1])
+
+    def handle(self, zone_id=None):
+        """Return a stable handle to the status of a zone (or of the TCS)."""
+        return evoStatusHandle(self, zone_id)
+
+
+
+class evoStatusHandle(object):
+    """A stable handle to the latest status of a zone (or of the TCS)."""
+
+    __slots__ = ('store', 'zone_id')
+
+    def __init__(self, store, zone_id=None):
+        """Initialize the handle (zone_id is None for the TCS)."""
+        self.store = store
+        self.zone_id = zone_id
+
+    @property
+    def status(self):
+        """Return the latest status (is a different dict every version)."""
+        if self.zone_id is None:
+            return self.store.tcs
+        return self.store.by_id[self.zone_id]
+
+
+
+class evoSnapshot(object):
+    """An immutable snapshot of an entity's state, as of the latest refresh.
+
+    Derived values (e.g. a zone's state, which depends on the TCS's mode) are
+    computed once, when the snapshot is built, rather than every time HA reads
+    one of the entity's properties."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def _set(self, **kwargs):
+        for _name, _value in kwargs.items():
+            object.__setattr__(self, _name, _value)
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join(
+            "%s=%r" % (_name, getattr(self, _name)) for _name in self.__slots__
+        ))
+
+
+
+class evoControllerSnapshot(evoSnapshot):
+    """A snapshot of a TCS (temperature control system), see evoController."""
+
+    __slots__ = ('state', 'current_operation', 'operation_list',
+                 'is_away_mode_on')
+
+    def __init__(self, status, install):
+        """Build the snapshot from the TCS's status and installation (of the
+        TCS, rather than of its location)."""
+        _opmode = status['systemModeStatus']['mode']
+
+        self._set(
+# after calling AutoWithReset, the controller will enter Auto mode
+            state = EVO_AUTO if _opmode == EVO_RESET else _opmode,
+            current_operation = _opmode,
+            operation_list = [
+                mode['systemMode'] for mode in install['allowedSystemModes']
+            ],
+            is_away_mode_on = _opmode == EVO_AWAY,
+        )
+
+
+
+class evoZoneSnapshot(evoSnapshot):
+    """A snapshot of a Heating zone, see evoZone."""
+
+    __slots__ = ('state', 'current_operation', 'current_temperature',
+                 'target_temperature', 'min_temp', 'max_temp', 'precision')
+
+    def __init__(self, status, install, tcs_status, config):
+        """Build the snapshot from the zone's (and its TCS's) status."""
+        _cont_opmode = tcs_status['systemModeStatus']['mode']
+        _zone_target = status[_SETPOINT_STATUS][_TARGET_TEMPERATURE]
+        _zone_opmode = status[_SETPOINT_STATUS]['setpointMode']
+
+        _state = _target = None
+
+        if config[CONF_USE_HEURISTICS]:
+            if _cont_opmode == EVO_AWAY:
+                _state, _target = EVO_AWAY, 10
+            elif _cont_opmode == EVO_HEATOFF:
+                _state, _target = EVO_FROSTMODE, 5
+
+# zones may enter OpenWindowMode autonomously (setpoint is then 5C)
+        if _state is None and _zone_target == 5:
+            if _cont_opmode == EVO_HEATOFF:
+                _state = EVO_FROSTMODE
+            else:
+                _state = EVO_OPENWINDOW
+
+        if _state is None:
+            if _zone_opmode == EVO_FOLLOW:
+                if _cont_opmode == EVO_RESET:
+                    _state = EVO_AUTO
+                elif _cont_opmode == EVO_HEATOFF:
+                    _state = EVO_FROSTMODE
+                else:
+                    _state = _cont_opmode
+            else:
+                _state = _zone_opmode
+
+        if status['temperatureStatus']['isAvailable']:
+            _temp = status['temperatureStatus']['temperature']
+        else:
+            _temp = None
+
+        self._set(
+            state = _state,
+            current_operation = _zone_opmode,
+            current_temperature = _temp,
+            target_temperature = _zone_target if _target is None else _target,
+            min_temp = install[_SETPOINT_CAPABILITIES]['minHeatSetpoint'],
+            max_temp = install[_SETPOINT_CAPABILITIES]['maxHeatSetpoint'],
+            precision = PRECISION_TENTHS if config[CONF_HIGH_PRECISION] \
+                else PRECISION_HALVES,
+        )
+
+
+
+class evoDhwSnapshot(evoSnapshot):
+    """A snapshot of a DHW zone, see evoDhwEntity."""
+
+    __slots__ = ('state', 'dhw_state', 'current_operation',
+                 'current_temperature', 'min_temp', 'max_temp', 'precision')
+
+    def __init__(self, status, tcs_status, config):
+        """Build the snapshot from the DHW's (and its TCS's) status."""
+        _state = status['stateStatus']['state']
+
+# when the TCS is Away, the DHW is assumed to be off
+        if config[CONF_USE_HEURISTICS] \
+                and tcs_status['systemModeStatus']['mode'] == EVO_AWAY:
+            _state = DHW_STATES[STATE_OFF]
+
+        if status['temperatureStatus']['isAvailable']:
+            _temp = status['temperatureStatus']['temperature']
+        else:
+            _temp = None
+
+        self._set(
+            state = STATE_ON if _state == DHW_STATES[STATE_ON] else STATE_OFF,
+            dhw_state = _state,
+            current_operation = status['stateStatus']['mode'],
+            current_temperature = _temp,
+            min_temp = None,
+            max_temp = None,
+            precision = PRECISION_WHOLE,  # Honeywell has (e.g.) 62C, not 62.0C
+        )
+
+
+
+class evoEntity(Entity, metaclass=abc.ABCMeta):
+    """Base for Honeywell evohome slave devices (Heating/DHW zones)."""
+
+    def __init__(self, hass, client, objRef):
+        """Initialize the evohome Controller."""
         self.hass = hass
         self.client = client
 
         self._obj = objRef
-        self._config = hass.data[DATA_EVOHOME]['config']
+        self._data = hass.data[DATA_EVOHOME]['fleet'][client.username_hash]
+        self._api = self._data['apiClient']
+        self._config = self._data['config']
+        self._snapshot = None  # see _snap
 
 # create a listener for update packets...
         hass.helpers.dispatcher.async_dispatcher_connect(
@@ -522,11 +2855,12 @@ class evoEntity(Entity):
 
         if packet['signal'] == 'update':
             _LOGGER.debug(
-                "%s is calling schedule_update_ha_state(force_refresh=True)...",
+                "%s is calling schedule_update_ha_state(force_refresh=False)...",
                 self._id + " [" + self.name + "]"
             )
+# the state is already in hass.data, so there's no need to call update()
             self._assumed_state = False
-            self.async_schedule_update_ha_state(force_refresh=True)
+            self.async_schedule_update_ha_state(force_refresh=False)
 
         elif packet['signal'] == 'assume':
             self._assumed_state = True
@@ -534,51 +2868,52 @@ class evoEntity(Entity):
         return None
 
 
+    @abc.abstractmethod
+    def _buildSnapshot(self):
+        """Return a (new) snapshot of the entity's state, see evoSnapshot."""
+
+    @property
+    def _snap(self):
+        """Return a snapshot of the entity's state (built once per refresh).
+
+        The snapshot is rebuilt (when next read) whenever a new version of the
+        status is published, i.e. after a poll, or after a write."""
+        if self._snapshot is None or self._snapshot_version != self._store.version:
+            self._snapshot_version = self._store.version
+            self._snapshot = self._buildSnapshot()
+            _LOGGER.debug("_snap(%s) = %s", self._id, self._snapshot)
+        return self._snapshot
+
     def _getZoneSchedTemp(self, zone, dt=None):
+        """Return the scheduled setpoint of a zone (or state of a DHW) at dt.
 
-        _LOGGER.debug(
-            "_getZoneSchedTemp(), schedule = %s", 
-            hass.data[DATA_EVOHOME]['schedule']
-        )
-        if dt is None: dt = datetime.now()
-        _dayOfWeek = int(dt.strftime('%w'))  ## 0 is Sunday
-        _timeOfDay = dt.strftime('%H:%M:%S')
+        The zone can be a zoneId, or the zone's status (a dict)."""
+        if dt is None: dt = _CLOCK.now()
 
-#       _zone = self._obj.zones_by_id[zone['zoneId']]
-        _zone = self._schedule[zone.zoneId]
-        _LOGGER.debug("ZY Schedule: %s...", _zone._schedule)
-        
-        if _zone._schedule['refreshed'] > datetime.now():  # TBA 'expires'
-            _LOGGER.debug(
-                "Calling v2 API [1 request(s)]: zone.schedule(Zone=%s)...", 
-                self._id
-            )
-            _zone._schedule = self._obj.schedule()
-            _zone._schedule['refreshed'] = datetime.now()
+        if isinstance(zone, dict):
+            zone = zone['zoneId'] if 'zoneId' in zone else zone['dhwId']
+
+        _schedule = self._data['schedule'].get(zone)
+
+        if _schedule is None or _schedule['compiled'] is None:
+            _LOGGER.debug("_getZoneSchedTemp(%s) - no schedule (yet)", zone)
+            return None
+
+        _setPoint = _schedule['compiled'].setpoint(dt)
+        _LOGGER.debug("_getZoneSchedTemp(%s, %s) = %s", zone, dt, _setPoint)
+        return _setPoint
+
+    def _getZoneSchedTemps(self, dt=None, offset=0, day_of_week=None):
+        """Return the scheduled setpoints of all (heating) zones at dt.
+
+        Is a single (batched) lookup, see evoScheduleTable.setpoints_at()."""
+        if dt is None: dt = _CLOCK.now()
 
-            
-        # start with the last setpoint of yesterday, then
-        for _day in _zone._schedule['DailySchedules']:
-            if _day['DayOfWeek'] == (_dayOfWeek + 6) % 7:
-                for _switchPoint in _day['Switchpoints']:
-                    if _zone.zone_type == 'domesticHotWater':
-                        _setPoint = _switchPoint['DhwState']
-                    else:
-                        _setPoint = _switchPoint['heatSetpoint']
-
-        # walk through all of todays setpoints...
-        for _day in _zone._schedule['DailySchedules']:
-            if _day['DayOfWeek'] == _dayOfWeek:
-                for _switchPoint in _day['Switchpoints']:
-                    if _timeOfDay < _switchPoint['TimeOfDay']:
-                        if _zone.zone_type == 'domesticHotWater':
-                            _setPoint = _switchPoint['DhwState']
-                        else:
-                            _setPoint = _switchPoint['heatSetpoint']
-                    else:
-                        break
-
-            return _setPoint
+        _setPoints = _returnScheduleTable(self._data) \
+            .setpoints_at(dt, offset=offset, day_of_week=day_of_week)
+
+        _LOGGER.debug("_getZoneSchedTemps(%s) = %s", dt, _setPoints)
+        return _setPoints
 
 
 
@@ -590,10 +2925,17 @@ class evoController(evoEntity):
         super().__init__(hass, client, objRef)
 
         self._id = objRef.systemId
+        self._store = self._data['statusStores'][self._id]
+        self._handle = self._store.handle()
         self._should_poll = True
 
-        self._install = hass.data[DATA_EVOHOME]['install']
-        self._status = hass.data[DATA_EVOHOME]['status']
+# ...and for update packets sent to the TCS only (i.e. when its mode changes)
+        hass.helpers.dispatcher.async_dispatcher_connect(
+            DISPATCHER_EVOHOME + '_' + self._id,
+            self._connect
+        )
+
+        self._install = self._data['installById'][self._id]
         self._schedule = {} # if self._config[CONF_USE_SCHEDULES]
         
         _LOGGER.debug("ZZ, self._id: %s, self._config = %s", self._id, self._config)
@@ -604,11 +2946,20 @@ class evoController(evoEntity):
         _LOGGER.debug("__init__(TCS=%s)", self._id + " [" + self.name + "]")
         return None  # __init__() should return None
 
+    @property
+    def _status(self):
+        """Return the latest status of the TCS (is replaced every refresh)."""
+        return self._handle.status
+
+    def _buildSnapshot(self):
+        return evoControllerSnapshot(self._status, self._install)
+
     @property
     def should_poll(self):
         """Controller should TBA. The controller will provide the state data."""
-        _LOGGER.debug("should_poll(TCS=%s) = %s", self._id, self._should_poll)
-        return self._should_poll
+        _poll = self._should_poll and not self._data.get('fleetPolled')
+        _LOGGER.debug("should_poll(TCS=%s) = %s", self._id, _poll)
+        return _poll
 
     @property
     def force_update(self):
@@ -620,7 +2971,7 @@ class evoController(evoEntity):
     @property
     def name(self):
         """Get the name of the controller."""
-        _name = "_" + self._install['locationInfo']['name']
+        _name = "_" + self._obj.location.name
         _LOGGER.debug("name(TCS=%s) = %s", self._id, _name)
         return _name
 
@@ -634,15 +2985,7 @@ class evoController(evoEntity):
     @property
     def state(self):
         """Return the controller's current state (usually, its operation mode). After calling AutoWithReset, the controller  will enter Auto mode."""
-
-        _opmode = self._status['systemModeStatus']['mode']
-
-        if _opmode == EVO_RESET:
-            _LOGGER.debug("state(TCS=%s) = %s (from %s)", self._id, EVO_AUTO, _opmode)
-            return EVO_AUTO
-        else:
-            _LOGGER.debug("state(TCS=%s) = %s", self._id, _opmode)
-            return _opmode
+        return self._snap.state
 
     @property
     def state_attributes(self):
@@ -667,32 +3010,17 @@ class evoController(evoEntity):
     @property
     def current_operation(self):
         """Return the operation mode of the controller."""
-
-        _opmode = self._status['systemModeStatus']['mode']
-
-        _LOGGER.debug("current_operation(TCS=%s) = %s", self._id, _opmode)
-        return _opmode
+        return self._snap.current_operation
 
     @property
     def operation_list(self):
         """Return the list of available operation modes."""
-        _oplist = []
-        for mode in self._install['gateways'][0] \
-            ['temperatureControlSystems'][0]['allowedSystemModes']:
-            _oplist.append(mode['systemMode'])
-
-        _LOGGER.debug("operation_list(TCS=%s) = %s", self._id, _oplist)
-        return _oplist
-
+        return self._snap.operation_list
 
-    def async_set_operation_mode(self, operation_mode):
-        """Set new target operation mode. This method must be run in the event loop and returns a coroutine."""
-        return self.hass.async_add_job(self.set_operation_mode, operation_mode)
 
-
-    def set_operation_mode(self, operation_mode):
+    async def async_set_operation_mode(self, operation_mode):
 #   def set_operation_mode(self: ClimateDevice, operation: str) -> None:
-        """Set new target operation mode.
+        """Set new target operation mode. This method must be run in the event loop.
 
         'AutoWithReset may not be a mode in itself: instead, it _should_(?) lead to 'Auto' mode after resetting all the zones to 'FollowSchedule'. How should this be done?
 
@@ -723,7 +3051,7 @@ class evoController(evoEntity):
 #           self.client.locations[0]._gateways[0]._control_systems[0]._set_status(EVO_AUTO)
 #           self.client.set_status_normal
 #           self._obj._set_status(EVO_AUTO)
-            self._obj._set_status(operation_mode)
+            await self._api.async_set_status(self._id, operation_mode)
             
         else:
             raise NotImplementedError()
@@ -734,7 +3062,9 @@ class evoController(evoEntity):
         if self._config[CONF_USE_HEURISTICS]:
             _LOGGER.debug(" - updating Controller state data")
 ## Do one of the following (sleep just doesn't work, convergence is too long)...
-            self._status['systemModeStatus']['mode'] = operation_mode
+# the published status is never changed, so change a copy and publish that
+            _tcs = self._store.copy()
+            _tcs['systemModeStatus']['mode'] = operation_mode
 
 
 # PART 3: HEURISTICS - update the internal state of the Zones
@@ -758,7 +3088,16 @@ class evoController(evoEntity):
             )
 
 ## Second, Update target_temp of the Zones
-            _zones = self._status['zones']
+            _zones = _tcs['zones']
+
+# get the scheduled setpoints of all zones in one go (rather than per zone), a
+# zone without a schedule (e.g. it is pending) is left as is
+            _sched = {}
+            if self._config[CONF_USE_SCHEDULES] \
+                and operation_mode in _SCHED_HEURISTICS:
+                _sched = self._getZoneSchedTemps(
+                    **_SCHED_HEURISTICS[operation_mode]
+                )
 
             if operation_mode == EVO_CUSTOM:
                 # target temps currently unknowable, await  next update()
@@ -769,10 +3108,11 @@ class evoController(evoEntity):
                     _zone[_SETPOINT_STATUS]['setpointMode'] \
                         = EVO_FOLLOW
                 # set target temps according to schedule?
+                    _setpoint = _sched.get(_zone['zoneId'])
                     if _zone[_SETPOINT_STATUS]['setpointMode'] == EVO_FOLLOW \
-                        and self._config[CONF_USE_SCHEDULES]:
+                        and _setpoint is not None:
                         _zone[_SETPOINT_STATUS][_TARGET_TEMPERATURE] \
-                            = self._getZoneSchedTemp(_zone)
+                            = _setpoint
 
             elif operation_mode == EVO_AUTO:
                 for _zone in _zones:
@@ -780,10 +3120,11 @@ class evoController(evoEntity):
                         _zone[_SETPOINT_STATUS]['setpointMode'] \
                             = EVO_FOLLOW
                 # set target temps according to schedule?
+                    _setpoint = _sched.get(_zone['zoneId'])
                     if _zone[_SETPOINT_STATUS]['setpointMode'] == EVO_FOLLOW \
-                        and self._config[CONF_USE_SCHEDULES]:
+                        and _setpoint is not None:
                         _zone[_SETPOINT_STATUS][_TARGET_TEMPERATURE] \
-                            = self._getZoneSchedTemp(_zone)
+                            = _setpoint
 
             elif operation_mode == EVO_AUTOECO:
                 for _zone in _zones:
@@ -791,10 +3132,11 @@ class evoController(evoEntity):
                         _zone[_SETPOINT_STATUS]['setpointMode'] \
                             = EVO_FOLLOW
                 # set target temps according to schedule?, but less 3
+                    _setpoint = _sched.get(_zone['zoneId'])
                     if _zone[_SETPOINT_STATUS]['setpointMode'] == EVO_FOLLOW \
-                        and self._config[CONF_USE_SCHEDULES]:
+                        and _setpoint is not None:
                         _zone[_SETPOINT_STATUS][_TARGET_TEMPERATURE] \
-                            = self._getZoneSchedTemp(_zone) - 3
+                            = _setpoint
 
             elif operation_mode == EVO_DAYOFF:
                 for _zone in _zones:
@@ -802,12 +3144,11 @@ class evoController(evoEntity):
                         _zone[_SETPOINT_STATUS]['setpointMode'] \
                             = EVO_FOLLOW
                 # set target temp according to schedule?, but for Saturday
+                    _setpoint = _sched.get(_zone['zoneId'])
                     if _zone[_SETPOINT_STATUS]['setpointMode'] == EVO_FOLLOW \
-                        and self._config[CONF_USE_SCHEDULES]:
-                        _dt = datetime.now()
-                        _dt += timedelta(days = 6 - int(_dt.strftime('%w')))
+                        and _setpoint is not None:
                         _zone[_SETPOINT_STATUS][_TARGET_TEMPERATURE] \
-                            = self._getZoneSchedTemp(_zone, dt)
+                            = _setpoint
 
             elif operation_mode == EVO_AWAY:
                 for _zone in _zones:
@@ -816,8 +3157,8 @@ class evoController(evoEntity):
                 # default target for 'Away' is 10C, assume that for now
                     if self._config[CONF_USE_SCHEDULES]:
                         _zone[_SETPOINT_STATUS][_TARGET_TEMPERATURE] = 10
-                if 'dhw' in self._status:
-                    _zone = self._status['dhw']
+                if 'dhw' in _tcs:
+                    _zone = _tcs['dhw']
                     if _zone['stateStatus']['mode'] != EVO_PERMOVER:
                         _zone['stateStatus']['mode'] = EVO_FOLLOW
                         _zone['stateStatus']['state'] = STATE_OFF
@@ -832,6 +3173,8 @@ class evoController(evoEntity):
                         _zone[_SETPOINT_STATUS][_TARGET_TEMPERATURE] = 5
 
 
+            self._store.publish(_tcs)
+
 ## Finally, , Inform the Zones that their state may have changed
 #           self.hass.bus.fire('mode_changed', {ATTR_ENTITY_ID: self._scs_id, ATTR_STATE: command})
             _packet = {'sender': 'controller', 'signal': 'update'}
@@ -843,46 +3186,41 @@ class evoController(evoEntity):
             )
 
 ## At the end, the last thing to do is restart updates()
-        self.hass.data[DATA_EVOHOME]['lastUpdated'] = datetime.now()
+        self._data['lastUpdated'] = _CLOCK.now()
         self._should_poll = True
 
+# ...and to poll until the API reflects the change (AutoWithReset becomes Auto)
+        _mode = EVO_AUTO if operation_mode == EVO_RESET else operation_mode
+        _startConvergencePolling(
+            self.hass, self._data, self._id,
+            lambda data: self._status['systemModeStatus']['mode'] == _mode
+        )
+
         return None
         
     @property
     def is_away_mode_on(self):
         """Return true if away mode is on."""
-        _away = self._status['systemModeStatus']['mode'] == EVO_AWAY
-        _LOGGER.debug("is_away_mode_on(TCS=%s) = %s", self._id, _away)
-        return _away
+        return self._snap.is_away_mode_on
 
         
-    def async_turn_away_mode_on(self):
+    async def async_turn_away_mode_on(self):
         """Turn away mode on.
 
-        This method must be run in the event loop and returns a coroutine.
+        This method must be run in the event loop.
         """
-        return self.hass.async_add_job(self.turn_away_mode_on)
-
-        
-    def turn_away_mode_on(self):
-        """Turn away mode on."""
         _LOGGER.debug("turn_away_mode_on(TCS=%s)", self._id)
-        self.set_operation_mode(EVO_AWAY)
+        await self.async_set_operation_mode(EVO_AWAY)
         return
 
 
-    def async_turn_away_mode_off(self):
+    async def async_turn_away_mode_off(self):
         """Turn away mode off.
 
-        This method must be run in the event loop and returns a coroutine.
+        This method must be run in the event loop.
         """
-        return self.hass.async_add_job(self.turn_away_mode_off)
-
-        
-    def turn_away_mode_off(self):
-        """Turn away mode off."""
         _LOGGER.debug("turn_away_mode_off(TCS=%s)", self._id)
-        self.set_operation_mode(EVO_AUTO)
+        await self.async_set_operation_mode(EVO_AUTO)
         return
 
     @property
@@ -896,49 +3234,14 @@ class evoController(evoEntity):
         return _flags
 
 
-    def update(self):
-# I dont think I can use async_update() because the client api is not asyncio
+    async def async_update(self):
         """Get the latest state (operating mode) of the controller and
         update the state (temp, setpoint) of all children zones.
 
-        Get the latest schedule of the controller every hour."""
+        Get the latest schedule of the controller every hour.  Uses the asyncio
+        client, so no executor thread is tied up waiting for the web API."""
         _LOGGER.debug("update(TCS=%s)", self._id)
-
-## 1. wait a minimum of scan_interval between updates
-        if datetime.now() < self.hass.data[DATA_EVOHOME]['stateExpires']:
-            _LOGGER.debug(
-                "update(TCS=%s) scan_interval not expired: exiting...",
-                self._id
-            )
-            return
-
-## 2. wait a minimum of scan_interval between updates
-        elif datetime.now() > self.hass.data[DATA_EVOHOME]['oauthExpires']:
-            _LOGGER.debug(
-                "update(TCS=%s) oauth Token expired: fully refreshing...",
-                self._id
-            )
-
-            _updateStateData(self.hass.data[DATA_EVOHOME], force_refresh=True)
-
-## 3. wait a minimum of scan_interval between updates
-        else:
-            _LOGGER.debug(
-                "update(TCS=%s) oauth Token not expired: updating...",
-                self._id
-            )
-            _updateStateData(self.hass.data[DATA_EVOHOME])
-
-
-# Now send a message to the slaves to update themselves
-# store data in hass.data, platforms subscribe with dispatcher_connect, component notifies of updates using dispatch_send
-        if True:
-            _packet = {'sender': 'controller', 'signal': 'update'}
-            _LOGGER.debug(" - sending a dispatcher packet, %s...", _packet)
-## invokes def async_dispatcher_send(hass, signal, *args) on zones:
-            self.hass.helpers.dispatcher.async_dispatcher_send(DISPATCHER_EVOHOME, _packet)
-
-        return True
+        return await _asyncPollAccount(self.hass, self._data)
 
 
 
@@ -950,38 +3253,51 @@ class evoSlaveEntity(evoEntity):
         super().__init__(hass, client, objRef)
 
         self._id = objRef.zoneId  # for DHW, zoneId is == objRef.dhwId
+        self._store = self._data['statusStores'] \
+            [self._data['tcsById'][self._id]]
+        self._handle = self._store.handle(self._id)
         self._assumed_state = True  # is this right for polled IOT devices?
 
-        if self._obj.zone_type == 'domesticHotWater':
-            self._config = hass.data[DATA_EVOHOME]['config']
-            self._install = hass.data[DATA_EVOHOME]['install'] \
-                ['gateways'][0]['temperatureControlSystems'][0]['dhw']
-            self._status = hass.data[DATA_EVOHOME]['status']['dhw']
-        else:
-            for _zone in hass.data[DATA_EVOHOME]['install'] \
-                ['gateways'][0]['temperatureControlSystems'][0]['zones']:
-                if _zone['zoneId'] == self._id:
-                    self._install = _zone
-                    break
-            for _zone in hass.data[DATA_EVOHOME]['status']['zones']:
-                if _zone['zoneId'] == self._id:
-                    self._status = _zone
-                    break
+# ...and for update packets sent to this zone only (i.e. when it has changed)
+        hass.helpers.dispatcher.async_dispatcher_connect(
+            DISPATCHER_EVOHOME + '_' + self._id,
+            self._connect
+        )
+
+        self._install = self._data['installById'][self._id]
         
         if self._config[CONF_USE_SCHEDULES]:
-            _LOGGER.debug(
-                "Calling v2 API [1 request(s)]: zone.schedule(Zone=%s)...", 
-                self._id
-            )
-#           self.schedule = {}
-            self._schedule = self._obj.schedule()
-            self._schedule['refreshed'] = datetime.now()
-
-#           hass.data[DATA_EVOHOME]['schedule'] = {}  # done when TCS was init'd
-            hass.data[DATA_EVOHOME]['schedule'][self._id] \
-                = {'name'      : self.name, 
-                   'schedule'  : self._schedule,
-                   'refreshed' : self._schedule['refreshed']}
+            _domain_data = self._data
+            _cached = _domain_data['scheduleCache'].get(self._id)
+
+# the DHW has two entities, so its schedule may already have been obtained
+            if self._id in _domain_data['schedule']:
+                pass
+
+# use any cached schedule, even if expired (it'll be refreshed after setup)
+            elif _cached is not None:
+                _LOGGER.debug(
+                    "Schedule of Zone=%s loaded from cache (refreshed at %s)",
+                    self._id,
+                    _cached['refreshed']
+                )
+                _storeSchedule(
+                    _domain_data, self._id, self._obj.zone_type, self.name,
+                    _cached['schedule'],
+                    dt_util.parse_datetime(_cached['refreshed'])
+                )
+
+# otherwise, it'll be fetched by the next (background) refresh, after setup
+            else:
+                _LOGGER.debug(
+                    "Schedule of Zone=%s not yet obtained (is pending)",
+                    self._id
+                )
+                _storePendingSchedule(
+                    _domain_data, self._id, self._obj.zone_type, self.name
+                )
+
+            self._schedule = _domain_data['schedule'][self._id]['schedule']
         else:
             self._schedule = None
 
@@ -993,6 +3309,11 @@ class evoSlaveEntity(evoEntity):
         _LOGGER.debug("__init__(Slave=%s)", self._id + " [" + self.name + "]")
         return None  # __init__() should return None
 
+    @property
+    def _status(self):
+        """Return the latest status of the Heating/DHW zone (via the index)."""
+        return self._handle.status
+
     @property
     def supported_features(self):
         """Return the list of supported features of the Heating/DHW zone."""
@@ -1019,28 +3340,8 @@ class evoSlaveEntity(evoEntity):
     @property
     def current_operation(self):
         """Return the current operating mode of the Heating/DHW zone."""
-        if self._obj.zone_type == 'domesticHotWater':
-            _opmode = self._status['stateStatus']['mode']
-        else:
-            _opmode = self._status[_SETPOINT_STATUS]['setpointMode']
-
-        _LOGGER.debug("current_operation(%s) = %s", self._id, _opmode)
-        return _opmode
-
-
-    def async_set_operation_mode(self, operation_mode):
-#   def async_set_operation_mode(self, operation_mode, setpoint=None, until=None):
-        """Set new target operation mode.
+        return self._snap.current_operation
 
-        This method must be run in the event loop and returns a coroutine.
-        """
-# Explicitly added, cause I am not sure of impact of adding parameters to this
-        _LOGGER.warn(
-            "async_set_operation_mode(%s, operation_mode=%s)", 
-            self._id, 
-            operation_mode
-            )
-        return self.hass.async_add_job(self.set_operation_mode, operation_mode)
 
     @property
     def name(self):
@@ -1067,40 +3368,19 @@ class evoSlaveEntity(evoEntity):
     @property
     def current_temperature(self):
         """Return the current temperature of the Heating/DHW zone."""
-# TBD: use object's state date rather than hass.data[DATA_EVOHOME]['status']
-        if self._status['temperatureStatus']['isAvailable']:
-            _temp = self._status['temperatureStatus']['temperature']
-            _LOGGER.debug("current_temperature(%s) = %s", self._id, _temp)
-        else:
-            _temp = None
-            _LOGGER.warn("current_temperature(%s) - unavailable", self._id)
-        return _temp
+        return self._snap.current_temperature
 
     @property
     def min_temp(self):
         """Return the minimum setpoint (target temp) of the Heating zone.  
         Setpoints are 5-35C by default, but zones can be further limited."""
-# Only applies to Heating zones (SUPPORT_TARGET_TEMPERATURE), not DHW
-        if self._obj.zone_type == 'domesticHotWater':
-            _temp = None
-        else:
-            _temp = self._install[_SETPOINT_CAPABILITIES]['minHeatSetpoint']
-
-        _LOGGER.debug("min_temp(%s) = %s", self._id, _temp)
-        return _temp
+        return self._snap.min_temp
 
     @property
     def max_temp(self):
         """Return the maximum setpoint (target temp) of the Heating zone.  
         Setpoints are 5-35C by default, but zones can be further limited."""
-# Only applies to Heating zones (SUPPORT_TARGET_TEMPERATURE), not DHW
-        if self._obj.zone_type == 'domesticHotWater':
-            _temp = None
-        else:
-            _temp = self._install[_SETPOINT_CAPABILITIES]['maxHeatSetpoint']
-
-        _LOGGER.debug("max_temp(%s) = %s", self._id, _temp)
-        return _temp
+        return self._snap.max_temp
 
     @property
     def target_temperature_step(self):
@@ -1126,15 +3406,7 @@ class evoSlaveEntity(evoEntity):
     @property
     def precision(self):
         """Return the temperature precision to use in the frontend UI."""
-        if self._obj.zone_type == 'domesticHotWater':
-            _precision = PRECISION_WHOLE  # Honeywell has (e.g.) 62C, not 62.0C
-        elif self._config[CONF_HIGH_PRECISION]:
-            _precision = PRECISION_TENTHS
-        else:
-            _precision = PRECISION_HALVES
-
-        _LOGGER.debug("precision(%s) = %s", self._id, _precision)
-        return _precision
+        return self._snap.precision
 
     @property
     def assumed_state(self) -> bool:
@@ -1193,75 +3465,28 @@ class evoZone(evoSlaveEntity, ClimateDevice):
             _temp
         )
 
+    def _publishHeuristics(self, **setpoint_status):
+        """Publish a copy of the status, with this zone's setpoint changed."""
+        _tcs = self._store.copy()
+        _returnZoneIndex(_tcs)[self._id][_SETPOINT_STATUS].update(setpoint_status)
+        self._store.publish(_tcs)
+
+    def _buildSnapshot(self):
+        _snapshot = evoZoneSnapshot(
+            self._status, self._install,
+            self._store.tcs, self._config
+        )
+        if _snapshot.current_temperature is None:
+            _LOGGER.warn("current_temperature(%s) - unavailable", self._id)
+        return _snapshot
+
     @property
     def state(self):
         """Return the zone's current state (usually, its operation mode).
 
         A zone's state is usually its operation mode, but they may enter
         OpenWindowMode autonomously."""
-
-        _state = None
-
-        _cont_opmode = self.hass.data[DATA_EVOHOME]['status'] \
-            ['systemModeStatus']['mode']
-
-            
-# 1: Basic heuristics...
-        if self._config[CONF_USE_HEURISTICS]:
-            if _cont_opmode == EVO_AWAY:    _state = EVO_AWAY      #(& target_temp = 10)
-            if _cont_opmode == EVO_HEATOFF: _state = EVO_FROSTMODE #(& target_temp = 5)
-
-            _LOGGER.warn("state(Zone=%s) = %s (using heuristics)", self._id, _state)
-
-        _LOGGER.debug("%s._status[%s][%s] = %s", self._id, _SETPOINT_STATUS, _TARGET_TEMPERATURE, self._status)
-
-        _zone_target = self._status[_SETPOINT_STATUS][_TARGET_TEMPERATURE]
-        _zone_opmode = self._status[_SETPOINT_STATUS]['setpointMode']
-
-        
-# 2: Heuristics for OpenWindow mode...
-        if _zone_target == 5 and _state is None:
-### TBA do I need to check if zone is in 'FollowSchedule' mode
-            if _cont_opmode == EVO_HEATOFF:
-                _state = EVO_FROSTMODE
-            else:
-#               if _zone_opmode == EVO_FOLLOW:
-#                   if sched_temp = 5:
-#                       _state = _zone_opmode
-                _state = EVO_OPENWINDOW
-
-            _LOGGER.debug("state(Zone=%s) = %s (latest actual)", self._id, _state)
-
-                
-# 3: If we haven't yet figured out the zone's state, then it must be one of:
-        if _state is None:
-            if _zone_opmode == EVO_FOLLOW:
-                if _cont_opmode == EVO_RESET:
-                    _state = EVO_AUTO
-                elif _cont_opmode == EVO_HEATOFF:
-                    _state = EVO_FROSTMODE
-                else:
-                    _state = _cont_opmode
-            else:
-                _state = _zone_opmode
-
-            _LOGGER.debug("state(Zone=%s) = %s (latest actual)", self._id, _state)
-
-
-# 4: Otherwise, the Zone's state is equal to as it's current operating mode
-        if _state is None:
-            _state = _zone_opmode
-            _LOGGER.debug("state(Zone=%s) = %s (latest actual)", self._id, _state)
-
-        _LOGGER.debug(
-            "state(Zone=%s) = %s [setpoint=%s, opmode=%s, cont_opmode=%s]",
-            self._id + " [" + self.name + "]",
-            _state,
-            _zone_target,
-            _zone_opmode,
-            _cont_opmode,
-        )
-        return _state
+        return self._snap.state
 
     @property
     def xstate_attributes(self):
@@ -1310,40 +3535,14 @@ class evoZone(evoSlaveEntity, ClimateDevice):
     @property
     def target_temperature(self):
         """Return the temperature we try to reach."""
+        return self._snap.target_temperature
 
-        _temp = None
-
-        if self._config[CONF_USE_HEURISTICS]:
-        # get the system's current operating mode
-            _cont_opmode = self.hass.data[DATA_EVOHOME]['status'] \
-            ['systemModeStatus']['mode']
-
-            if _cont_opmode == EVO_HEATOFF:
-                _temp = 5
-            elif _cont_opmode == EVO_AWAY:
-                _temp = 10
-
-            _LOGGER.debug(
-                "target_temperature(Zone=%s) = %s (using heuristics)",
-                self._id + " [" + self.name + "]",
-                _temp
-            )
-
-        if _temp is None:
-            _temp = self._status[_SETPOINT_STATUS][_TARGET_TEMPERATURE]
-
-            _LOGGER.debug(
-                "target_temperature(Zone=%s) = %s (latest actual)",
-                self._id + " [" + self.name + "]",
-                _temp
-            )
 
-        return _temp
-
-
-    def set_operation_mode(self, operation_mode, setpoint=None, until=None):
+    async def async_set_operation_mode(self, operation_mode, setpoint=None, until=None):
 #   def set_operation_mode(self: ClimateDevice, operation: str, setpoint=None, until=None) -> None:
-        """Set the operating mode for the zone."""
+        """Set the operating mode for the zone.
+
+        This method must be run in the event loop."""
         _LOGGER.debug(
             "set_operation_mode(Zone=%s, OpMode=%s, SetPoint=%s, Until=%s)",
             self._id + " [" + self.name + "]",
@@ -1363,8 +3562,11 @@ class evoZone(evoSlaveEntity, ClimateDevice):
 
         if operation_mode == EVO_FOLLOW:
             _LOGGER.debug("Calling v2 API [? request(s)]: zone.cancel_temp_override()...",)
-            self._obj.cancel_temp_override(self._obj)
-            setpoint = self._getZoneSchedTemp(self._status['zoneId'], datetime.now())  ## Throws: KeyError: ("zone '", '3449703', "' not in dataSource")
+            await self._api.async_cancel_temp_override(self._id)
+            setpoint = self._getZoneSchedTemp(self._id, _CLOCK.now()) \
+                if self._config[CONF_USE_SCHEDULES] else None
+            if setpoint is None:  # e.g. the schedule is pending
+                setpoint = self._status[_SETPOINT_STATUS][_TARGET_TEMPERATURE]
 
         else:
             if setpoint is None:
@@ -1372,19 +3574,26 @@ class evoZone(evoSlaveEntity, ClimateDevice):
 
         if operation_mode == EVO_PERMOVER:
             _LOGGER.debug("Calling v2 API [? request(s)]: zone.set_temperature(%s)...", setpoint)
-            self._obj.set_temperature(setpoint)  ## override target temp indefinitely
+            await self._api.async_set_temperature(self._id, setpoint)  ## override target temp indefinitely
 
 # TBA this code is wrong ...
         if operation_mode == EVO_TEMPOVER:
             if until == None:
 # UTC_OFFSET_TIMEDELTA = datetime.now() - datetime.utcnow()
-                until = datetime.now() + timedelta(1/24) ## use .utcnow() or .now() ??
+                until = _CLOCK.now() + timedelta(1/24) ## use .utcnow() or .now() ??
             _LOGGER.debug("Calling v2 API [? request(s)]: zone.set_temperature(%s, %s)...", setpoint, until)
-            zone.set_temperature(setpoint, until)  ## override target temp (for a hour)
+            await self._api.async_set_temperature(self._id, setpoint, until)  ## override target temp (for a hour)
 
         _LOGGER.debug("Action completed, updating internal state data...")
-        self._status[_SETPOINT_STATUS]['setpointMode'] = operation_mode
-        self._status[_SETPOINT_STATUS][_TARGET_TEMPERATURE] = setpoint
+        self._publishHeuristics(
+            setpointMode = operation_mode, **{_TARGET_TEMPERATURE: setpoint}
+        )
+
+        _startConvergencePolling(
+            self.hass, self._data, self._id,
+            lambda data: self._status[_SETPOINT_STATUS] \
+                ['setpointMode'] == operation_mode
+        )
 
         _LOGGER.debug(" - calling: controller.schedule_update_ha_state()")
         self.async_schedule_update_ha_state(force_refresh=False)
@@ -1392,8 +3601,10 @@ class evoZone(evoSlaveEntity, ClimateDevice):
         return True
 
 
-    def set_temperature(self, **kwargs):
-        """Set a target temperature (setpoint) for the zone."""
+    async def async_set_temperature(self, **kwargs):
+        """Set a target temperature (setpoint) for the zone.
+
+        This method must be run in the event loop."""
         _LOGGER.debug(
             "set_temperature(Zone=%s, **kwargs)",
             self._id + " [" + self.name + "]"
@@ -1408,7 +3619,7 @@ class evoZone(evoSlaveEntity, ClimateDevice):
 #           _LOGGER.error("set_temperature(temperature=%s) is None!", _temperature)
             return False
 
-        _zone = self._config
+        _zone = self._install
 
         _max_temp = _zone[_SETPOINT_CAPABILITIES]['maxHeatSetpoint']
         if _temperature > _max_temp:
@@ -1432,17 +3643,20 @@ class evoZone(evoSlaveEntity, ClimateDevice):
 #       _until = None  ## TBA
         _LOGGER.debug("Calling API: zone.set_temperature(temp=%s, until=%s)...", _temperature, _until)
 
-        self._obj.set_temperature(_temperature, _until)
+        await self._api.async_set_temperature(self._id, _temperature, _until)
+
+        _startConvergencePolling(
+            self.hass, self._data, self._id,
+            lambda data: self._status[_SETPOINT_STATUS] \
+                [_TARGET_TEMPERATURE] == _temperature
+        )
 
 # TBA: first update hass.data[DOMAIN]...
         if self._config[CONF_USE_HEURISTICS]:
-            for zone in self._status['zones']:
-                if zone['zoneId'] == self._id:
-                    zone[_SETPOINT_STATUS][_TARGET_TEMPERATURE] = _temperature
-                    if _until is None:
-                        zone[_SETPOINT_STATUS]['setpointMode'] = "PermanentOverride"
-                    else:
-                        zone[_SETPOINT_STATUS]['setpointMode'] = "TemporaryOverride"
+            self._publishHeuristics(
+                setpointMode = EVO_PERMOVER if _until is None else EVO_TEMPOVER,
+                **{_TARGET_TEMPERATURE: _temperature}
+            )
 
 # then tell HA that things have changed...
 #       self.schedule_update_ha_state()
@@ -1453,37 +3667,24 @@ class evoZone(evoSlaveEntity, ClimateDevice):
 class evoDhwEntity(evoSlaveEntity):
     """Base for a Honeywell evohome DHW zone (aka DHW)."""
 
+    def _buildSnapshot(self):
+        _snapshot = evoDhwSnapshot(
+            self._status, self._store.tcs, self._config
+        )
+        if _snapshot.current_temperature is None:
+            _LOGGER.warn("current_temperature(%s) - unavailable", self._id)
+        return _snapshot
+
     @property
     def _get_state(self):
-        """Return the reported state of the DHW..
-        
-        Is asyncio friendly."""
-
-        _state = None
-
-        if self._config[CONF_USE_HEURISTICS]:
-            _cont_opmode = self.hass.data[DATA_EVOHOME]['status'] \
-                ['systemModeStatus']['mode']
-
-            if _cont_opmode == EVO_AWAY:
-                _state = DHW_STATES[STATE_OFF]
-                _LOGGER.debug("_get_state(DHW=%s), state is %s (using heuristics)", self._id, _state)
-
-# if we haven't yet figured out the DHW's state as yet, then:
-        if _state is None:
-            _state = self._status['stateStatus']['state']
-
-            if self.assumed_state:
-                _LOGGER.debug("_get_state(DHW=%s), state is %s (assumed)", self._id, _state)
-            else:
-                _LOGGER.debug("_get_state(DHW=%s), state is %s (latest actual)", self._id, _state)
+        """Return the reported state of the DHW (i.e. 'On' or 'Off')."""
+        return self._snap.dhw_state
 
-        _LOGGER.debug("_get_state(DHW=%s) = %s", self._id, _state)
-        return _state
 
+    async def _async_set_state(self, _state, _mode=None, _until=None) -> None:
+        """Turn DHW on/off for an hour, until next setpoint, or indefinitely.
 
-    def _set_state(self, _state, _mode=None, _until=None) -> None:
-        """Turn DHW on/off for an hour, until next setpoint, or indefinitely."""
+        This method must be run in the event loop."""
 
         if _state is None:
             _state = self.state
@@ -1495,16 +3696,30 @@ class evoDhwEntity(evoSlaveEntity):
             _until = None
         else:
             if _until is None:
-                _until = datetime.now() + timedelta(hours=1)
+                _until = _CLOCK.now() + timedelta(hours=1)
                 
             _until =_until.strftime('%Y-%m-%dT%H:%M:%SZ')
 
         _data =  {'State':_state, 'Mode':_mode, 'UntilTime':_until}
         
         _LOGGER.debug("Calling v2 API [1 request(s)]: dhw._set_dhw(%s)...", _data)
-        self._obj._set_dhw(_data)
+        await self._api.async_set_dhw(self._id, _data)
 
-        self._status['stateStatus']['state'] = _state
+# FollowSchedule has no state (''), so converge on its mode instead
+        if _state:
+            _converged = lambda data: \
+                self._status['stateStatus']['state'] == _state
+        else:
+            _converged = lambda data: \
+                self._status['stateStatus']['mode'] == _mode
+
+        _startConvergencePolling(
+            self.hass, self._data, self._id, _converged
+        )
+
+        _tcs = self._store.copy()
+        _returnZoneIndex(_tcs)[self._id]['stateStatus']['state'] = _state
+        self._store.publish(_tcs)
         self._assumed_state = True
         self.async_schedule_update_ha_state(force_refresh=False)
 
@@ -1535,18 +3750,13 @@ class evoDhwEntity(evoSlaveEntity):
     @property
     def state(self) -> str:
         """Return the state."""
-        _state = STATE_ON if self._get_state == DHW_STATES[STATE_ON] \
-            else STATE_OFF
-
-        _LOGGER.debug("state(DHW=%s) = %s",
-            self._id + " [" + self.name + "]", 
-            _state
-        )
-        return _state
+        return self._snap.state
      
      
-    def set_operation_mode(self, operation_mode):
-        """Set new operation mode."""
+    async def async_set_operation_mode(self, operation_mode):
+        """Set new operation mode.
+
+        This method must be run in the event loop."""
         if operation_mode == EVO_FOLLOW:
             _state = ''
         else:
@@ -1555,12 +3765,11 @@ class evoDhwEntity(evoSlaveEntity):
         _mode = operation_mode
 
         if operation_mode == EVO_TEMPOVER:
-            _until = datetime.now() + timedelta(hours=1)
-            _until =_until.strftime('%Y-%m-%dT%H:%M:%SZ')
+            _until = _CLOCK.now() + timedelta(hours=1)
         else:
             _until = None
 
-        self._set_state(_state, _mode, _until)
+        await self._async_set_state(_state, _mode, _until)
 
         _LOGGER.debug(
             "set_operation_mode(DHWt=%s, %s, %s, %s)", 
@@ -1662,19 +3871,277 @@ class evoDhwSwitch(evoDhwEntity, ToggleEntity):
         return _is_on
 
         
-    def turn_on(self, **kwargs) -> None:
+    async def async_turn_on(self, **kwargs) -> None:
         """Turn DHW on for an hour, until next setpoint, or indefinitely."""
 # TBD: Configure how long to turn on/off for...
-        self._set_state(_state = DHW_STATES[STATE_ON], **kwargs)
+        await self._async_set_state(_state = DHW_STATES[STATE_ON], **kwargs)
         _LOGGER.debug("turn_on(DHWs=%s)", self._id)
         return None
 
         
-    def turn_off(self, **kwargs) -> None:
+    async def async_turn_off(self, **kwargs) -> None:
         """Turn DHW off for an hour, until next setpoint, or indefinitely."""
 # TBD: Configure how long to turn on/off for...
-        self._set_state(_state = DHW_STATES[STATE_OFF], **kwargs)
+        await self._async_set_state(_state = DHW_STATES[STATE_OFF], **kwargs)
         _LOGGER.debug("turn_off(DHWs=%s)", self._id)
         return None
 
 
+
+
+
+class evoBudgetSensor(Entity):
+    """A sensor of the number of requests left in the (hourly) API budget."""
+
+    def __init__(self, hass, domain_data):
+        """Initialize the sensor (of an account's budget)."""
+        self.hass = hass
+        self._account = domain_data['account']
+        self._budget = domain_data['budget']
+
+        _LOGGER.debug("__init__(budget=%s)", self._budget.budget)
+        return None  # __init__() should return None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return 'evohome API budget' + _returnAccountSuffix(self._account)
+
+    @property
+    def icon(self):
+        """Return the icon to use in the frontend UI."""
+        return 'mdi:speedometer'
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement of the sensor."""
+        return 'requests'
+
+    @property
+    def state(self):
+        """Return the number of requests left in the budget (this hour)."""
+        return self._budget.remaining
+
+    @property
+    def device_state_attributes(self):
+        """Return the size of the budget, and how it has been used."""
+        return {
+            'budget': self._budget.budget,
+            'used': self._budget.used,
+            'deferred': self._budget.deferred,
+        }
+
+    @property
+    def should_poll(self):
+        """Return True, as the budget is polled (it's local, so no I/O)."""
+        return True
+
+
+
+class evoLatencySensor(Entity):
+    """A sensor of how long the latest poll of an account took."""
+
+    def __init__(self, hass, domain_data):
+        """Initialize the sensor (of an account's polls)."""
+        self.hass = hass
+        self._data = domain_data
+
+        return None  # __init__() should return None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return 'evohome poll latency' \
+            + _returnAccountSuffix(self._data['account'])
+
+    @property
+    def icon(self):
+        """Return the icon to use in the frontend UI."""
+        return 'mdi:timer'
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement of the sensor."""
+        return 'ms'
+
+    @property
+    def state(self):
+        """Return how long the latest poll took (v2 status and v1 temps)."""
+        return int(self._data.get('pollLatency', 0) * 1000)
+
+    @property
+    def device_state_attributes(self):
+        """Return when the account was last polled, and how often."""
+        return {
+            'polls': self._data.get('pollCount', 0),
+            'last_polled': self._data.get('stateRefreshed'),
+            'poll_interval': self._data.get('pollInterval'),
+        }
+
+    @property
+    def should_poll(self):
+        """Return True, as the latency is polled (it's local, so no I/O)."""
+        return True
+
+
+
+class evoApiSensor(Entity):
+    """A sensor of the requests of an endpoint of the web API (e.g. status), of
+    an account: its state is their median latency (of the recent requests)."""
+
+    def __init__(self, hass, domain_data, endpoint):
+        """Initialize the sensor (of an account's endpoint)."""
+        self.hass = hass
+        self._account = domain_data['account']
+        self._metrics = domain_data['apiClient'].metrics
+        self._endpoint = endpoint
+
+        return None  # __init__() should return None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return 'evohome API %s' % self._endpoint.replace('_', ' ') \
+            + _returnAccountSuffix(self._account)
+
+    @property
+    def icon(self):
+        """Return the icon to use in the frontend UI."""
+        return 'mdi:cloud-sync'
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement of the sensor."""
+        return 'ms'
+
+    @property
+    def state(self):
+        """Return the median latency of the recent requests (if any)."""
+        _recent = sorted(self._metrics.endpoint(self._endpoint)['recent'])
+        if not _recent:
+            return None
+        return int(_recent[len(_recent) // 2] * 1000)
+
+    @property
+    def device_state_attributes(self):
+        """Return the counts of the requests (by status), and their retries,
+        bytes and latencies."""
+        _metrics = self._metrics.endpoint(self._endpoint)
+        _recent = sorted(_metrics['recent'])
+        _requests = sum(_metrics['statuses'].values())
+
+        return {
+            'requests': _requests,
+            'statuses': {
+                str(_status): _count
+                    for _status, _count in _metrics['statuses'].items()
+            },
+            'errors': sum(
+                _count for _status, _count in _metrics['statuses'].items()
+                    if not isinstance(_status, int) or _status >= 400
+            ),
+            'retries': _metrics['retries'],
+            'bytes': _metrics['bytes'],
+            'mean_ms': int(_metrics['latency'] / _requests * 1000) \
+                if _requests else None,
+            'p90_ms': int(_recent[int(len(_recent) * 0.9)] * 1000) \
+                if _recent else None,
+        }
+
+    @property
+    def should_poll(self):
+        """Return True, as the metrics are polled (they're local, so no I/O)."""
+        return True
+
+
+
+class evoMetricsView(HomeAssistantView):
+    """The metrics of the web API (of every account), as a Prometheus export,
+    see _returnPrometheusText()."""
+
+    url = _API_METRICS_URL
+    name = 'api:evohome:metrics'
+
+    async def get(self, request):
+        """Return the metrics, in Prometheus' text format."""
+        hass = request.app['hass']
+
+        return web.Response(
+            body=_returnPrometheusText(
+                hass.data[DATA_EVOHOME]['fleet'].values()
+            ),
+            content_type=CONTENT_TYPE_TEXT_PLAIN,
+        )
+
+
+def _returnPrometheusText(fleet):
+    """Return the metrics of the web API (see evoApiMetrics), and the budgets,
+    of every account (fleet is a list of domain_data), in Prometheus' text
+    format.  Accounts are labelled by their index, not their username."""
+    _requests, _latency, _bytes, _retries, _remaining, _used = \
+        [], [], [], [], [], []
+
+    for domain_data in sorted(fleet, key=lambda data: data['account']):
+        _account = domain_data['account']
+        _remaining.append('evohome_api_budget_remaining{account="%s"} %s' % (
+            _account, domain_data['budget'].remaining
+        ))
+        _used.append('evohome_api_budget_used{account="%s"} %s' % (
+            _account, domain_data['budget'].used
+        ))
+
+        _endpoints = domain_data['apiClient'].metrics.endpoints
+        for _endpoint, _metrics in sorted(_endpoints.items()):
+            _labels = 'account="%s",endpoint="%s"' % (_account, _endpoint)
+            _count = sum(_metrics['statuses'].values())
+
+            for _status, _value in sorted(_metrics['statuses'].items(), key=str):
+                _requests.append('evohome_api_requests_total{%s,status="%s"} %s'
+                    % (_labels, _status, _value))
+
+            _cumulative = 0
+            for _bound, _value in zip(_METRICS_BUCKETS, _metrics['buckets']):
+                _cumulative += _value
+                _latency.append(
+                    'evohome_api_request_duration_seconds_bucket{%s,le="%s"} %s'
+                    % (_labels, _bound, _cumulative))
+            _latency.append(
+                'evohome_api_request_duration_seconds_bucket{%s,le="+Inf"} %s'
+                % (_labels, _count))
+            _latency.append('evohome_api_request_duration_seconds_sum{%s} %s'
+                % (_labels, _metrics['latency']))
+            _latency.append('evohome_api_request_duration_seconds_count{%s} %s'
+                % (_labels, _count))
+
+            _bytes.append('evohome_api_response_bytes_total{%s} %s'
+                % (_labels, _metrics['bytes']))
+            _retries.append('evohome_api_retries_total{%s} %s'
+                % (_labels, _metrics['retries']))
+
+    _text = []
+    for _name, _type, _help, _lines in [
+        ('evohome_api_requests_total', 'counter',
+            "Requests of the web API, by endpoint and HTTP status (or error).",
+            _requests),
+        ('evohome_api_request_duration_seconds', 'histogram',
+            "Latency of the requests of the web API, by endpoint.", _latency),
+        ('evohome_api_response_bytes_total', 'counter',
+            "Bytes received from the web API, by endpoint.", _bytes),
+        ('evohome_api_retries_total', 'counter',
+            "Requests of the web API that follow a failed one, by endpoint.",
+            _retries),
+        ('evohome_api_budget_remaining', 'gauge',
+            "Requests left in the API budget (this hour).", _remaining),
+        ('evohome_api_budget_used', 'gauge',
+            "Requests of the API budget used (this hour).", _used),
+    ]:
+        _text.append('# HELP %s %s' % (_name, _help))
+        _text.append('# TYPE %s %s' % (_name, _type))
+        _text.extend(_lines)
+
+    return '\n'.join(_text) + '\n'
+
+
+def _returnAccountSuffix(idx):
+    """Return the suffix of an account's sensors' names (none for the first)."""
+    return '' if idx == 0 else ' %s' % (idx + 1)
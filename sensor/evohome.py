@@ -0,0 +1,38 @@
+"""
+Support for Honeywell Evohome (EU): sensors of the component itself.
+"""
+
+from custom_components.evohome import (
+    evoApiSensor,
+    evoBudgetSensor,
+    evoLatencySensor,
+
+    DATA_EVOHOME,
+    _API_ENDPOINTS,
+)
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def setup_platform(hass, config, add_devices, discovery_info=None):
+    """Set up the sensors of a Honeywell evohome CH/DHW system."""
+
+    _LOGGER.debug("Started: setup_platform()")
+
+# The API budget is shared by all of the component's requests of the web API,
+# but each account (there's more than one in fleet mode) has its own budget
+    sensors = []
+    for domain_data in hass.data[DATA_EVOHOME]['fleet'].values():
+        sensors.append(evoBudgetSensor(hass, domain_data))
+        sensors.append(evoLatencySensor(hass, domain_data))
+
+# ...as are its requests, which are measured by endpoint (e.g. status, write)
+        for endpoint in _API_ENDPOINTS:
+            sensors.append(evoApiSensor(hass, domain_data, endpoint))
+
+    add_devices(sensors, False)
+
+    _LOGGER.debug("Finished: setup_platform()")
+    return True
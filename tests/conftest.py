@@ -0,0 +1,47 @@
+"""Fixtures of the unit tests.
+
+The component is imported as HA would (i.e. as custom_components.evohome), so
+HA must be installed: the tests that need it skip themselves if it isn't."""
+
+import asyncio
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'custom_components' not in sys.modules:
+    _package = types.ModuleType('custom_components')
+    _package.__path__ = [ROOT]
+    sys.modules['custom_components'] = _package
+
+
+@pytest.fixture
+def evohome():
+    """Return the component (skip, if HA isn't installed)."""
+    pytest.importorskip('homeassistant')
+
+    import custom_components.evohome
+    return custom_components.evohome
+
+
+@pytest.fixture
+def payloads():
+    """Return the (synthetic) payloads of the offline tools, i.e. their
+    fixtures module."""
+    _tools = os.path.join(ROOT, 'tools')
+    if _tools not in sys.path:
+        sys.path.insert(0, _tools)
+
+    import fixtures
+    return fixtures
+
+
+@pytest.fixture
+def loop():
+    """Return an event loop (closed after the test)."""
+    _loop = asyncio.new_event_loop()
+    yield _loop
+    _loop.close()
@@ -0,0 +1,35 @@
+"""A scripted transport (of evoApiClient), for the unit tests."""
+
+import aiohttp
+from yarl import URL
+
+
+class evoScriptTransport(object):
+    """A transport that responds to each request from a script, by the end of
+    its url (an exception in the script is raised, rather than returned)."""
+
+    def __init__(self, script):
+        self.script = script
+        self.requests = []
+
+    async def async_request(self, client, method, url, **kwargs):
+        self.requests.append(url)
+
+        for _suffix, _responses in self.script.items():
+            if url.endswith(_suffix):
+                _response = _responses.pop(0)
+                break
+        else:
+            raise AssertionError("unscripted request: %s" % url)
+
+        if isinstance(_response, Exception):
+            raise _response
+        return _response
+
+
+def returnError(status, headers=None):
+    """Return the error raised for a 4xx/5xx response."""
+    return aiohttp.ClientResponseError(
+        aiohttp.RequestInfo(URL('http://localhost/'), 'GET', {}), (),
+        status=status, headers=headers,
+    )
@@ -0,0 +1,71 @@
+"""Tests of the budget of requests of the web API."""
+
+import pytest
+
+
+class evoFakeClock(object):
+    """A clock that only moves when the test moves it."""
+
+    def __init__(self):
+        self.time = 0
+
+    def monotonic(self):
+        return self.time
+
+
+@pytest.fixture
+def clock(evohome, monkeypatch):
+    _clock = evoFakeClock()
+    monkeypatch.setattr(evohome, '_CLOCK', _clock)
+    return _clock
+
+
+def _spendBudget(evohome, budget, count):
+    for _ in range(count):
+        budget.acquire(evohome._PRIORITY_WRITE)
+
+
+@pytest.mark.parametrize('priority, allowed', [
+    ('_PRIORITY_STATUS', 95), ('_PRIORITY_V1_TEMPS', 80),
+    ('_PRIORITY_SCHEDULE', 60),
+])
+def test_reserve_by_priority(evohome, clock, priority, allowed):
+    """A request is deferred once it would eat into its priority's reserve."""
+    budget = evohome.evoRequestBudget(100)
+    priority = getattr(evohome, priority)
+
+    for _ in range(allowed):
+        budget.acquire(priority)
+
+    with pytest.raises(evohome.evoBudgetExceeded):
+        budget.acquire(priority)
+
+    assert (budget.used, budget.deferred) == (allowed, 1)
+
+
+def test_writes_never_deferred(evohome, clock):
+    """Writes are counted, but are made even when the budget is spent."""
+    budget = evohome.evoRequestBudget(100)
+    _spendBudget(evohome, budget, 120)
+
+    with pytest.raises(evohome.evoBudgetExceeded):
+        budget.acquire(evohome._PRIORITY_STATUS)
+
+    assert (budget.used, budget.remaining, budget.deferred) == (120, 0, 1)
+
+
+def test_budget_window_slides(evohome, clock):
+    """Requests older than the window no longer count against the budget."""
+    budget = evohome.evoRequestBudget(100)
+    _spendBudget(evohome, budget, 50)
+
+    clock.time = 1800
+    budget.record(50)
+    assert budget.remaining == 0
+
+    clock.time = evohome._BUDGET_WINDOW_SECONDS + 1
+    assert (budget.used, budget.remaining) == (50, 50)
+    budget.acquire(evohome._PRIORITY_SCHEDULE)
+
+    clock.time = 1800 + evohome._BUDGET_WINDOW_SECONDS + 1
+    assert (budget.used, budget.requests) == (1, 101)
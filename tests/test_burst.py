@@ -0,0 +1,126 @@
+"""Tests of the polling burst (after a write), and of backing off polling."""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from scripted import returnError
+
+
+class evoFakeHass(object):
+    """Just enough of hass for a polling burst: its timers are kept, rather
+    than run, so that the test can fire them."""
+
+    def __init__(self):
+        self.timers = []
+        self.helpers = SimpleNamespace(event=SimpleNamespace(
+            async_call_later=self._async_call_later
+        ))
+
+    def _async_call_later(self, delay, action):
+        self.timers.append(action)
+        return lambda: self.timers.remove(action)
+
+
+def _returnDomainData(evohome):
+    return {
+        'config': {evohome.CONF_SCAN_INTERVAL: 300},
+        'pollInterval': 300,
+        'budget': evohome.evoRequestBudget(1000),
+    }
+
+
+@pytest.mark.parametrize('error', [
+    asyncio.TimeoutError(), returnError(503), RuntimeError('a bug'),
+])
+def test_failed_burst_is_abandoned(evohome, loop, monkeypatch, error):
+    """However a poll of the burst fails, nothing is left pending."""
+    async def _async_update(domain_data):
+        raise error
+    monkeypatch.setattr(evohome, '_asyncUpdateStateData', _async_update)
+
+    hass, domain_data = evoFakeHass(), _returnDomainData(evohome)
+    evohome._startConvergencePolling(hass, domain_data, '2', lambda d: False)
+
+    try:
+        loop.run_until_complete(hass.timers.pop()(None))
+    except RuntimeError:
+        pass
+
+    assert domain_data['burst']['pending'] == {}
+    assert hass.timers == []
+
+
+def test_rate_limited_burst_backs_off(evohome, loop, monkeypatch):
+    """A 429 during the burst backs off polling, as for any other poll."""
+    async def _async_update(domain_data):
+        raise returnError(429)
+    monkeypatch.setattr(evohome, '_asyncUpdateStateData', _async_update)
+
+    hass, domain_data = evoFakeHass(), _returnDomainData(evohome)
+    evohome._startConvergencePolling(hass, domain_data, '2', lambda d: False)
+    loop.run_until_complete(hass.timers.pop()(None))
+
+    assert domain_data['pollInterval'] == 600
+    assert domain_data['burst']['pending'] == {}
+
+
+def test_burst_until_converged(evohome, loop, monkeypatch):
+    """The burst polls again until the write has converged, then stops."""
+    polls = []
+
+    async def _async_update(domain_data):
+        polls.append(domain_data)
+    monkeypatch.setattr(evohome, '_asyncUpdateStateData', _async_update)
+    monkeypatch.setattr(evohome, '_dispatchChanges', lambda *args: None)
+
+    hass, domain_data = evoFakeHass(), _returnDomainData(evohome)
+    evohome._startConvergencePolling(
+        hass, domain_data, '2', lambda d: len(polls) == 2
+    )
+
+    loop.run_until_complete(hass.timers.pop()(None))
+    assert domain_data['burst']['pending'] != {}
+
+    loop.run_until_complete(hass.timers.pop()(None))
+    assert domain_data['burst']['pending'] == {}
+    assert hass.timers == []
+
+
+class evoFakeClock(object):
+    """A clock that is stopped, at an arbitrary time."""
+
+    def now(self):
+        return datetime(2018, 11, 5, 12, 0)
+
+
+@pytest.mark.parametrize('interval, expected', [
+    (300, 600), (600, 1200), (1200, 1800), (1800, 1800),
+])
+def test_backoff_doubles_until_capped(evohome, monkeypatch, interval,
+                                      expected):
+    """Each consecutive failure doubles the interval, up to a maximum."""
+    monkeypatch.setattr(evohome, '_CLOCK', evoFakeClock())
+    domain_data = _returnDomainData(evohome)
+    domain_data['pollInterval'] = interval
+
+    evohome._backoffPolling(domain_data, returnError(429))
+
+    assert domain_data['pollInterval'] == expected
+    _delay = (domain_data['stateExpires'] - evoFakeClock().now()).seconds
+    assert expected <= _delay <= expected * (1 + evohome._BACKOFF_JITTER)
+
+
+def test_backoff_honours_retry_after(evohome, monkeypatch):
+    """A Retry-After (that is longer than the backoff) is waited out."""
+    monkeypatch.setattr(evohome, '_CLOCK', evoFakeClock())
+    domain_data = _returnDomainData(evohome)
+
+    evohome._backoffPolling(
+        domain_data, returnError(429, headers={'Retry-After': '3600'})
+    )
+
+    assert domain_data['pollInterval'] == 600
+    assert domain_data['stateExpires'] == datetime(2018, 11, 5, 13, 0)
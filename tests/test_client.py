@@ -0,0 +1,52 @@
+"""Tests of evoApiClient (its requests are scripted, see scripted.py)."""
+
+import aiohttp
+import pytest
+
+from scripted import evoScriptTransport, returnError
+
+
+_V1_SESSION = {'sessionId': 'session', 'userInfo': {'userID': 100}}
+_V1_LOCATIONS = [{'locationID': 1, 'devices': [{
+    'deviceID': 2, 'name': 'Zone', 'thermostatModelType': 'EMEA_ZONE',
+    'thermostat': {'indoorTemperature': 20.12, 'changeableValues': {
+        'mode': 'Scheduled',
+        'heatSetpoint': {'value': 21.0, 'status': 'Scheduled'}}},
+}]}]
+
+
+def test_v1_temperatures_after_failed_locations(evohome, loop):
+    """A v1 login that works, then a request of the locations that fails, mustn't
+    break the next call (i.e. the session has an expiry)."""
+    transport = evoScriptTransport({
+        '/Session': [_V1_SESSION],
+        '/locations/': [returnError(503), _V1_LOCATIONS],
+    })
+    client = evohome.evoApiClient(None, 'user', 'password', transport=transport)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        loop.run_until_complete(client.async_v1_temperatures())
+
+    assert client.v1_session_expires is not None
+
+    _temps = loop.run_until_complete(client.async_v1_temperatures())
+
+    assert [temp['temp'] for temp in _temps] == [20.12]
+    assert len(transport.requests) == 3  # the session was re-used
+
+
+def test_v1_temperatures_after_rejected_session(evohome, loop):
+    """A v1 session that is rejected (401) is renewed, and the request retried."""
+    transport = evoScriptTransport({
+        '/Session': [_V1_SESSION, _V1_SESSION],
+        '/locations/': [_V1_LOCATIONS, returnError(401), _V1_LOCATIONS],
+    })
+    client = evohome.evoApiClient(None, 'user', 'password', transport=transport)
+
+    loop.run_until_complete(client.async_v1_temperatures())
+    loop.run_until_complete(client.async_v1_temperatures())
+
+    assert [url.rsplit('/', 2)[-2:] for url in transport.requests] == [
+        ['api', 'Session'], ['locations', ''],
+        ['locations', ''], ['api', 'Session'], ['locations', ''],
+    ]
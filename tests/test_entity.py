@@ -0,0 +1,14 @@
+"""Tests of the entities (i.e. of their classes)."""
+
+import pytest
+
+
+def test_snapshot_is_abstract(evohome):
+    """An entity must build its own snapshot (so the bases can't be used)."""
+    for _base in [evohome.evoEntity, evohome.evoSlaveEntity]:
+        with pytest.raises(TypeError, match='_buildSnapshot'):
+            _base(None, None, None)
+
+    for _entity in [evohome.evoController, evohome.evoZone,
+                    evohome.evoDhwSensor, evohome.evoDhwSwitch]:
+        assert not _entity.__abstractmethods__
@@ -0,0 +1,73 @@
+"""Tests of fleet mode (i.e. of more than one account)."""
+
+from types import SimpleNamespace
+
+import pytest
+import voluptuous as vol
+
+
+class evoFakeHass(object):
+    """Just enough of hass to set up a fleet: its timers are kept (not run)."""
+
+    def __init__(self, evohome):
+        self.data = {evohome.DATA_EVOHOME: {'fleet': {}}}
+        self.timers = {}  # by action, True if cancelled
+        self.bus = SimpleNamespace(async_listen_once=lambda *args: None)
+        self.helpers = SimpleNamespace(event=SimpleNamespace(
+            async_call_later=self._async_call_later
+        ))
+
+    def _async_call_later(self, delay, action):
+        self.timers[action] = False
+        return lambda: self.timers.__setitem__(action, True)
+
+
+def _returnConfig(evohome, accounts):
+    return {evohome.DOMAIN: {
+        evohome.CONF_USERNAME: 'user@example.com',
+        evohome.CONF_PASSWORD: 'password',
+        evohome.CONF_ACCOUNTS: accounts,
+    }}
+
+
+def test_duplicate_usernames_rejected(evohome):
+    """Accounts mustn't share a username (even if in a different case)."""
+    evohome.CONFIG_SCHEMA(_returnConfig(evohome, [
+        {evohome.CONF_USERNAME: 'other@example.com',
+         evohome.CONF_PASSWORD: 'password'},
+    ]))
+
+    with pytest.raises(vol.Invalid, match='duplicate username'):
+        evohome.CONFIG_SCHEMA(_returnConfig(evohome, [
+            {evohome.CONF_USERNAME: 'User@Example.com',
+             evohome.CONF_PASSWORD: 'password'},
+        ]))
+
+
+def test_dropped_account_token_refresh(evohome, loop, monkeypatch):
+    """An account that is dropped from the fleet no longer has its OAuth
+    token refreshed."""
+    hass = evoFakeHass(evohome)
+
+    async def _async_connect(hass, domain_data):
+        domain_data['apiClient'] = evohome.evoApiClient(
+            None, 'user%s' % domain_data['account'], 'password'
+        )
+        evohome._scheduleTokenRefresh(hass, domain_data, 3600)
+
+    async def _async_update(domain_data):
+        if domain_data['account'] == 1:
+            raise RuntimeError("setup failed")
+
+    monkeypatch.setattr(evohome, '_asyncConnectClient', _async_connect)
+    monkeypatch.setattr(evohome, '_asyncUpdateStateData', _async_update)
+
+    fleet = [{'account': _idx, 'config': {
+        evohome.CONF_USE_SCHEDULES: False, evohome.CONF_SCAN_INTERVAL: 180,
+    }} for _idx in range(2)]
+
+    loop.run_until_complete(evohome._asyncSetupFleet(hass, fleet))
+    loop.run_until_complete(fleet[0]['websession'].close())
+
+    assert [_data['account'] for _data in fleet] == [0]
+    assert sorted(hass.timers.values()) == [False, True]  # i.e. 1 cancelled
@@ -0,0 +1,68 @@
+"""Tests of polling the status of a location (its requests are scripted)."""
+
+import pytest
+
+from scripted import evoScriptTransport, returnError
+from test_client import _V1_LOCATIONS, _V1_SESSION
+
+
+def _returnStatus():
+    return {'locationId': '1', 'gateways': [{'temperatureControlSystems': [{
+        'systemId': '10', 'zones': [{
+            'zoneId': '2', 'name': 'Zone',
+            'temperatureStatus': {'temperature': 20.0, 'isAvailable': True},
+        }],
+    }]}]}
+
+
+def _returnDomainData(evohome, script):
+    client = evohome.evoApiClient(
+        None, 'user', 'password', transport=evoScriptTransport(script)
+    )
+    client.access_token = 'token'
+    client.location_ids = ['1']
+    return {'apiClient': client, 'config': {}}
+
+
+def test_v1_temperatures_merged(evohome, loop):
+    """The (more precise) v1 temps replace the v2 temps, by zoneId."""
+    domain_data = _returnDomainData(evohome, {
+        '/status': [_returnStatus()],
+        '/Session': [_V1_SESSION],
+        '/locations/': [_V1_LOCATIONS],
+    })
+
+    systems = loop.run_until_complete(
+        evohome._asyncReturnTempsAndModes(domain_data, high_precision=True)
+    )
+
+    assert systems[0]['zones'][0]['temperatureStatus']['temperature'] == 20.12
+
+
+def test_v1_temperatures_failed(evohome, loop):
+    """A v1 api that fails leaves the v2 temps in place."""
+    domain_data = _returnDomainData(evohome, {
+        '/status': [_returnStatus()],
+        '/Session': [_V1_SESSION],
+        '/locations/': [returnError(503)],
+    })
+
+    systems = loop.run_until_complete(
+        evohome._asyncReturnTempsAndModes(domain_data, high_precision=True)
+    )
+
+    assert systems[0]['zones'][0]['temperatureStatus']['temperature'] == 20.0
+
+
+def test_v1_temperatures_bug(evohome, loop):
+    """A programming error (rather than a failed request) isn't swallowed."""
+    domain_data = _returnDomainData(evohome, {
+        '/status': [_returnStatus()],
+        '/Session': [_V1_SESSION],
+        '/locations/': [TypeError('a bug')],
+    })
+
+    with pytest.raises(TypeError, match='a bug'):
+        loop.run_until_complete(
+            evohome._asyncReturnTempsAndModes(domain_data, high_precision=True)
+        )
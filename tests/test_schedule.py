@@ -0,0 +1,245 @@
+"""Tests of the schedules (fetching, storing and compiling them)."""
+
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from scripted import evoScriptTransport, returnError
+
+
+_SCHEDULE = {'dailySchedules': [{
+    'dayOfWeek': _day, 'switchpoints': [
+        {'timeOfDay': '06:30:00', 'heatSetpoint': 21.0},
+        {'timeOfDay': '22:00:00', 'heatSetpoint': 16.0},
+    ]} for _day in ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+                    'Saturday', 'Sunday')]}
+
+
+class evoMemoryStore(object):
+    """A store (of the schedule cache) that is kept in memory."""
+
+    def __init__(self):
+        self.data = None
+
+    async def async_save(self, data):
+        self.data = data
+
+
+def _returnDomainData(evohome, script):
+    client = evohome.evoApiClient(
+        None, 'user', 'password', transport=evoScriptTransport(script)
+    )
+    client.access_token = 'token'
+    return {
+        'apiClient': client,
+        'config': {
+            evohome.CONF_SCHEDULE_RATE: 60,
+            evohome.CONF_SCHEDULE_CONCURRENCY: 2,
+        },
+        'schedule': {},
+        'scheduleStore': evoMemoryStore(),
+    }
+
+
+def test_failed_prefetch_is_retried(evohome, loop):
+    """A schedule that couldn't be fetched is pending (not cached), and is
+    fetched by the next refresh of expired schedules."""
+    domain_data = _returnDomainData(evohome, {
+        '/schedule': [returnError(503), _SCHEDULE],
+    })
+    zones = [('2', 'temperatureZone', 'Zone')]
+
+    assert loop.run_until_complete(
+        evohome._asyncFetchSchedules(domain_data, zones)
+    ) == 0
+    assert domain_data['schedule']['2']['schedule'] is None
+    assert evohome._returnExpiredSchedules(domain_data) == ['2']
+
+    loop.run_until_complete(evohome._asyncRefreshSchedules(domain_data))
+
+    assert domain_data['schedule']['2']['schedule'] is not None
+    assert evohome._returnExpiredSchedules(domain_data) == []
+    assert list(domain_data['scheduleStore'].data) == ['2']
+
+
+def test_pending_schedule_not_cached(evohome, loop):
+    """A schedule that is still pending isn't saved to the cache."""
+    domain_data = _returnDomainData(evohome, {
+        '/schedule': [returnError(503), returnError(503)],
+    })
+    evohome._storePendingSchedule(
+        domain_data, '2', 'temperatureZone', 'Zone'
+    )
+
+    loop.run_until_complete(evohome._asyncRefreshSchedules(domain_data))
+
+    assert domain_data['schedule']['2']['schedule'] is None
+    assert domain_data['scheduleStore'].data == {}
+
+
+def test_bad_schedule_is_retried(evohome, loop):
+    """A schedule that won't compile is pending, but the other zones' are
+    still stored and saved."""
+    _bad = {'dailySchedules': [{'dayOfWeek': 'Monday', 'switchpoints': [
+        {'timeOfDay': 'noon', 'heatSetpoint': 21.0},
+    ]}]}
+    domain_data = _returnDomainData(evohome, {
+        '/2/schedule': [_bad], '/3/schedule': [_SCHEDULE],
+    })
+    for _id in ['2', '3']:
+        evohome._storePendingSchedule(
+            domain_data, _id, 'temperatureZone', 'Zone'
+        )
+
+    loop.run_until_complete(evohome._asyncRefreshSchedules(domain_data))
+
+    assert domain_data['schedule']['2']['schedule'] is None
+    assert evohome._returnExpiredSchedules(domain_data) == ['2']
+    assert list(domain_data['scheduleStore'].data) == ['3']
+
+
+def test_schedule_days_by_name(evohome, loop):
+    """The days of a schedule are placed by their name, not their order."""
+    _sunday = {'dayOfWeek': 'Sunday', 'switchpoints': [
+        {'timeOfDay': '08:00:00', 'heatSetpoint': 19.0},
+    ]}
+    _monday = {'dayOfWeek': 'Monday', 'switchpoints': [
+        {'timeOfDay': '06:00:00', 'heatSetpoint': 21.0},
+    ]}
+    domain_data = _returnDomainData(evohome, {
+        '/schedule': [{'dailySchedules': [_sunday, _monday]}],
+    })
+
+    schedule = evohome.evoWeeklySchedule(loop.run_until_complete(
+        domain_data['apiClient'].async_schedule('temperatureZone', '2')
+    ))
+
+    assert schedule.minutes == [6 * 60, 6 * 1440 + 8 * 60]
+    assert schedule.setpoints == [21.0, 19.0]
+
+
+@pytest.mark.parametrize('key', ['heatSetpoint', 'temperature'])
+def test_schedule_round_trip(evohome, loop, key):
+    """A schedule compiles from async_schedule(), whichever key the api used
+    for its setpoints (async_schedule renames temperature, as evohomeclient2
+    does)."""
+    domain_data = _returnDomainData(evohome, {'/schedule': [
+        {'dailySchedules': [{'dayOfWeek': 'Tuesday', 'switchpoints': [
+            {'timeOfDay': '07:00:00', key: 20.5},
+            {'timeOfDay': '23:00:00', key: 15.0},
+        ]}]},
+    ]})
+
+    schedule = evohome.evoWeeklySchedule(loop.run_until_complete(
+        domain_data['apiClient'].async_schedule('temperatureZone', '2')
+    ))
+
+    assert schedule.minutes == [1440 + 7 * 60, 1440 + 23 * 60]
+    assert schedule.setpoints == [20.5, 15.0]
+
+
+def _returnSchedule(switchpoints):
+    """Return a schedule (as per async_schedule), the same on every day."""
+    return {'DailySchedules': [{
+        'DayOfWeek': _day, 'Switchpoints': [{
+            'TimeOfDay': _time, 'heatSetpoint': _setpoint
+        } for _time, _setpoint in switchpoints],
+    } for _day in range(7)]}
+
+
+def _returnSchedules(evohome):
+    return {
+        '1': evohome.evoWeeklySchedule(_returnSchedule(
+            [('06:30', 21.0), ('22:00', 16.0)])),
+        '2': evohome.evoWeeklySchedule(_returnSchedule(
+            [('00:00', 18.5), ('07:15', 20.0), ('17:45', 22.5)])),
+        '3': evohome.evoWeeklySchedule({'DailySchedules': [{  # only Sunday
+            'DayOfWeek': 'Sunday', 'Switchpoints': [
+                {'TimeOfDay': '09:00', 'heatSetpoint': 19.0},
+                {'TimeOfDay': '21:00', 'heatSetpoint': 15.0}]}]}),
+        'dhw': evohome.evoWeeklySchedule({'DailySchedules': [{
+            'DayOfWeek': 0, 'Switchpoints': [
+                {'TimeOfDay': '06:00', 'DhwState': 'On'}]}]}),
+    }
+
+
+def _returnTimes():
+    _monday = datetime(2018, 11, 5)  # a Monday
+    return [_monday + timedelta(minutes=_mins)
+            for _mins in range(0, 7 * 1440, 97)]
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_schedule_table(evohome, monkeypatch, numpy):
+    """The (batched) table agrees with each zone's own schedule, with or
+    without NumPy (the DHW isn't in the table)."""
+    if numpy:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setitem(sys.modules, 'numpy', None)
+
+    schedules = _returnSchedules(evohome)
+    table = evohome.evoScheduleTable(schedules)
+
+    assert table.zone_ids == ['1', '2', '3']
+
+    for _dt in _returnTimes():
+        assert table.setpoints_at(_dt) == {
+            _id: schedules[_id].setpoint(_dt) for _id in table.zone_ids
+        }
+        assert table.setpoints_at(_dt, offset=-3, day_of_week=5) == {
+            _id: schedules[_id].setpoint(_dt, day_of_week=5) - 3
+                for _id in table.zone_ids
+        }
+
+
+@pytest.mark.parametrize('zone_id, dt, day_of_week, expected', [
+    ('1', datetime(2018, 11, 5, 6, 29), None, 16.0),  # i.e. Sunday's last
+    ('1', datetime(2018, 11, 5, 6, 30), None, 21.0),
+    ('1', datetime(2018, 11, 7, 21, 59), None, 21.0),
+    ('1', datetime(2018, 11, 7, 22, 0), None, 16.0),
+    ('2', datetime(2018, 11, 11, 23, 59), None, 22.5),
+    ('3', datetime(2018, 11, 5, 12, 0), None, 15.0),  # i.e. wraps a week
+    ('3', datetime(2018, 11, 11, 20, 59), None, 19.0),
+    ('3', datetime(2018, 11, 5, 20, 59), 6, 19.0),
+    ('dhw', datetime(2018, 11, 5, 5, 59), None, 'On'),
+    ('dhw', datetime(2018, 11, 8, 12, 0), None, 'On'),
+])
+def test_weekly_schedule(evohome, zone_id, dt, day_of_week, expected):
+    """The setpoint in effect is that of the last switchpoint before it (of
+    the previous week, if need be)."""
+    schedule = _returnSchedules(evohome)[zone_id]
+
+    assert schedule.setpoint(dt, day_of_week=day_of_week) == expected
+
+
+@pytest.mark.parametrize('zone_type', ['temperatureZone', 'domesticHotWater'])
+def test_tools_schedule_compiles(evohome, loop, payloads, zone_type):
+    """The tools' schedules are fetched and compiled as the api's are, and
+    agree with the tools' own idea of what is scheduled."""
+    domain_data = _returnDomainData(evohome, {
+        '/schedule': [payloads.schedule(zone_type)],
+    })
+
+    schedule = evohome.evoWeeklySchedule(loop.run_until_complete(
+        domain_data['apiClient'].async_schedule(zone_type, '2')
+    ))
+
+    for _dt in _returnTimes():
+        assert schedule.setpoint(_dt) == \
+            payloads.scheduled(payloads.schedule(zone_type), _dt)
+
+
+def test_empty_schedule(evohome):
+    """A schedule without switchpoints has no setpoint (rather than raising),
+    and a zone with one has no scheduled setpoint."""
+    schedule = evohome.evoWeeklySchedule({'DailySchedules': [
+        {'DayOfWeek': _day, 'Switchpoints': []} for _day in range(7)
+    ]})
+    entity = SimpleNamespace(_data={'schedule': {'2': {'compiled': schedule}}})
+
+    assert schedule.setpoint(datetime(2018, 11, 5, 12, 0)) is None
+    assert evohome.evoEntity._getZoneSchedTemp(entity, '2') is None
+    assert evohome.evoScheduleTable({'2': schedule}).zone_ids == []
@@ -0,0 +1,94 @@
+"""Tests of sharding (polling accounts from worker processes)."""
+
+import multiprocessing
+from datetime import datetime
+
+
+class evoMemoryStore(object):
+    """A store (of the tokens) that is kept in memory."""
+
+    def __init__(self):
+        self.data = None
+
+    async def async_save(self, data):
+        self.data = data
+
+
+def _returnClient(evohome, access_token, refresh_token):
+    client = evohome.evoApiClient(None, 'user', 'password')
+    client.access_token = access_token
+    client.refresh_token = refresh_token
+    client.access_token_expires = datetime(2018, 11, 5, 12, 0)
+    return client
+
+
+def test_tokens_sent_to_shard(evohome, loop):
+    """When HA's tokens change, its shard is sent them (it never refreshes
+    them itself, as that would revoke HA's refresh token)."""
+    domain_data = {
+        'account': 0,
+        'apiClient': _returnClient(evohome, 'access', 'refresh'),
+        'tokenStore': evoMemoryStore(),
+    }
+    pool = evohome.evoShardPool(None, [domain_data], 1)
+    receiver, pool._senders[0] = multiprocessing.Pipe(duplex=False)
+
+    loop.run_until_complete(evohome._asyncSaveTokens(domain_data))
+
+    shard_client = _returnClient(evohome, 'old access', 'old refresh')
+    evohome._readShardTokens(receiver, {0: shard_client})
+
+    assert shard_client.access_token == 'access'
+    assert shard_client.refresh_token == 'refresh'
+    assert shard_client.access_token_expires == datetime(2018, 11, 5, 12, 0)
+    assert domain_data['shardPool'] is pool
+
+
+def test_hash_ring_moves_few_accounts(evohome):
+    """Accounts keep their shard, and only a few move when a shard is added."""
+    keys = ['account%s' % _idx for _idx in range(1000)]
+    ring, again, bigger = [evohome.evoHashRing(_n) for _n in (4, 4, 5)]
+    before = [ring.shard(_key) for _key in keys]
+    after = [bigger.shard(_key) for _key in keys]
+
+    assert before == [again.shard(_key) for _key in keys]
+    assert set(before) == {0, 1, 2, 3}
+    assert all(_old == _new for _old, _new in zip(before, after)
+               if _new != 4)  # i.e. accounts only move to the new shard
+    assert 100 < after.count(4) < 300  # i.e. about a fifth of them
+
+
+def _returnStatus(mode, zone_temp, dhw_state):
+    return {
+        'systemId': '1',
+        'systemModeStatus': {'mode': mode},
+        'zones': [
+            {'zoneId': '2', 'temperature': zone_temp},
+            {'zoneId': '3', 'temperature': 19.0},
+        ],
+        'dhw': {'dhwId': '4', 'stateStatus': {'state': dhw_state}},
+    }
+
+
+def test_status_delta_round_trip(evohome):
+    """Only what has changed is sent, and applying it rebuilds the status."""
+    previous = {}
+    old = _returnStatus('Auto', 20.0, 'On')
+
+    assert evohome._returnStatusDelta(previous, [old]) == [(
+        '1', {'systemId': '1', 'systemModeStatus': {'mode': 'Auto'}},
+        {'2': old['zones'][0], '3': old['zones'][1], '4': old['dhw']},
+    )]
+    assert evohome._returnStatusDelta(previous, [old]) == []
+
+    new = _returnStatus('Auto', 20.5, 'Off')
+    [(_id, header, zones)] = evohome._returnStatusDelta(previous, [new])
+
+    assert (_id, header, sorted(zones)) == ('1', None, ['2', '4'])
+    assert evohome._applyStatusDelta(old, header, zones) == new
+    assert old == _returnStatus('Auto', 20.0, 'On')  # i.e. not mutated
+
+    new = _returnStatus('HeatingOff', 20.5, 'Off')
+    [(_id, header, zones)] = evohome._returnStatusDelta(previous, [new])
+
+    assert (header['systemModeStatus'], zones) == ({'mode': 'HeatingOff'}, {})
@@ -0,0 +1,37 @@
+"""Tests of the transports (of evoApiClient's requests)."""
+
+import asyncio
+import json
+import logging
+
+
+def test_recording_flushed(evohome, loop, tmp_path):
+    """Every entry of a recording is written, once it's flushed."""
+    path = tmp_path / 'recording.jsonl'
+    transport = evohome.evoRecordingTransport(str(path))
+
+    async def _async_record():
+        for _idx in range(3):
+            transport._save({'time': _idx})
+        await transport.async_flush()
+
+    loop.run_until_complete(_async_record())
+
+    assert [json.loads(_line)['time'] for _line in
+            path.read_text().splitlines()] == [0, 1, 2]
+
+
+def test_recording_failed_write(evohome, loop, tmp_path, caplog):
+    """A write that fails is logged, and doesn't block later writes."""
+    transport = evohome.evoRecordingTransport(str(tmp_path))  # a directory
+
+    async def _async_record():
+        transport._save({'time': 0})
+        while transport._writing:
+            await asyncio.sleep(0.01)
+
+    with caplog.at_level(logging.ERROR):
+        loop.run_until_complete(_async_record())
+
+    assert 'Failed to write the recording' in caplog.text
+    assert transport._writing is False
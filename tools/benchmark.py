@@ -0,0 +1,298 @@
+"""Benchmark one poll cycle of the component, offline (i.e. against fixtures).
+
+A cycle is split into:
+ - merge:  _asyncReturnTempsAndModes(), i.e. decoding the v2 (and v1) JSON,
+           and merging the v1 temps into the v2 status
+ - poll:   _asyncUpdateStateData(), i.e. the above, then publishing the status
+           of each TCS, and noting which zones have changed
+ - fanout: _dispatchChanges(), i.e. each changed entity's update packet, its
+           state & state_attributes, and HA's state machine
+
+For each scenario (of locations x zones x faults), the CPU time of these (per
+cycle), the memory allocated (per cycle), and the cost of reading an entity's
+properties (warm, and after a refresh) are reported.  For example:
+
+    python tools/benchmark.py --zones 12,64 --locations 1,4 --faults 0,4
+
+Results can be saved (--save), and compared against a previous run
+(--baseline), when the exit code is 1 if any scenario has regressed.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import statistics
+import sys
+import timeit
+import tracemalloc
+from time import process_time
+
+import fixtures
+import harness
+
+from harness import evohome
+
+_READS = 1000  # no. of times each property is read, per entity
+
+
+def _returnArgs():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--locations', default='1,4',
+                        help="location counts (comma-separated)")
+    parser.add_argument('--zones', default='12,64',
+                        help="zone counts, per location (comma-separated)")
+    parser.add_argument('--faults', default='0,4',
+                        help="fault counts, per zone (comma-separated)")
+    parser.add_argument('--cycles', type=int, default=50,
+                        help="poll cycles, per scenario")
+    parser.add_argument('--change', type=float, default=0.25,
+                        help="chance of a zone's temp changing, per cycle")
+    parser.add_argument('--no-dhw', action='store_true',
+                        help="don't give each location a DHW zone")
+    parser.add_argument('--low-precision', action='store_true',
+                        help="don't use the v1 api (i.e. high_precision: false)")
+    parser.add_argument('--fixtures',
+                        help="a folder of (recorded) fixtures, instead of "
+                             "--locations/--zones")
+    parser.add_argument('--replay',
+                        help="a recording of the api (see the record option), "
+                             "instead of fixtures")
+    parser.add_argument('--save', help="save the results (as JSON) to a file")
+    parser.add_argument('--baseline', help="compare against saved results")
+    parser.add_argument('--tolerance', type=float, default=0.20,
+                        help="regression tolerance, vs the baseline")
+    return parser.parse_args()
+
+
+def _returnScenarios(args):
+    if args.replay:
+        yield 'replay', None, None
+        return
+
+    if args.fixtures:
+        _install, _status = fixtures.load(args.fixtures)
+        yield 'fixtures', _install, _status
+        return
+
+    _ints = lambda arg: [int(val) for val in arg.split(',')]
+
+    for locs, zones, faults in itertools.product(
+            _ints(args.locations), _ints(args.zones), _ints(args.faults)):
+        _install = fixtures.installation(locs, zones, dhw=not args.no_dhw)
+        _status = fixtures.status(_install, faults, random.Random(0))
+        yield 'L%s Z%s F%s' % (locs, zones, faults), _install, _status
+
+
+async def _asyncRunScenario(hass, args, install, status):
+    """Return the results of a scenario (CPU times are in msecs).
+
+    A recording is replayed in the order it was recorded, and without its
+    latencies (the status of each cycle is then the next one recorded, and
+    each pass of the cycles replays the same ones)."""
+    if args.replay:
+        transport = evohome.evoReplayTransport(args.replay, latency_scale=0)
+        _statuses = [None] * (args.cycles + 1)
+    else:
+        transport = harness.evoFixtureTransport(install, status)
+        _rng = random.Random(1)
+        _statuses = [status]
+        for _ in range(args.cycles):
+            _statuses.append(fixtures.evolve(_statuses[-1], _rng, args.change))
+
+    client = harness.returnClient(hass, transport)
+    config = harness.returnConfig(
+        high_precision=not args.low_precision, api_budget=10 ** 9
+    )
+    domain_data = await harness.asyncSetup(hass, client, config)
+    entities = await harness.asyncReturnEntities(hass, domain_data)
+
+    _merge, _poll, _fanout, _changed = [], [], [], []
+
+# the merge is timed within the poll (i.e. of the poll's own response), as
+# another request of the status would use up the next response of a replay
+    _asyncMerge = evohome._asyncReturnTempsAndModes
+
+    async def _asyncTimedMerge(*args, **kwargs):
+        _start = process_time()
+        try:
+            return await _asyncMerge(*args, **kwargs)
+        finally:
+            _merge.append(process_time() - _start)
+
+# a replay is rewound after the first pass, so that both see the same statuses
+    _rewind = dict(transport._next) if args.replay else None
+
+## 1. CPU time, per cycle (the payloads are prepared beforehand)
+    evohome._asyncReturnTempsAndModes = _asyncTimedMerge
+    try:
+        for _status in _statuses[1:]:
+            if _status is not None:
+                transport.serve(status=_status)
+
+            _start = process_time()
+            await evohome._asyncUpdateStateData(domain_data)
+            _poll.append(process_time() - _start)
+
+            _changed.append(len(domain_data['statusChanged']))
+
+            _start = process_time()
+            evohome._dispatchChanges(hass, domain_data)
+            await hass.async_block_till_done()
+            _fanout.append(process_time() - _start)
+
+    finally:
+        evohome._asyncReturnTempsAndModes = _asyncMerge
+
+## 2. Memory allocated, per cycle (a separate pass, as tracing is expensive)
+    if args.replay:
+        transport._next = _rewind
+
+    _peak, _retained = [], []
+    tracemalloc.start()
+
+    for _status in _statuses[1:]:
+        if _status is not None:
+            transport.serve(status=_status)
+
+        tracemalloc.clear_traces()  # also resets the peak
+        await evohome._asyncUpdateStateData(domain_data)
+        evohome._dispatchChanges(hass, domain_data)
+        await hass.async_block_till_done()
+
+        _current, _max = tracemalloc.get_traced_memory()
+        _peak.append(_max)
+        _retained.append(_current)
+
+    tracemalloc.stop()
+
+## 3. The cost of reading properties: warm (from the snapshot), and cold (the
+## snapshot is rebuilt, as after a poll)
+    def _read(entity):
+        return entity.state
+
+    def _read_attrs(entity):
+        return entity.state_attributes
+
+    def _rebuild(entity):
+        entity._snapshot = None
+        return entity.state
+
+    _reads = {}
+    for _name, _func in [
+            ('read', _read), ('attrs', _read_attrs), ('rebuild', _rebuild)]:
+        _reads[_name] = statistics.median(
+            timeit.timeit(lambda: _func(entity), number=_READS) / _READS
+                for entity in entities
+        )
+
+    _ms = lambda secs: [sec * 1000 for sec in secs]
+
+    return {
+        'entities': len(entities),
+        'changed': statistics.mean(_changed),
+        'requests': transport.requests,
+        'merge_ms': _summary(_ms(_merge)),
+        'poll_ms': _summary(_ms(_poll)),
+        'fanout_ms': _summary(_ms(_fanout)),
+        'alloc_peak_kib': _summary([val / 1024 for val in _peak]),
+        'alloc_retained_kib': _summary([val / 1024 for val in _retained]),
+        'read_us': _reads['read'] * 10 ** 6,
+        'attrs_us': _reads['attrs'] * 10 ** 6,
+        'rebuild_us': _reads['rebuild'] * 10 ** 6,
+    }
+
+
+def _summary(values):
+    _values = sorted(values)
+    return {
+        'median': statistics.median(_values),
+        'p90': _values[int(len(_values) * 0.9)],
+    }
+
+
+def _printResults(name, results):
+    print(
+        "%-16s %5s ents %6.1f chgd | "
+        "merge %7.2f  poll %7.2f  fanout %7.2f ms (p90 %7.2f) | "
+        "alloc %8.1f KiB (%6.1f kept) | "
+        "read %5.2f  attrs %6.2f  rebuild %6.2f us" % (
+            name,
+            results['entities'],
+            results['changed'],
+            results['merge_ms']['median'],
+            results['poll_ms']['median'],
+            results['fanout_ms']['median'],
+            results['poll_ms']['p90'] + results['fanout_ms']['p90'],
+            results['alloc_peak_kib']['median'],
+            results['alloc_retained_kib']['median'],
+            results['read_us'],
+            results['attrs_us'],
+            results['rebuild_us'],
+        )
+    )
+
+
+def _returnRegressions(results, baseline, tolerance):
+    """Return the metrics (of every scenario) that are worse than baseline."""
+    _regressions = []
+
+    for name, _results in results.items():
+        if name not in baseline:
+            continue
+
+        for metric, value in _results.items():
+            _base = baseline[name].get(metric)
+
+            if isinstance(value, dict):
+                value, _base = value['median'], (_base or {}).get('median')
+
+            if metric.endswith(('_ms', '_kib', '_us')) and _base \
+                    and value > _base * (1 + tolerance):
+                _regressions.append(
+                    "%s: %s is %.2f, was %.2f" % (name, metric, value, _base)
+                )
+
+    return _regressions
+
+
+def main():
+    args = _returnArgs()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    from homeassistant.core import HomeAssistant
+
+    loop = asyncio.get_event_loop()
+    results = {}
+
+# each scenario has its own hass, so that it has only its own entities
+    for name, install, status in _returnScenarios(args):
+        hass = HomeAssistant(loop)
+        results[name] = loop.run_until_complete(
+            _asyncRunScenario(hass, args, install, status)
+        )
+
+        _printResults(name, results[name])
+
+    if args.save:
+        with open(args.save, 'w') as fp:
+            json.dump(results, fp, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fp:
+            _regressions = _returnRegressions(
+                results, json.load(fp), args.tolerance
+            )
+
+        for regression in _regressions:
+            print("REGRESSION - %s" % regression)
+
+        if _regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""Fixtures for the offline tools: synthetic Honeywell (EU) api payloads.
+
+The payloads are in the same shape as the web api's (and as the examples in
+evohome.UNUSED_SIMULATION()), so they can be fed to the component in place of
+the real thing.  A set of fixtures can be saved to (and loaded from) a folder
+of JSON files, so that a recorded installation can be used instead.
+
+ids are unique across locations and accounts (as they are with the real api),
+and the v1 deviceIDs of zones are the same as their v2 zoneIds (but as ints)."""
+
+import copy
+import json
+import os
+import random
+
+_LOCATION_BASE = 100000000
+_GATEWAY_BASE  = 200000000
+_SYSTEM_BASE   = 300000000
+_ZONE_BASE     = 400000000  ## zones use 1000 ids per location
+_DHW_BASE      = 600000000
+
+_LOCATIONS_PER_ACCOUNT = 100
+
+_SYSTEM_MODES = ['Auto', 'AutoWithEco', 'AutoWithReset', 'Away', 'DayOff',
+                 'HeatingOff', 'Custom']
+
+_FAULT_TYPES = ['TempZoneActuatorLowBattery', 'TempZoneSensorLowBattery',
+                'TempZoneActuatorCommunicationLost',
+                'TempZoneSensorCommunicationLost']
+
+_DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+                 'Saturday', 'Sunday']
+
+
+def installation(locations=1, zones=12, dhw=True, account=0):
+    """Return the installation (i.e. installationInfo) of an account (the ids
+    of each account are different)."""
+    _install = []
+
+    for idx in range(locations):
+        loc = account * _LOCATIONS_PER_ACCOUNT + idx
+        _tcs = {
+            'systemId': str(_SYSTEM_BASE + loc),
+            'modelType': 'EvoTouch',
+            'zones': [{
+                'zoneId': str(_ZONE_BASE + loc * 1000 + zone),
+                'modelType': 'HeatingZone',
+                'name': 'Zone %s.%s' % (idx + 1, zone + 1),
+                'zoneType': 'RadiatorZone',
+                'heatSetpointCapabilities': {
+                    'maxHeatSetpoint': 35.0,
+                    'minHeatSetpoint': 5.0,
+                    'valueResolution': 0.5,
+                    'allowedSetpointModes': [
+                        'PermanentOverride',
+                        'FollowSchedule',
+                        'TemporaryOverride'],
+                    'maxDuration': '1.00:00:00',
+                    'timingResolution': '00:10:00'},
+                'scheduleCapabilities': {
+                    'maxSwitchpointsPerDay': 6,
+                    'minSwitchpointsPerDay': 1,
+                    'timingResolution': '00:10:00',
+                    'setpointValueResolution': 0.5},
+                } for zone in range(zones)],
+            'allowedSystemModes': [{
+                'systemMode': mode,
+                'canBePermanent': True,
+                'canBeTemporary': mode not in ['Auto', 'HeatingOff'],
+                } for mode in _SYSTEM_MODES],
+        }
+
+        if dhw:
+            _tcs['dhw'] = {
+                'dhwId': str(_DHW_BASE + loc),
+                'dhwStateCapabilitiesResponse': {
+                    'allowedStates': ['On', 'Off'],
+                    'maxDuration': '1.00:00:00',
+                    'timingResolution': '00:10:00',
+                    'allowedModes': [
+                        'FollowSchedule',
+                        'PermanentOverride',
+                        'TemporaryOverride']},
+                'scheduleCapabilitiesResponse': {
+                    'minSwitchpointsPerDay': 1,
+                    'maxSwitchpointsPerDay': 6,
+                    'timingResolution': '00:10:00'},
+            }
+
+        _install.append({
+            'locationInfo': {
+                'locationId': str(_LOCATION_BASE + loc),
+                'name': 'Location %s' % (idx + 1),
+                'streetAddress': '%s Any Street' % (idx + 1),
+                'city': 'Anytown',
+                'country': 'UnitedKingdom',
+                'postcode': 'AB1 2CD',
+                'locationType': 'Residential',
+                'useDaylightSaveSwitching': True,
+                'timeZone': {
+                    'timeZoneId': 'GMTStandardTime',
+                    'displayName': '(UTC+00:00) Dublin, Edinburgh, Lisbon, London',
+                    'offsetMinutes': 0,
+                    'currentOffsetMinutes': 60,
+                    'supportsDaylightSaving': True},
+                'locationOwner': {
+                    'userId': str(100 + account),
+                    'username': 'user%s@example.com' % account,
+                    'firstname': 'Joe',
+                    'lastname': 'Bloggs'}},
+            'gateways': [{
+                'gatewayInfo': {
+                    'gatewayId': str(_GATEWAY_BASE + loc),
+                    'mac': '00D02D%06X' % loc,
+                    'crc': '%04X' % loc,
+                    'isWiFi': False},
+                'temperatureControlSystems': [_tcs],
+            }],
+        })
+
+    return _install
+
+
+def status(install, faults=0, rng=None):
+    """Return the status of every location of an installation (a list, in the
+    same order as the installation), with faults (per zone/DHW/TCS)."""
+    rng = rng or random.Random(0)
+    _status = []
+
+    for loc in install:
+        _gateways = []
+
+        for gwy in loc['gateways']:
+            _systems = []
+
+            for tcs in gwy['temperatureControlSystems']:
+                _tcs = {
+                    'systemId': tcs['systemId'],
+                    'zones': [{
+                        'zoneId': zone['zoneId'],
+                        'name': zone['name'],
+                        'temperatureStatus': {
+                            'temperature': round(rng.uniform(16, 23) * 2) / 2,
+                            'isAvailable': True},
+                        'heatSetpointStatus': {
+                            'targetTemperature': rng.choice([16.0, 19.0, 21.0]),
+                            'setpointMode': 'FollowSchedule'},
+                        'activeFaults': _faults(faults),
+                        } for zone in tcs['zones']],
+                    'activeFaults': _faults(faults),
+                    'systemModeStatus': {
+                        'mode': 'Auto',
+                        'isPermanent': True},
+                }
+
+                if 'dhw' in tcs:
+                    _tcs['dhw'] = {
+                        'dhwId': tcs['dhw']['dhwId'],
+                        'stateStatus': {
+                            'state': 'On',
+                            'mode': 'FollowSchedule'},
+                        'temperatureStatus': {
+                            'temperature': 61,
+                            'isAvailable': True},
+                        'activeFaults': _faults(faults),
+                    }
+
+                _systems.append(_tcs)
+
+            _gateways.append({
+                'gatewayId': gwy['gatewayInfo']['gatewayId'],
+                'temperatureControlSystems': _systems,
+                'activeFaults': [],
+            })
+
+        _status.append({
+            'locationId': loc['locationInfo']['locationId'],
+            'gateways': _gateways,
+        })
+
+    return _status
+
+
+def _faults(count):
+    return [{
+        'faultType': _FAULT_TYPES[idx % len(_FAULT_TYPES)],
+        'since': '2018-10-%02dT12:00:00' % (idx % 28 + 1),
+    } for idx in range(count)]
+
+
+def v1_locations(status):
+    """Return the v1 locations (with their devices) of a status, i.e. the
+    higher-precision temps, as per the v1 api's /locations/."""
+    _locations = []
+
+    for loc in status:
+        _devices = []
+
+        for tcs in [t for g in loc['gateways'] for t in g['temperatureControlSystems']]:
+            for zone in tcs['zones']:
+                _devices.append({
+                    'deviceID': int(zone['zoneId']),
+                    'name': zone['name'],
+                    'thermostatModelType': 'EMEA_ZONE',
+                    'thermostat': {
+                        'indoorTemperature':
+                            zone['temperatureStatus']['temperature'] + 0.12,
+                        'changeableValues': {
+                            'mode': 'Scheduled',
+                            'heatSetpoint': {
+                                'value': zone['heatSetpointStatus']['targetTemperature'],
+                                'status': 'Scheduled'}}},
+                })
+
+            if 'dhw' in tcs:
+                _devices.append({
+                    'deviceID': int(tcs['dhw']['dhwId']),
+                    'name': '',
+                    'thermostatModelType': 'DOMESTIC_HOT_WATER',
+                    'thermostat': {
+                        'indoorTemperature':
+                            tcs['dhw']['temperatureStatus']['temperature'],
+                        'changeableValues': {
+                            'mode': 'DHWOn',
+                            'status': 'Scheduled'}},
+                })
+
+        _locations.append({
+            'locationID': int(loc['locationId']),
+            'name': '',
+            'devices': _devices,
+        })
+
+    return _locations
+
+
+def schedule(zone_type='temperatureZone'):
+    """Return the (weekly) schedule of a zone, as per the v2 api."""
+    if zone_type == 'domesticHotWater':
+        _points = [('06:30:00', 'On'), ('08:30:00', 'Off'),
+                   ('17:00:00', 'On'), ('22:00:00', 'Off')]
+        _key = 'dhwState'
+    else:
+        _points = [('06:30:00', 21.0), ('08:30:00', 16.0),
+                   ('17:00:00', 21.0), ('22:30:00', 16.0)]
+        _key = 'heatSetpoint'
+
+    return {'dailySchedules': [{
+        'dayOfWeek': _day,
+        'switchpoints': [
+            {'timeOfDay': _time, _key: _value} for _time, _value in _points],
+        } for _day in _DAYS_OF_WEEK]}
+
+
+def scheduled(schedule, when, day_of_week=None):
+    """Return the setpoint (or DHW state) of a schedule at a time, i.e. that of
+    its latest switchpoint (which may be of a previous day)."""
+    _day = when.weekday() if day_of_week is None else day_of_week
+    _time = when.strftime('%H:%M:%S')
+
+    for _offset in range(8):
+        _points = [
+            point for point in
+                schedule['dailySchedules'][(_day - _offset) % 7]['switchpoints']
+                if _offset or point['timeOfDay'] <= _time
+        ]
+        if _points:
+            return _points[-1].get('heatSetpoint', _points[-1].get('dhwState'))
+
+    return None
+
+
+def evolve(status, rng, change=0.25):
+    """Return a copy of a status, with some of its zones' temps changed (each
+    zone has a chance of change), as happens between polls."""
+    _status = copy.deepcopy(status)
+
+    for loc in _status:
+        for tcs in [t for g in loc['gateways'] for t in g['temperatureControlSystems']]:
+            for zone in tcs['zones']:
+                if rng.random() < change:
+                    zone['temperatureStatus']['temperature'] += \
+                        rng.choice([-0.5, 0.5])
+
+    return _status
+
+
+def save(path, install, status):
+    """Save a set of fixtures (installation and status) to a folder."""
+    os.makedirs(path, exist_ok=True)
+
+    for name, payload in [('installation', install), ('status', status)]:
+        with open(os.path.join(path, name + '.json'), 'w') as fp:
+            json.dump(payload, fp, indent=2)
+
+
+def load(path):
+    """Load a set of fixtures (installation and status) from a folder."""
+    _fixtures = []
+
+    for name in ['installation', 'status']:
+        with open(os.path.join(path, name + '.json')) as fp:
+            _fixtures.append(json.load(fp))
+
+    return _fixtures
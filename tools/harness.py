@@ -0,0 +1,159 @@
+"""Harness for the offline tools: the component, served fixtures rather than
+Honeywell's servers (but otherwise, as it is when run by HA).
+
+The component is imported as HA would (i.e. as custom_components.evohome), so
+that its platforms can be used too.  HA (and evohomeclient2) must be installed,
+as they are where the component is run."""
+
+import json
+import os
+import sys
+import tempfile
+import types
+from datetime import datetime, timedelta
+
+import fixtures
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def importComponent():
+    """Import the component (and its climate platform) from this repo."""
+    if 'custom_components' not in sys.modules:
+        _package = types.ModuleType('custom_components')
+        _package.__path__ = [ROOT]
+        sys.modules['custom_components'] = _package
+
+    import custom_components.evohome
+    import custom_components.climate.evohome
+
+    return custom_components.evohome, custom_components.climate.evohome
+
+
+evohome, platform = importComponent()
+
+
+class evoFixtureTransport(object):
+    """A transport (of evoApiClient) that serves fixtures, rather than making
+    requests of Honeywell's api, see evohome.evoHttpTransport.
+
+    The payloads are kept as JSON, so that each request still pays the cost of
+    decoding them, as it would with the real api."""
+
+    def __init__(self, install, status):
+        self.requests = 0
+        self.serve(install, status)
+
+    def serve(self, install=None, status=None):
+        """Set the payloads to be served (e.g. a new status, for each poll)."""
+        if install is not None:
+            self._install = json.dumps(install)
+
+        if status is not None:
+            self._status = {loc['locationId']: json.dumps(loc) for loc in status}
+            self._v1 = json.dumps(fixtures.v1_locations(status))
+
+    async def async_request(self, client, method, url, **kwargs):
+        self.requests += 1
+
+        if url == evohome._API_OAUTH_URL:
+            _json = '{"access_token": "token", "refresh_token": "token", ' \
+                '"expires_in": 1800}'
+        elif url.endswith('/userAccount'):
+            _json = '{"userId": "100"}'
+        elif url.endswith('/installationInfo'):
+            _json = self._install
+        elif url.endswith('/status'):
+            _json = self._status[url.split('/')[-2]]
+        elif url.endswith('/Session'):
+            _json = '{"sessionId": "session", "userInfo": {"userID": 100}}'
+        elif url.endswith('/locations/'):
+            _json = self._v1
+        elif url.endswith('/schedule'):
+            _json = json.dumps(fixtures.schedule(url.split('/')[-3]))
+        else:  # the writes return the id of a task
+            _json = '{"id": "1"}'
+
+        return json.loads(_json)
+
+
+def returnClient(hass, transport, username='user@example.com'):
+    """Return a client (of the component) that uses a transport."""
+    return evohome.evoApiClient(
+        hass, username, 'password', transport=transport
+    )
+
+
+def useHost(host):
+    """Point the component at another host (e.g. the mock api, see
+    mock_server.py), rather than at Honeywell's servers."""
+    evohome._API_HOST = host
+    evohome._API_V2_URL = host + '/WebAPI/emea/api/v1'
+    evohome._API_V1_URL = host + '/WebAPI/api'
+    evohome._API_OAUTH_URL = host + '/Auth/OAuth/Token'
+
+
+def returnConfig(**config):
+    """Return a (validated) config of the component, with any defaults."""
+    _config = {'username': 'user@example.com', 'password': 'password'}
+    _config.update(config)
+    return evohome.CONFIG_SCHEMA({evohome.DOMAIN: _config})
+
+
+async def asyncSetup(hass, client, config, account=0):
+    """Connect the component to a client (and obtain the initial state), much
+    as _asyncSetupFleet() does, but without re-using any stored tokens.
+
+    Returns the domain_data of the account (which is added to the fleet)."""
+    from evohomeclient2.location import Location
+
+    if hass.config.config_dir is None:  # the tokens are saved, as usual
+        hass.config.config_dir = tempfile.mkdtemp()
+
+    domain_data = evohome._returnDomainData(hass, config, {}, account)
+    domain_data['apiClient'] = client
+    domain_data['budget'] = client.budget = evohome.evoRequestBudget(
+        domain_data['config'][evohome.CONF_API_BUDGET]
+    )
+    domain_data['tokenStore'] = evohome.Store(
+        hass, evohome.STORAGE_VERSION,
+        evohome._returnStorageKey(evohome.STORAGE_KEY_TOKENS, account),
+        private=True
+    )
+    domain_data['scheduleCache'] = {}
+
+    await client.async_login()
+    await client.async_installation()
+
+    client.locations = [
+        Location(client, loc) for loc in client.installation_info
+    ]
+
+    domain_data['oauthExpires'] = client.access_token_expires + timedelta(
+        seconds = 15 - domain_data['config'][evohome.CONF_SCAN_INTERVAL])
+    domain_data['installExpires'] = datetime.max
+
+    await evohome._asyncUpdateStateData(domain_data)
+
+    hass.data.setdefault(evohome.DATA_EVOHOME, domain_data) \
+        .setdefault('fleet', {})[client.username_hash] = domain_data
+    return domain_data
+
+
+async def asyncReturnEntities(hass, domain_data):
+    """Return the (climate) entities of an account, as setup_platform() would
+    (i.e. in a worker thread), each with an entity_id."""
+    client = domain_data['apiClient']
+    entities = []
+
+    for idx in evohome._returnLocationIdxs(domain_data):
+        for gwy in client.locations[idx]._gateways:
+            for tcs in gwy._control_systems:
+                entities.extend(await hass.async_add_executor_job(
+                    platform._returnDevices, hass, client, tcs
+                ))
+
+    for idx, entity in enumerate(entities):
+        entity.entity_id = 'climate.evohome_%s' % idx
+
+    return entities
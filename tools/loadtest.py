@@ -0,0 +1,157 @@
+"""Load (and chaos) test the component's polling against the mock api.
+
+The mock api (see mock_server.py) is run in-process, and any number of
+accounts are polled (via the component's own _asyncPollAccount), as in fleet
+mode.  Time is compressed: a scan_interval of the component is --interval
+secs here (so backoffs are compressed, too).  For example:
+
+    python tools/loadtest.py --accounts 50 --duration 120 --interval 2 \\
+        -- --latency 0.3 --errors 0.05 --throttle 0.05 --token-lifetime 120
+
+(the arguments after -- are those of the mock api, see mock_server.py).
+"""
+
+import argparse
+import asyncio
+import collections
+import logging
+import statistics
+from datetime import datetime
+
+import aiohttp
+from aiohttp import web
+
+import harness
+import mock_server
+
+from harness import evohome
+
+
+def _returnArgs():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--accounts', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=60,
+                        help="secs, how long to poll for")
+    parser.add_argument('--interval', type=float, default=1,
+                        help="secs, a scan_interval (compressed)")
+    parser.add_argument('--low-precision', action='store_true',
+                        help="don't use the v1 api (i.e. high_precision: false)")
+    parser.add_argument('--api-budget', type=int, default=10 ** 6,
+                        help="per account, per (uncompressed) hour")
+    parser.add_argument('server', nargs=argparse.REMAINDER,
+                        help="the arguments of the mock api")
+    args = parser.parse_args()
+
+    args.server = mock_server.returnArgs(
+        [arg for arg in args.server if arg != '--']
+    )
+    return args
+
+
+async def _asyncDrive(hass, domain_data, args, stats, latency, offset):
+    """Poll an account (as the component would) until the test is over."""
+    _loop = asyncio.get_event_loop()
+    _end = _loop.time() + args.duration
+    _scale = args.interval / domain_data['config'][evohome.CONF_SCAN_INTERVAL]
+
+    await asyncio.sleep(offset)  # the accounts are spread across the interval
+
+    while _loop.time() < _end:
+        domain_data['stateExpires'] = datetime.min  # it's always due, here
+
+        try:
+            _result = await evohome._asyncPollAccount(hass, domain_data)
+        except aiohttp.ClientResponseError as err:
+            stats['failed_%s' % err.status] += 1
+        except Exception as err:
+            stats['failed_%s' % type(err).__name__] += 1
+        else:
+            if _result:
+                stats['polled'] += 1
+                latency.append(domain_data['pollLatency'])
+            elif domain_data['pollInterval'] > \
+                    domain_data['config'][evohome.CONF_SCAN_INTERVAL]:
+                stats['backed_off'] += 1
+            else:
+                stats['deferred'] += 1
+
+# the component may have backed off, so wait as long as it would (compressed)
+        _wait = max(
+            (domain_data['stateExpires'] - datetime.now()).total_seconds(),
+            domain_data['config'][evohome.CONF_SCAN_INTERVAL]
+        )
+        await asyncio.sleep(_wait * _scale)
+
+
+async def _asyncRun(hass, args):
+    server = mock_server.evoMockServer(args.server)
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    await web.TCPSite(runner, args.server.host, args.server.port).start()
+
+    harness.useHost('http://%s:%s' % (args.server.host, args.server.port))
+
+    config = harness.returnConfig(
+        high_precision=not args.low_precision,
+        api_budget=args.api_budget,
+        password=args.server.password or 'password',
+    )
+    session = evohome._returnWebSession(
+        config[evohome.DOMAIN][evohome.CONF_SCAN_INTERVAL]
+    )
+
+    fleet = []
+    for idx in range(args.accounts):
+        client = evohome.evoApiClient(
+            hass, 'user%s@example.com' % idx, config[evohome.DOMAIN]['password'],
+            session=session,
+        )
+        try:
+            fleet.append(await harness.asyncSetup(hass, client, config, idx))
+        except Exception as err:
+            logging.error("Setup of account %s failed: %r", idx, err)
+
+    stats, latency = collections.Counter(), []
+
+    await asyncio.gather(*[
+        _asyncDrive(hass, domain_data, args, stats, latency,
+                    args.interval * idx / len(fleet))
+            for idx, domain_data in enumerate(fleet)
+    ])
+
+    await session.close()
+    await runner.cleanup()
+
+    return len(fleet), stats, latency, server
+
+
+def main():
+    args = _returnArgs()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    from homeassistant.core import HomeAssistant
+
+    loop = asyncio.get_event_loop()
+    hass = HomeAssistant(loop)
+
+    _accounts, stats, _latency, server = \
+        loop.run_until_complete(_asyncRun(hass, args))
+    _latency = sorted(_latency) or [0]
+
+    print("Accounts set up: %s of %s" % (_accounts, args.accounts))
+    print("Polls: %s" % ", ".join(
+        "%s %s" % (key, value) for key, value in sorted(stats.items())
+    ))
+    print("Poll latency: median %.3f, p90 %.3f, max %.3f secs" % (
+        statistics.median(_latency),
+        _latency[int(len(_latency) * 0.9)],
+        _latency[-1],
+    ))
+    print("Requests of the mock api (by endpoint, status):")
+    for (name, status), count in sorted(server.counts.items(), key=str):
+        print("  %-14s %s %6s" % (name, status, count))
+
+
+if __name__ == '__main__':
+    main()
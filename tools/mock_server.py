@@ -0,0 +1,482 @@
+"""A local stand-in for Honeywell's (EU) web api (v2 and v1), for load and
+failure testing of the component, offline.
+
+It serves the endpoints that the component uses (OAuth, user account,
+installation, location status, zone schedules, TCS mode, zone setpoint, DHW
+state, and the v1 session & temps), with synthetic installations (see
+fixtures.py): any username may log in, and each has its own installation.
+
+Failures, and the api's quirks, can be injected:
+ - latency (and jitter) of every response
+ - 429s (random, and/or as a rate limit), and 5xx (random)
+ - short-lived OAuth tokens and v1 sessions, and revoked tokens (401s)
+ - eventual consistency: writes appear in the status only after a lag (the
+   real api takes 60-180 secs to report changes)
+
+For example:
+
+    python tools/mock_server.py --port 8765 --latency 0.3 --errors 0.02 \\
+        --throttle 0.02 --rate-limit 600 --token-lifetime 300 --lag 60,180
+
+Counts of requests (by endpoint & status) are at /stats.
+
+The server can also be used with another clock (e.g. a virtual one), and its
+handlers called in-process, i.e. without HTTP (see simulate.py).
+"""
+
+import argparse
+import asyncio
+import collections
+import logging
+import random
+import uuid
+
+from aiohttp import web
+
+import fixtures
+
+_LOGGER = logging.getLogger(__name__)
+
+OAUTH_PATH = '/Auth/OAuth/Token'
+V2_PATH = '/WebAPI/emea/api/v1'
+V1_PATH = '/WebAPI/api'
+
+_RATE_LIMIT_WINDOW = 60  ## the rate limit is of requests per minute
+
+
+def returnArgs(argv=None):
+    """Return the server's arguments (the defaults are of a well api)."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--locations', type=int, default=1,
+                        help="locations per account")
+    parser.add_argument('--zones', type=int, default=12,
+                        help="zones per location")
+    parser.add_argument('--faults', type=int, default=0,
+                        help="faults per zone")
+    parser.add_argument('--no-dhw', action='store_true',
+                        help="don't give each location a DHW zone")
+    parser.add_argument('--password',
+                        help="the password of every account (default: any)")
+    parser.add_argument('--latency', type=float, default=0,
+                        help="secs, before each response")
+    parser.add_argument('--jitter', type=float, default=0.5,
+                        help="the latency varies by up to this fraction")
+    parser.add_argument('--errors', type=float, default=0,
+                        help="chance of a 5xx, per request")
+    parser.add_argument('--throttle', type=float, default=0,
+                        help="chance of a 429, per request")
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help="max. requests per minute, else 429 (0 is none)")
+    parser.add_argument('--retry-after', type=int, default=0,
+                        help="secs, the Retry-After of a 429 (0 is none)")
+    parser.add_argument('--token-lifetime', type=int, default=1800,
+                        help="secs, the lifetime of an OAuth access token")
+    parser.add_argument('--session-lifetime', type=int, default=900,
+                        help="secs, the idle lifetime of a v1 sessionId")
+    parser.add_argument('--revoke', type=float, default=0,
+                        help="chance of a token being revoked, per request")
+    parser.add_argument('--lag', default='0,0',
+                        help="secs, min,max before a write is in the status")
+    parser.add_argument('--drift', type=float, default=0,
+                        help="chance of a zone's temp changing, per status")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+class evoMockAccount(object):
+    """An account of the mock api: its installation, and its (true) status."""
+
+    def __init__(self, idx, username, args, rng):
+        self.idx = idx
+        self.username = username
+        self.user_id = str(100 + idx)
+
+        self.install = fixtures.installation(
+            args.locations, args.zones, dhw=not args.no_dhw, account=idx
+        )
+        self.status = fixtures.status(self.install, args.faults, rng)
+        self.schedules = {}  # by zoneId (or dhwId), fetched on demand
+        self.pending = []  # the writes that aren't yet in the status
+
+# the zones follow their schedule at first, so these are their setpoints
+        self.scheduled = {
+            zone['zoneId']: zone['heatSetpointStatus']['targetTemperature']
+                for tcs in self.systems() for zone in tcs['zones']
+        }
+
+    def systems(self):
+        """Return the status of every TCS of the account."""
+        return [
+            tcs for loc in self.status for gwy in loc['gateways']
+                for tcs in gwy['temperatureControlSystems']
+        ]
+
+    def find(self, kind, _id):
+        """Return the status of a TCS, zone or DHW (by its id), or None."""
+        for tcs in self.systems():
+            if kind == 'tcs' and tcs['systemId'] == _id:
+                return tcs
+            if kind == 'dhw' and tcs.get('dhw', {}).get('dhwId') == _id:
+                return tcs['dhw']
+            if kind == 'zone':
+                for zone in tcs['zones']:
+                    if zone['zoneId'] == _id:
+                        return zone
+        return None
+
+
+class evoMockServer(object):
+    """A mock of Honeywell's (EU) web api, see returnArgs() for its options."""
+
+    def __init__(self, args, clock=None):
+        self.args = args
+        self.clock = clock  # if None, the time is that of the event loop
+        self.accounts = {}  # by username
+        self.tokens = {}  # by access token: [account, expires]
+        self.refresh_tokens = {}  # by refresh token: account
+        self.sessions = {}  # by v1 sessionId: [account, expires]
+        self.counts = collections.Counter()  # by (endpoint, status)
+
+        self._rng = random.Random(args.seed)
+        self._lag = [float(secs) for secs in args.lag.split(',')]
+        self._recent = collections.deque()  # times of recent requests
+
+    def app(self):
+        """Return the (aiohttp) web app of the mock api."""
+        app = web.Application(middlewares=[self._middleware])
+
+        for method, path, handler, name in self.routes():
+            app.router.add_route(method, path, handler, name=name)
+
+        return app
+
+    def routes(self):
+        """Return the routes of the mock api: (method, path, handler, name)."""
+        return [
+            ('POST', OAUTH_PATH, self._oauth, 'oauth'),
+            ('GET', V2_PATH + '/userAccount', self._user_account, 'account'),
+            ('GET', V2_PATH + '/location/installationInfo',
+                self._installation, 'installation'),
+            ('GET', V2_PATH + '/location/{id}/status', self._status, 'status'),
+            ('GET', V2_PATH + '/{type}/{id}/schedule', self._schedule,
+                'schedule'),
+            ('PUT', V2_PATH + '/temperatureControlSystem/{id}/mode',
+                self._set_mode, 'set_mode'),
+            ('PUT', V2_PATH + '/temperatureZone/{id}/heatSetpoint',
+                self._set_setpoint, 'set_setpoint'),
+            ('PUT', V2_PATH + '/domesticHotWater/{id}/state', self._set_dhw,
+                'set_dhw'),
+            ('POST', V1_PATH + '/Session', self._v1_session, 'v1_session'),
+            ('GET', V1_PATH + '/locations/', self._v1_locations,
+                'v1_locations'),
+            ('GET', '/stats', self._stats, 'stats'),
+        ]
+
+    def _now(self):
+        if self.clock is not None:
+            return self.clock.monotonic()
+        return asyncio.get_event_loop().time()
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        """Inject the latency & failures, and count the requests."""
+        _name = request.match_info.route.name
+        if _name == 'stats':
+            return await handler(request)
+
+        if self.args.latency:
+            _jitter = self.args.jitter
+            await asyncio.sleep(
+                self.args.latency * self._rng.uniform(1 - _jitter, 1 + _jitter)
+            )
+
+        try:
+            _resp = self._inject()
+            if _resp is None:
+                _resp = await handler(request)
+        except web.HTTPException as err:
+            self.counts[(_name, err.status)] += 1
+            raise
+
+        self.counts[(_name, _resp.status)] += 1
+        return _resp
+
+    def _inject(self):
+        """Return a 429 or 5xx response (if one is due), else None."""
+        _now = self._now()
+
+        while self._recent and self._recent[0] < _now - _RATE_LIMIT_WINDOW:
+            self._recent.popleft()
+        self._recent.append(_now)
+
+        if (self.args.rate_limit and len(self._recent) > self.args.rate_limit) \
+                or self._rng.random() < self.args.throttle:
+            _headers = {}
+            if self.args.retry_after:
+                _headers['Retry-After'] = str(self.args.retry_after)
+            return web.json_response([{
+                'code': 'TooManyRequests',
+                'message': 'Request count limitation exceeded, please try again later.',
+            }], status=429, headers=_headers)
+
+        if self._rng.random() < self.args.errors:
+            return web.json_response([{
+                'code': 'InternalError',
+                'message': 'An error has occurred.',
+            }], status=self._rng.choice([500, 502, 503]))
+
+        return None
+
+## OAuth, and the v2 api
+    async def _oauth(self, request):
+        _form = await request.post()
+
+        if _form.get('grant_type') == 'password':
+            if self.args.password and _form.get('Password') != self.args.password:
+                return web.json_response({'error': 'invalid_grant'}, status=400)
+            _account = self._returnAccount(_form.get('Username'))
+
+        elif _form.get('grant_type') == 'refresh_token':
+            _account = self.refresh_tokens.pop(_form.get('refresh_token'), None)
+            if _account is None:
+                return web.json_response({'error': 'invalid_grant'}, status=400)
+
+        else:
+            return web.json_response(
+                {'error': 'unsupported_grant_type'}, status=400
+            )
+
+        _access_token, _refresh_token = uuid.uuid4().hex, uuid.uuid4().hex
+        self.tokens[_access_token] = \
+            [_account, self._now() + self.args.token_lifetime]
+        self.refresh_tokens[_refresh_token] = _account
+
+        return web.json_response({
+            'access_token': _access_token,
+            'token_type': 'bearer',
+            'expires_in': self.args.token_lifetime,
+            'refresh_token': _refresh_token,
+            'scope': _form.get('scope'),
+        })
+
+    def _returnAccount(self, username):
+        if username not in self.accounts:
+            self.accounts[username] = evoMockAccount(
+                len(self.accounts), username, self.args, self._rng
+            )
+        return self.accounts[username]
+
+    def _authorize(self, request):
+        """Return the account of a (v2) request, else raise a 401."""
+        _token = request.headers.get('Authorization', '')[len('bearer '):]
+        _account, _expires = self.tokens.get(_token, (None, 0))
+
+        if self._rng.random() < self.args.revoke:
+            self.tokens.pop(_token, None)
+            _account = None
+
+        if _account is None or self._now() > _expires:
+            raise web.HTTPUnauthorized(
+                text='[{"code": "Unauthorized", "message": "Unauthorized"}]',
+                content_type='application/json',
+            )
+
+        self._converge(_account)
+        return _account
+
+    async def _user_account(self, request):
+        _account = self._authorize(request)
+        return web.json_response({
+            'userId': _account.user_id,
+            'username': _account.username,
+            'firstname': 'Joe',
+            'lastname': 'Bloggs',
+            'country': 'UnitedKingdom',
+            'language': 'enGB',
+        })
+
+    async def _installation(self, request):
+        _account = self._authorize(request)
+        return web.json_response(_account.install)
+
+    async def _status(self, request):
+        _account = self._authorize(request)
+
+        for loc in _account.status:
+            if loc['locationId'] == request.match_info['id']:
+                self._drift(loc)
+                return web.json_response(loc)
+
+        raise web.HTTPNotFound()
+
+    async def _schedule(self, request):
+        _account = self._authorize(request)
+        _type, _id = request.match_info['type'], request.match_info['id']
+
+        if _account.find('zone' if _type == 'temperatureZone' else 'dhw', _id) \
+                is None:
+            raise web.HTTPNotFound()
+
+        return web.json_response(
+            _account.schedules.setdefault(_id, fixtures.schedule(_type))
+        )
+
+    async def _set_mode(self, request):
+        _account = self._authorize(request)
+        _tcs = _account.find('tcs', request.match_info['id'])
+        _json = await request.json()
+
+        if _tcs is None:
+            raise web.HTTPNotFound()
+
+        def _apply():
+            _tcs['systemModeStatus'] = {
+                'mode': _json['SystemMode'],
+                'isPermanent': bool(_json.get('Permanent', True)),
+            }
+            if _json.get('TimeUntil'):
+                _tcs['systemModeStatus']['timeUntil'] = _json['TimeUntil']
+
+# after AutoWithReset, every zone (and the DHW) follows its schedule again
+            if _json['SystemMode'] == 'AutoWithReset':
+                for zone in _tcs['zones']:
+                    zone['heatSetpointStatus'] = {
+                        'targetTemperature': _account.scheduled[zone['zoneId']],
+                        'setpointMode': 'FollowSchedule',
+                    }
+                if 'dhw' in _tcs:
+                    _tcs['dhw']['stateStatus'] = \
+                        {'state': 'On', 'mode': 'FollowSchedule'}
+
+        return self._queue(_account, _apply)
+
+    async def _set_setpoint(self, request):
+        _account = self._authorize(request)
+        _zone = _account.find('zone', request.match_info['id'])
+        _json = await request.json()
+
+        if _zone is None:
+            raise web.HTTPNotFound()
+
+        def _apply():
+            if _json['SetpointMode'] == 'FollowSchedule':
+                _zone['heatSetpointStatus'] = {
+                    'targetTemperature': _account.scheduled[_zone['zoneId']],
+                    'setpointMode': 'FollowSchedule',
+                }
+            else:
+                _zone['heatSetpointStatus'] = {
+                    'targetTemperature': _json['HeatSetpointValue'],
+                    'setpointMode': _json['SetpointMode'],
+                }
+                if _json.get('TimeUntil'):
+                    _zone['heatSetpointStatus']['until'] = _json['TimeUntil']
+
+        return self._queue(_account, _apply)
+
+    async def _set_dhw(self, request):
+        _account = self._authorize(request)
+        _dhw = _account.find('dhw', request.match_info['id'])
+        _json = await request.json()
+
+        if _dhw is None:
+            raise web.HTTPNotFound()
+
+        def _apply():
+            _dhw['stateStatus'] = {
+                'state': _json.get('State') or 'On',  # as if it's scheduled On
+                'mode': _json['Mode'],
+            }
+            if _json.get('UntilTime'):
+                _dhw['stateStatus']['until'] = _json['UntilTime']
+
+        return self._queue(_account, _apply)
+
+    def _queue(self, account, apply):
+        """Queue a write, to be applied to the status after a (random) lag,
+        and return the response (the id of the api's task)."""
+        account.pending.append(
+            (self._now() + self._rng.uniform(*self._lag), apply)
+        )
+        account.pending.sort(key=lambda write: write[0])
+        self._converge(account)
+
+        return web.json_response({'id': str(self._rng.randrange(10 ** 9))})
+
+    def _converge(self, account):
+        """Apply any (pending) writes that are now due."""
+        _now = self._now()
+        while account.pending and account.pending[0][0] <= _now:
+            account.pending.pop(0)[1]()
+
+    def _drift(self, location):
+        """Change (some of) the temps of a location, as happens over time."""
+        if not self.args.drift:
+            return
+
+        for gwy in location['gateways']:
+            for tcs in gwy['temperatureControlSystems']:
+                for zone in tcs['zones']:
+                    if self._rng.random() < self.args.drift:
+                        zone['temperatureStatus']['temperature'] += \
+                            self._rng.choice([-0.5, 0.5])
+
+## the v1 api
+    async def _v1_session(self, request):
+        _json = await request.json()
+
+        if self.args.password and _json.get('Password') != self.args.password:
+            return web.json_response([{
+                'code': 'EmailOrPasswordIncorrect',
+                'message': 'The email or password provided is incorrect.',
+            }], status=401)
+
+        _account = self._returnAccount(_json.get('Username'))
+        _session_id = uuid.uuid4().hex.upper()
+        self.sessions[_session_id] = \
+            [_account, self._now() + self.args.session_lifetime]
+
+        return web.json_response({
+            'sessionId': _session_id,
+            'userInfo': {
+                'userID': int(_account.user_id),
+                'username': _account.username,
+            },
+        })
+
+    async def _v1_locations(self, request):
+        _session = self.sessions.get(request.headers.get('sessionId'))
+
+        if _session is None or self._now() > _session[1]:
+            raise web.HTTPUnauthorized(
+                text='[{"code": "Unauthorized", "message": "Unauthorized"}]',
+                content_type='application/json',
+            )
+
+# v1 sessions expire only when idle
+        _session[1] = self._now() + self.args.session_lifetime
+
+        self._converge(_session[0])
+        return web.json_response(fixtures.v1_locations(_session[0].status))
+
+    async def _stats(self, request):
+        return web.json_response({
+            'accounts': len(self.accounts),
+            'requests': [
+                {'endpoint': name, 'status': status, 'count': count}
+                    for (name, status), count in sorted(self.counts.items(), key=str)
+            ],
+        })
+
+
+def main():
+    args = returnArgs()
+    logging.basicConfig(level=logging.INFO)
+
+    web.run_app(evoMockServer(args).app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
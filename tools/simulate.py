@@ -0,0 +1,713 @@
+"""Simulate the component over (virtual) days, against the mock api.
+
+Time is virtual: the component (see evohome.evoClock), the mock api and HA's
+timers all use a clock that is advanced a step at a time, so a week of polling
+takes seconds (there is no latency).  At each step, each controller is
+update()'d (as HA would, so it polls only once its scan_interval has expired),
+and changes are made at random: via the entities (as from HA: TCS modes, zone
+setpoints & DHW state, which are subject to the heuristics), and at the
+controller itself (zone setpoints, which HA can't know of until it polls).
+
+The zones follow their schedules (so their setpoints change over the day), and
+the mock api reports every change only after a lag (see --lag), as the real api
+does (see evoSimulatedApi, which extends the mock api, and is called in-process
+rather than over HTTP).  For example:
+
+    python tools/simulate.py --days 7 --heuristics --schedules \\
+        --changes 20 -- --lag 60,180
+
+(the arguments after -- are those of the mock api, see mock_server.py).
+
+The report is of: the api's requests (per day, and by endpoint), the age of
+the state (since its last poll), its staleness (how often, and for how long,
+an entity differs from the controller's true state), and the accuracy of the
+heuristics (how often an entity is right while the api is still lagging).
+"""
+
+import argparse
+import asyncio
+import collections
+import copy
+import json
+import logging
+import random
+import re
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import web
+from yarl import URL
+
+import fixtures
+import harness
+import mock_server
+
+from harness import evohome
+
+_TCS_MODES = [evohome.EVO_AUTO, evohome.EVO_AUTOECO, evohome.EVO_AWAY,
+              evohome.EVO_DAYOFF, evohome.EVO_HEATOFF, evohome.EVO_RESET]
+
+_UNTIL_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# the setpoints of (all) the zones, when the TCS is in these modes...
+_MODE_TARGETS = {'Away': 10, 'HeatingOff': 5}
+# ...else, of the zones that follow their schedule (which may be modified)
+_MODE_OFFSETS = {'AutoWithEco': -3}
+_MODE_DAYS = {'DayOff': 5}  ## i.e. as if it was Saturday
+
+
+def _returnArgs():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--days', type=float, default=7,
+                        help="virtual days to simulate")
+    parser.add_argument('--step', type=float, default=10,
+                        help="virtual secs, between each update()")
+    parser.add_argument('--start',
+                        help="the virtual start time, as YYYY-MM-DDTHH:MM "
+                             "(default: midnight today)")
+    parser.add_argument('--scan-interval', type=int, default=300,
+                        help="secs, the component's scan_interval")
+    parser.add_argument('--api-budget', type=int,
+                        help="per account, per hour (default: as configured)")
+    parser.add_argument('--heuristics', action='store_true',
+                        help="use_heuristics: true")
+    parser.add_argument('--schedules', action='store_true',
+                        help="use_schedules: true")
+    parser.add_argument('--low-precision', action='store_true',
+                        help="don't use the v1 api (i.e. high_precision: false)")
+    parser.add_argument('--changes', type=float, default=10,
+                        help="changes (via HA) per virtual day")
+    parser.add_argument('--external', type=float, default=2,
+                        help="changes (at the controller) per virtual day")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('server', nargs=argparse.REMAINDER,
+                        help="the arguments of the mock api")
+    args = parser.parse_args()
+
+    args.server = mock_server.returnArgs(
+        [arg for arg in args.server if arg != '--']
+    )
+    return args
+
+
+class evoVirtualClock(evohome.evoClock):
+    """A virtual clock, which moves only when it is advanced (see evoClock)."""
+
+    def __init__(self, start):
+        self.start = start  ## a (local, naive) datetime
+        self.elapsed = 0.0
+
+        self._utc_start = start.astimezone(timezone.utc)
+
+    def now(self):
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def utcnow(self):
+        """Return the (aware) UTC time, as per HA's dt_util.utcnow()."""
+        return self._utc_start + timedelta(seconds=self.elapsed)
+
+    def monotonic(self):
+        return self.elapsed
+
+    def advance(self, secs):
+        self.elapsed += secs
+
+
+def _useClock(clock):
+    """Make the component, and HA (i.e. its timers), use a virtual clock."""
+    import homeassistant.util.dt as dt_util
+
+    evohome._CLOCK = clock
+    dt_util.utcnow = clock.utcnow
+
+
+def _fireTimeChanged(hass, clock):
+    """Fire HA's time_changed event, so its timers (e.g. async_call_later) run
+    as of the virtual time."""
+    from homeassistant.const import ATTR_NOW, EVENT_TIME_CHANGED
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: clock.utcnow()})
+
+
+def _parseUntil(until):
+    try:
+        return datetime.strptime(until, _UNTIL_FORMAT) if until else None
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(
+            text=json.dumps([{'code': 'InvalidInput', 'message': until}]),
+            content_type='application/json',
+        )
+
+
+def _expire(setting, now, mode='FollowSchedule'):
+    """Revert a temporary mode (or override) of a setting, once it's expired."""
+    if setting['until'] and setting['until'] <= now:
+        setting.update(mode=mode, until=None)
+        if 'value' in setting:
+            setting['value'] = None
+    return setting
+
+
+class evoSimulatedAccount(mock_server.evoMockAccount):
+    """An account of the mock api, whose status is rendered from its settings
+    (the TCS mode, and any overrides), so zones follow their schedules, and
+    overrides expire.
+
+    There are two sets of settings: the true ones (i.e. the controller's), to
+    which writes are applied at once, and the reported ones (i.e. the api's),
+    to which they're applied only after a lag."""
+
+    def __init__(self, idx, username, args, rng):
+        super().__init__(idx, username, args, rng)
+
+        self.children = {}  # by systemId, the (kind, id) of its zones & DHW
+        self.truth = {'tcs': {}, 'zones': {}, 'dhw': {}}
+
+        for tcs in self.systems():
+            self.truth['tcs'][tcs['systemId']] = {'mode': 'Auto', 'until': None}
+            self.children[tcs['systemId']] = []
+
+            for zone in tcs['zones']:
+                self._addChild(tcs, 'zones', zone['zoneId'], 'temperatureZone')
+            if 'dhw' in tcs:
+                self._addChild(
+                    tcs, 'dhw', tcs['dhw']['dhwId'], 'domesticHotWater'
+                )
+
+        self.reported = copy.deepcopy(self.truth)
+        self.pending = []  # the writes that aren't yet reported: (due, apply)
+
+    def _addChild(self, tcs, kind, _id, zone_type):
+        self.truth[kind][_id] = \
+            {'mode': 'FollowSchedule', 'value': None, 'until': None}
+        self.schedules[_id] = fixtures.schedule(zone_type)
+        self.children[tcs['systemId']].append((kind, _id))
+
+    def systems(self, status=None):
+        """Return the status of every TCS of the account."""
+        return [
+            tcs for loc in (status or self.status) for gwy in loc['gateways']
+                for tcs in gwy['temperatureControlSystems']
+        ]
+
+    def write(self, apply, due):
+        """Apply a write to the true settings now, and to the reported settings
+        once it's due (a monotonic time)."""
+        apply(self.truth)
+        self.pending.append((due, apply))
+        self.pending.sort(key=lambda write: write[0])
+
+    def converge(self, monotonic):
+        """Apply the pending writes that are due to the reported settings."""
+        while self.pending and self.pending[0][0] <= monotonic:
+            self.pending.pop(0)[1](self.reported)
+
+    def render(self, now, settings=None, status=None):
+        """Render a status (by default, the reported one) from its settings, as
+        of now (a datetime), and return it."""
+        settings = settings or self.reported
+        status = status or self.status
+
+        for tcs in self.systems(status):
+            _tcs = _expire(settings['tcs'][tcs['systemId']], now, 'Auto')
+            tcs['systemModeStatus'] = {
+                'mode': _tcs['mode'], 'isPermanent': _tcs['until'] is None,
+            }
+            if _tcs['until']:
+                tcs['systemModeStatus']['timeUntil'] = \
+                    _tcs['until'].strftime(_UNTIL_FORMAT)
+
+            for zone in tcs['zones']:
+                _zone = _expire(settings['zones'][zone['zoneId']], now)
+                zone['heatSetpointStatus'] = {
+                    'targetTemperature': self._returnTarget(
+                        zone['zoneId'], _zone, _tcs['mode'], now
+                    ),
+                    'setpointMode': _zone['mode'],
+                }
+                if _zone['until']:
+                    zone['heatSetpointStatus']['until'] = \
+                        _zone['until'].strftime(_UNTIL_FORMAT)
+
+            if 'dhw' in tcs:
+                _id = tcs['dhw']['dhwId']
+                _dhw = _expire(settings['dhw'][_id], now)
+                if _dhw['value']:
+                    _state = _dhw['value']
+                elif _tcs['mode'] == 'Away':  # the DHW is off, when Away
+                    _state = 'Off'
+                else:
+                    _state = fixtures.scheduled(self.schedules[_id], now)
+
+                tcs['dhw']['stateStatus'] = {
+                    'state': _state, 'mode': _dhw['mode'],
+                }
+                if _dhw['until']:
+                    tcs['dhw']['stateStatus']['until'] = \
+                        _dhw['until'].strftime(_UNTIL_FORMAT)
+
+        return status
+
+    def _returnTarget(self, zone_id, zone, mode, now):
+        if mode in _MODE_TARGETS:
+            return _MODE_TARGETS[mode]
+        if zone['mode'] != 'FollowSchedule':
+            return zone['value']
+        return fixtures.scheduled(
+            self.schedules[zone_id], now, _MODE_DAYS.get(mode)
+        ) + _MODE_OFFSETS.get(mode, 0)
+
+    def true_status(self, now):
+        """Return the true status (i.e. the controller's, without any lag)."""
+        return self.render(now, self.truth, copy.deepcopy(self.status))
+
+    def returnWrite(self, kind, _id, body):
+        """Return a write (a function that applies it to a set of settings),
+        from the body of a request of the api (kind is tcs, zones or dhw)."""
+        if kind == 'tcs':
+            _mode = body['SystemMode']
+            _until = _parseUntil(body.get('TimeUntil'))
+
+            def _apply(settings):
+                settings['tcs'][_id].update(
+                    mode='Auto' if _mode == 'AutoWithReset' else _mode,
+                    until=_until,
+                )
+
+# after AutoWithReset, every zone (and the DHW) follows its schedule again, and
+# after any other change of mode (but Custom), only those temporarily overridden
+                for _kind, _child in self.children[_id]:
+                    _setting = settings[_kind][_child]
+                    if _mode == 'AutoWithReset' or (_mode != 'Custom'
+                            and _setting['mode'] == 'TemporaryOverride'):
+                        _setting.update(
+                            mode='FollowSchedule', value=None, until=None
+                        )
+
+            return _apply
+
+        if kind == 'zones':
+            _mode, _value = body['SetpointMode'], body.get('HeatSetpointValue')
+            _until = _parseUntil(body.get('TimeUntil'))
+        else:
+            _mode = body['Mode']
+            _value = (body.get('State') or '').capitalize() or None
+            _until = _parseUntil(body.get('UntilTime'))
+
+        if _mode == 'FollowSchedule':
+            _value = _until = None
+
+        return lambda settings: settings[kind][_id].update(
+            mode=_mode, value=_value, until=_until
+        )
+
+
+class evoSimulatedRequest(object):
+    """A request of the mock api, made in-process (i.e. not over HTTP)."""
+
+    def __init__(self, match_info, headers, form, body):
+        self.match_info = match_info
+        self.headers = headers or {}
+        self._form = form or {}
+        self._body = body or {}
+
+    async def post(self):
+        return self._form
+
+    async def json(self):
+        return self._body
+
+
+class evoSimulatedApi(mock_server.evoMockServer):
+    """The mock api, with the accounts of a simulation (see
+    evoSimulatedAccount), which is called in-process, as of a (virtual) clock.
+
+    Writes, and changes made at the controller itself (see external), are
+    reported after a lag, and the status is rendered as of the clock."""
+
+    def __init__(self, args, clock):
+        super().__init__(args, clock)
+
+        self._routes = [(
+            method,
+            re.compile(re.sub(r'{(\w+)}', r'(?P<\1>[^/]+)', path) + '$'),
+            handler, name
+        ) for method, path, handler, name in self.routes()]
+
+    async def request(self, method, path, headers=None, form=None, body=None):
+        """Make a request of the mock api (injecting any failures, as the
+        server's middleware does), and return its response: (status, JSON,
+        headers)."""
+        for _method, _regex, _handler, _name in self._routes:
+            _match = _regex.match(path)
+            if _match and _method == method.upper():
+                break
+        else:
+            self.counts[('unknown', 404)] += 1
+            return 404, None, {}
+
+        try:
+            _resp = self._inject()
+            if _resp is None:
+                _resp = await _handler(evoSimulatedRequest(
+                    _match.groupdict(), headers, form, body
+                ))
+        except web.HTTPException as err:
+            _resp = err
+
+        self.counts[(_name, _resp.status)] += 1
+
+        _json = json.loads(_resp.text) \
+            if _resp.content_type == 'application/json' else None
+        return _resp.status, _json, dict(_resp.headers)
+
+    def external(self, username, kind, _id, body):
+        """Make a change at the controller itself (i.e. not via the api), which
+        is reported after a lag, as are writes (see returnWrite)."""
+        _account = self.accounts[username]
+        _account.write(_account.returnWrite(kind, _id, body), self._due())
+
+    def _due(self):
+        return self._now() + self._rng.uniform(*self._lag)
+
+    def _returnAccount(self, username):
+        if username not in self.accounts:
+            self.accounts[username] = evoSimulatedAccount(
+                len(self.accounts), username, self.args, self._rng
+            )
+        return self.accounts[username]
+
+    def _converge(self, account):
+        """Apply any (pending) writes that are now due, and render the status
+        as of now."""
+        account.converge(self._now())
+        account.render(self.clock.now())
+
+    async def _write(self, request, kind):
+        """Queue a write, to be reported after a (random) lag, and return the
+        response (the id of the api's task)."""
+        _account = self._authorize(request)
+        _id = request.match_info['id']
+
+        if _id not in _account.truth[kind]:
+            raise web.HTTPNotFound()
+
+        try:
+            _write = _account.returnWrite(kind, _id, await request.json())
+        except KeyError as err:
+            raise web.HTTPBadRequest(
+                text=json.dumps([{'code': 'InvalidInput', 'message': str(err)}]),
+                content_type='application/json',
+            )
+
+        _account.write(_write, self._due())
+        self._converge(_account)
+
+        return web.json_response({'id': str(self._rng.randrange(10 ** 9))})
+
+    async def _set_mode(self, request):
+        return await self._write(request, 'tcs')
+
+    async def _set_setpoint(self, request):
+        return await self._write(request, 'zones')
+
+    async def _set_dhw(self, request):
+        return await self._write(request, 'dhw')
+
+
+class evoSimulatedTransport(object):
+    """A transport (of evohome.evoApiClient) that makes its requests of the
+    simulated api in-process, i.e. without HTTP or latency."""
+
+    def __init__(self, api):
+        self.api = api
+        self.requests = 0
+
+    async def async_request(self, client, method, url, **kwargs):
+        self.requests += 1
+
+        _status, _json, _headers = await self.api.request(
+            method, urlsplit(url).path,
+            kwargs.get('headers'), kwargs.get('data'), kwargs.get('json')
+        )
+
+        if _status >= 400:
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(URL(url), method.upper(), {}), (),
+                status=_status, message='Mock api', headers=_headers,
+            )
+
+# as if it had been sent over the wire (i.e. the response is a copy)
+        return json.loads(json.dumps(_json))
+
+
+def _returnStates(status):
+    """Return the states of a status, by id (of TCS, zone or DHW)."""
+    _states = {}
+
+    for loc in status:
+        for gwy in loc['gateways']:
+            for tcs in gwy['temperatureControlSystems']:
+                _states[tcs['systemId']] = \
+                    {'mode': tcs['systemModeStatus']['mode']}
+                for zone in tcs['zones']:
+                    _states[zone['zoneId']] = {
+                        'mode': zone['heatSetpointStatus']['setpointMode'],
+                        'target': zone['heatSetpointStatus']['targetTemperature'],
+                    }
+                if 'dhw' in tcs:
+                    _states[tcs['dhw']['dhwId']] = {
+                        'state': tcs['dhw']['stateStatus']['state'].lower(),
+                    }
+
+    return _states
+
+
+def _returnDisplayed(entity):
+    """Return the state of an entity (as HA has it), as per _returnStates."""
+    if isinstance(entity, evohome.evoController):
+        return {'mode': entity.current_operation}
+    if isinstance(entity, evohome.evoZone):
+        return {
+            'mode': entity.current_operation,
+            'target': entity.target_temperature,
+        }
+    return {'state': entity.state}
+
+
+class evoSimulation(object):
+    """A simulation of an account, with its results."""
+
+    def __init__(self, hass, args, clock, api, domain_data, entities):
+        self.hass = hass
+        self.args = args
+        self.clock = clock
+        self.api = api
+        self.domain_data = domain_data
+
+        self.entities = {}  # by id (the DHW sensor & switch are the same)
+        for entity in entities:
+            self.entities.setdefault(entity._id, entity)
+
+        self.account = api.accounts[domain_data['apiClient'].username]
+
+        self._rng = random.Random(args.seed)
+        self._wrong = {}  # by (id, attr): since when it's been wrong
+
+        self.samples = collections.Counter()  # by (attr, right): samples
+        self.lagging = collections.Counter()  # ditto, while the api lags
+        self.stale = collections.defaultdict(list)  # by attr: secs wrong
+        self.ages = []  # secs, the age of the state at every step
+        self.changes = collections.Counter()  # by kind
+        self.budget = 0  # the max. requests (of the budget) in an hour
+
+    async def async_step(self):
+        """Advance the clock by a step, update() every controller (and run any
+        timers), make any changes, and then sample the states."""
+        self.clock.advance(self.args.step)
+        _fireTimeChanged(self.hass, self.clock)
+
+        for entity in self.entities.values():
+            if isinstance(entity, evohome.evoController):
+                await entity.async_update()
+        await self.hass.async_block_till_done()
+
+        _chance = self.args.step / 86400
+        if self._rng.random() < self.args.changes * _chance:
+            await self._asyncChange()
+        if self._rng.random() < self.args.external * _chance:
+            self._external()
+        await self.hass.async_block_till_done()
+
+        self._sample()
+
+    async def _asyncChange(self):
+        """Make a change via an entity (as from HA)."""
+        entity = self._rng.choice(list(self.entities.values()))
+        _kind = type(entity).__name__
+
+        try:
+            if isinstance(entity, evohome.evoController):
+                await entity.async_set_operation_mode(
+                    self._rng.choice(_TCS_MODES)
+                )
+
+            elif isinstance(entity, evohome.evoZone):
+                if self._rng.random() < 0.25:
+                    await entity.async_set_operation_mode(evohome.EVO_FOLLOW)
+                else:
+                    await entity.async_set_temperature(**{
+                        evohome.ATTR_TEMPERATURE:
+                            self._rng.choice([15.0, 18.0, 19.5, 22.0]),
+                        evohome.ATTR_UNTIL: self._rng.choice([
+                            None, self.clock.now() + timedelta(hours=2)
+                        ]),
+                    })
+
+            elif self._rng.random() < 0.5:
+                await entity.async_turn_on()
+            else:
+                await entity.async_turn_off()
+
+        except Exception as err:
+            self.changes['failed_%s' % type(err).__name__] += 1
+
+        else:
+            self.changes[_kind] += 1
+
+    def _external(self):
+        """Make a change at the controller (i.e. of a zone's setpoint)."""
+        _zones = [
+            entity for entity in self.entities.values()
+                if isinstance(entity, evohome.evoZone)
+        ]
+        if not _zones:
+            return
+
+        self.api.external(
+            self.account.username, 'zones', self._rng.choice(_zones)._id, {
+                'SetpointMode': evohome.EVO_PERMOVER,
+                'HeatSetpointValue': self._rng.choice([17.0, 20.5]),
+            }
+        )
+        self.changes['external'] += 1
+
+    def _sample(self):
+        """Compare each entity's state against the true (and the reported)
+        state, and note the state's age."""
+        _now = self.clock.now()
+
+        self.account.converge(self.clock.monotonic())
+        _truth = _returnStates(self.account.true_status(_now))
+        _reported = _returnStates(self.account.render(_now))
+
+        for _id, entity in self.entities.items():
+            _displayed = _returnDisplayed(entity)
+
+            for _attr, _value in _truth[_id].items():
+                _key = (_id, _attr)
+                _right = _displayed[_attr] == _value
+
+                self.samples[(_attr, _right)] += 1
+                if _reported[_id][_attr] != _value:  # the api is lagging
+                    self.lagging[(_attr, _right)] += 1
+
+                if not _right:
+                    self._wrong.setdefault(_key, self.clock.elapsed)
+                elif _key in self._wrong:
+                    self.stale[_attr].append(
+                        self.clock.elapsed - self._wrong.pop(_key)
+                    )
+
+        self.ages.append(
+            (_now - self.domain_data['stateRefreshed']).total_seconds()
+        )
+        self.budget = max(self.budget, self.domain_data['budget'].used)
+
+
+async def _asyncRun(hass, args):
+    if args.start:
+        _start = datetime.strptime(args.start, '%Y-%m-%dT%H:%M')
+    else:
+        _start = datetime.now().replace(hour=0, minute=0, second=0,
+                                        microsecond=0)
+
+    clock = evoVirtualClock(_start)
+    _useClock(clock)
+
+    api = evoSimulatedApi(args.server, clock)
+    client = harness.returnClient(hass, evoSimulatedTransport(api))
+
+    _config = {
+        evohome.CONF_SCAN_INTERVAL: args.scan_interval,
+        evohome.CONF_USE_HEURISTICS: args.heuristics,
+        evohome.CONF_USE_SCHEDULES: args.schedules,
+        evohome.CONF_HIGH_PRECISION: not args.low_precision,
+        'password': args.server.password or 'password',
+    }
+    if args.api_budget:
+        _config[evohome.CONF_API_BUDGET] = args.api_budget
+
+    domain_data = await harness.asyncSetup(
+        hass, client, harness.returnConfig(**_config)
+    )
+    evohome._scheduleTokenRefresh(hass, domain_data)
+
+    sim = evoSimulation(
+        hass, args, clock, api, domain_data,
+        await harness.asyncReturnEntities(hass, domain_data)
+    )
+
+    _start = time.monotonic()
+    for _ in range(int(args.days * 86400 / args.step)):
+        await sim.async_step()
+
+    return sim, time.monotonic() - _start
+
+
+def _percent(counter, attr):
+    _total = counter[(attr, True)] + counter[(attr, False)]
+    return 100 * counter[(attr, True)] / _total if _total else float('nan')
+
+
+def _printReport(args, sim, elapsed):
+    _days = sim.clock.elapsed / 86400
+
+    print("Simulated %.1f days in %.1f secs (%.0fx), heuristics %s, "
+          "schedules %s" % (
+        _days, elapsed, sim.clock.elapsed / max(elapsed, 0.001),
+        args.heuristics, args.schedules,
+    ))
+    print("Changes: %s" % ", ".join(
+        "%s %s" % (key, value) for key, value in sorted(sim.changes.items())
+    ))
+
+    _requests = sum(sim.api.counts.values())
+    print("API requests: %s (%.0f per day), max. %s in an hour, "
+          "%s deferred" % (
+        _requests, _requests / _days, sim.budget,
+        sim.domain_data['budget'].deferred,
+    ))
+    for (name, status), count in sorted(sim.api.counts.items(), key=str):
+        print("  %-14s %s %8s (%.0f per day)" % (
+            name, status, count, count / _days
+        ))
+
+    _ages = sorted(sim.ages)
+    print("State age: median %.0f, p90 %.0f, max %.0f secs" % (
+        statistics.median(_ages), _ages[int(len(_ages) * 0.9)], _ages[-1]
+    ))
+
+    print("Accuracy (all samples / while the api is lagging), and staleness:")
+    for _attr in sorted({attr for attr, _ in sim.samples}):
+        _stale = sorted(sim.stale[_attr]) or [0]
+        print("  %-7s %5.1f%% / %5.1f%%, stale %4s times, median %4.0f, "
+              "p90 %5.0f secs" % (
+            _attr,
+            _percent(sim.samples, _attr),
+            _percent(sim.lagging, _attr),
+            len(sim.stale[_attr]),
+            statistics.median(_stale),
+            _stale[int(len(_stale) * 0.9)],
+        ))
+
+
+def main():
+    args = _returnArgs()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    from homeassistant.core import HomeAssistant
+
+    loop = asyncio.get_event_loop()
+    hass = HomeAssistant(loop)
+
+    sim, elapsed = loop.run_until_complete(_asyncRun(hass, args))
+    _printReport(args, sim, elapsed)
+
+
+if __name__ == '__main__':
+    main()